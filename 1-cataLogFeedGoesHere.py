@@ -1,17 +1,13 @@
 import os
-import time
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+import sys
 from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.action_chains import ActionChains
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
 from dotenv import load_dotenv
+from square_session import SQUARE_BASE_URL, open_driver, ensure_logged_in, release_driver
+from download_tracker import DownloadTracker
+from wait_policy import wait_policy
+from tracing import span, trace_script
 load_dotenv()
 
 email = os.getenv("SQUARE_EMAIL")
@@ -26,157 +22,66 @@ download_directory = os.path.join(os.getcwd(), "downloads")
 if not os.path.exists(download_directory):
     os.makedirs(download_directory)
 
-# Configure Chrome options
-chrome_options = Options()
-chrome_options.add_argument("--start-maximized")
-chrome_options.add_experimental_option("prefs", {
-    "download.default_directory": download_directory,
-    "download.prompt_for_download": False,
-    "download.directory_upgrade": True,
-    "safebrowsing.enabled": True
-})
+trace_script("script", script="1-cataLogFeedGoesHere.py")
 
-# Set up ChromeDriver
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
+# Attach to the shared logged-in browser (or start a private one)
+with span("browser_start"):
+    driver = open_driver(download_directory)
 
+exit_code = 1  # Cleared once the export has downloaded
 try:
     # Debug: Start the script
     print("[INFO] Starting the script...")
 
-    # Step 1: Open the login page
-    driver.get("https://app.squareup.com/dashboard/items")
-    print("[INFO] Opened the login page.")
+    # Steps 1-7: Log in only if the shared session has expired
+    dashboard_url = f"{SQUARE_BASE_URL}/dashboard/items/library"
+    ensure_logged_in(driver, dashboard_url, email, password)
 
-    # Step 2: Wait for the email input field to become visible
-    email_field = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "mpui-combo-field-input"))
-    )
-    print("[DEBUG] Email input field located.")
-
-    # Step 3: Enter email
-    email_field.send_keys(email)
-    print(f"[INFO] Entered email: {email}")
-    email_field.send_keys(Keys.RETURN)
-
-    # Step 4: Wait for the password field and enter password
-    password_field = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "password"))
-    )
-    print("[DEBUG] Password input field located.")
-
-    password_field.send_keys(password)
-    print("[INFO] Entered password.")
-    driver.find_element(By.NAME, "sign-in-button").click()
-    print("[INFO] Clicked 'Sign In' button.")
-
-    # Step 5: Handle "Remind me next time" button
-    remind_button = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-sms-remind-me-btn"))
-    )
-    remind_button.click()
-    print("[INFO] Clicked 'Remind me next time' button.")
-
-    # Step 6: Handle "Continue to Square" button
-    continue_button = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-opt-out-modal-continue"))
-    )
-    continue_button.click()
-    print("[INFO] Clicked 'Continue to Square' button.")
+    # Step 8: The Square Dashboard items page is already open
+    print(f"[INFO] Navigated to the dashboard page: {dashboard_url}")
     
-    time.sleep(25)
-
-    # Step 7: Check for and click the dismiss button if present
-    try:
-        # Wait for the notifications toaster to be present
-        print("[DEBUG] Waiting for notifications toaster to be present...")
-        toaster = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CLASS_NAME, "notifications-toaster.svelte-9e69kb.open"))
+    with span("export", export="catalog"):
+        # Step 9: Click on the action button as soon as the library has rendered
+        action_button = wait_policy.wait(
+            driver, "catalog.library_loaded",
+            EC.element_to_be_clickable((By.ID, "item-library-actions-dropdown-button-label")),
+            default_timeout=40
         )
-        print("[DEBUG] Notifications toaster found.")
-
-        # Wait for 10 seconds
-        print("[DEBUG] Waiting for 10 seconds before proceeding...")
-        time.sleep(10)
+        action_button.click()
+        print("[INFO] Clicked on the action button.")
 
-        # Wait for the shadow host element to be present
-        print("[DEBUG] Waiting for shadow host element to be present...")
-        shadow_host = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "eh-market-button[data-testid='notification-card-dismiss']"))
+        # Step 10: Click on the export library button
+        export_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "item-library-actions-export-row-label"))
         )
-        print("[DEBUG] Shadow host element found.")
+        export_button.click()
+        print("[INFO] Clicked on the export library button.")
 
-        # Access the shadow root of the element
-        shadow_root = shadow_host.shadow_root
-        print("[DEBUG] Accessed shadow root.")
-
-        # Find the dismiss button inside the shadow root
-        print("[DEBUG] Waiting for dismiss button to be clickable...")
-        dismiss_button = WebDriverWait(shadow_root, 10).until(
-            EC.element_to_be_clickable((By.CLASS_NAME, "dismiss"))
+        # Step 11: Click on the export button in the modal
+        final_export_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "market-button[data-test-catalog-export-modal-export]"))
         )
-        print("[DEBUG] Dismiss button found and is clickable.")
-
-        # Click the dismiss button
-        dismiss_button.click()
-        print("[INFO] Dismiss button clicked.")
+        # Snapshot the download folder so an older export is never picked up
+        tracker = DownloadTracker(download_directory, ".xlsx")
+        final_export_button.click()
+        print("[INFO] Clicked on the final export button.")
 
-    except TimeoutException:
-        print("[ERROR] Timeout occurred while waiting for an element.")
-    except NoSuchElementException:
-        print("[ERROR] Element not found.")
-    except Exception as e:
-        print(f"[ERROR] An error occurred: {e}")
-
-
-    # Step 8: Navigate to the Square Dashboard items page
-    dashboard_url = "https://app.squareup.com/dashboard/items/library"
-    driver.get(dashboard_url)
-    print(f"[INFO] Navigated to the dashboard page: {dashboard_url}")
-    
-    time.sleep(30)
-    # Step 9: Click on the action button
-    action_button = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.ID, "item-library-actions-dropdown-button-label"))
-    )
-    action_button.click()
-    print("[INFO] Clicked on the action button.")
-
-    # Step 10: Click on the export library button
-    export_button = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.ID, "item-library-actions-export-row-label"))
-    )
-    export_button.click()
-    print("[INFO] Clicked on the export library button.")
-
-    # Step 11: Click on the export button in the modal
-    final_export_button = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "market-button[data-test-catalog-export-modal-export]"))
-    )
-    final_export_button.click()
-    print("[INFO] Clicked on the final export button.")
-
-    # Step 12: Wait for the file to download
-    def wait_for_download(directory, timeout=60):
-        end_time = time.time() + timeout
-        while True:
-            files = os.listdir(directory)
-            if any(file.endswith(".xlsx") for file in files):  # Look for Excel files
-                print("[INFO] Excel file downloaded successfully.")
-                return True
-            if time.time() > end_time:
-                print("[ERROR] File download timed out.")
-                return False
-            time.sleep(1)
-
-    if wait_for_download(download_directory):
-        print(f"[INFO] File downloaded to: {download_directory}")
-    else:
-        print("[ERROR] File download did not complete successfully.")
+    # Step 12: Wait for exactly the new file to finish downloading
+    try:
+        with span("download", export="catalog"):
+            downloaded_file = tracker.wait_for_file(timeout=120)
+        print("[INFO] Excel file downloaded successfully.")
+        print(f"[INFO] File downloaded to: {downloaded_file}")
+        exit_code = 0
+    except TimeoutError as e:
+        print(f"[ERROR] File download did not complete successfully. {e}")
 
 except Exception as e:
     print(f"[ERROR] An error occurred: {e}")
 
 finally:
     print("[INFO] Closing the browser.")
-    driver.quit()
+    release_driver(driver)
+
+# Non-zero so the stage scheduler retries the export and skips 1-openSheet.py
+sys.exit(exit_code)
@@ -1,17 +1,14 @@
 import os
-from openpyxl import load_workbook
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+import sys
 from dotenv import load_dotenv  # Import dotenv to load environment variables
+from catalog_sync import CATALOG_COLUMNS, iter_catalog_rows, key_catalog_rows, sync_keyed_catalog
+from google_clients import get_gspread_client, open_worksheet
+from tracing import span, trace_script
+from export_manifest import ExportManifest, content_hash
 
 # Load environment variables from .env file
 load_dotenv()
 
-# Get the credentials.json file path from the .env file
-CREDENTIALS_JSON = os.getenv('CREDENTIALS_JSON')  # Ensure this is set in your .env file
-if not CREDENTIALS_JSON:
-    raise ValueError("CREDENTIALS_JSON path not found in .env file.")
-
 download_directory = os.path.join(os.getcwd(), "downloads")  
 target_sheet_name = "CatalogFeedGoesHere" 
 starting_column = "T"  
@@ -19,59 +16,66 @@ starting_column = "T"
 # Google Sheets setup
 def setup_google_sheets():
     """
-    Authenticate and connect to Google Sheets.
+    Authenticate and connect to Google Sheets (shared, cached client).
        """
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_JSON, scope)
-    client = gspread.authorize(creds)
-    return client
+    return get_gspread_client()
 
 def append_data_to_google_sheet(download_directory, client, sheet_name, starting_column):
     """
     Append data from the downloaded Excel file starting at the specified column in the Google Sheet.
+    Returns False if there was no Excel file to push.
     """
     # Find the latest downloaded Excel file
-    files = os.listdir(download_directory)
-    excel_file = next((f for f in files if f.endswith(".xlsx")), None)
+    files = [f for f in os.listdir(download_directory) if f.endswith(".xlsx")]
+    excel_file = max(files, key=lambda f: os.path.getmtime(os.path.join(download_directory, f)), default=None)
     if not excel_file:
         print("[ERROR] No Excel file found in the download directory.")
-        return
+        return False
     
     file_path = os.path.join(download_directory, excel_file)
     print(f"[INFO] Found Excel file: {file_path}")
 
-    # Load the downloaded Excel file
-    wb = load_workbook(file_path)
-    sheet = wb.active
-
-    # Extract data from the Excel sheet
-    data = []
-    for row in sheet.iter_rows(values_only=True):
-        data.append(row)
+    manifest = ExportManifest()
+    try:
+        # Skip the whole stage if this catalog content was already pushed
+        with span("content_hash", export="catalog"):
+            export_hash = content_hash(file_path)
+        if manifest.is_processed("catalog_sheet", export_hash):
+            print("[INFO] Catalog export is identical to the last one processed. Skipping the Google Sheet update.")
+        else:
+            push_catalog_file(file_path, sheet_name, starting_column)
+            manifest.record("catalog_sheet", export_hash, file_path)
+        manifest.archive_old_exports(download_directory, ".xlsx")
+    finally:
+        manifest.close()
+    return True
 
-    # Debug: Print extracted data
-    print("[DEBUG] Data extracted from Excel:")
-    for row in data:
-        print(row)
+def push_catalog_file(file_path, sheet_name, starting_column):
+    """
+    Reads the catalog Excel file and writes its changed rows to the Google Sheet.
+    """
+    with span("read_catalog") as read_span:
+        # Stream the Excel file row by row, keeping only the configured columns
+        keyed_rows = key_catalog_rows(iter_catalog_rows(file_path, CATALOG_COLUMNS))
+        read_span.count("rows", len(keyed_rows))
+    print(f"[DEBUG] Extracted {len(keyed_rows)} rows from Excel.")
 
     # Connect to Google Sheet and target the specified sheet tab
-    gsheet = client.open("Admin1").worksheet(sheet_name)
-    start_cell = f"{starting_column}3"
+    gsheet = open_worksheet("Admin1", sheet_name)
 
-    # Update Google Sheet with data from Excel
-    print("[INFO] Updating Google Sheet with actual data...")
-    gsheet.update(start_cell, data)
-    print(f"[INFO] Data successfully appended to the Google Sheet starting at {start_cell}.")
+    # Write only the rows that changed since the previous export
+    print("[INFO] Updating Google Sheet with changed catalog rows...")
+    with span("sheets_write") as write_span:
+        write_span.count("rows_changed", sync_keyed_catalog(gsheet, keyed_rows, starting_column, start_row=3))
+    print(f"[INFO] Catalog data in sync with the Google Sheet starting at {starting_column}3.")
 
 # Main execution block
+trace_script("script", script="1-openSheet.py")
 try:
     client = setup_google_sheets()
-    append_data_to_google_sheet(download_directory, client, target_sheet_name, starting_column)
+    if not append_data_to_google_sheet(download_directory, client, target_sheet_name, starting_column):
+        sys.exit(1)
 
 except Exception as e:
     print(f"[ERROR] An error occurred: {e}")
+    sys.exit(1)
@@ -1,17 +1,22 @@
 import os
-import time
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
+import sys
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from sheet_batch import SheetWriteBuffer
+from square_session import SQUARE_BASE_URL, open_driver, ensure_logged_in, release_driver
+from po_cache import ProcessedOrderCache
+from po_journal import RunJournal
+from google_clients import open_worksheet
+from wait_policy import wait_policy, network_idle, rows_present, row_count_changes
+from tracing import span, trace_script, count
+from line_matcher import LineItemIndex, normalize_qty
 
 # -------------------------------------------------------------------
 # >>> GLOBALS & CONSTANTS <<<
@@ -28,10 +33,21 @@ SHEET_TAB_NAMES = [
     "POMarco"
 ]
 
-# Global variable to remember our current row in the sheet
-search_start_row_global = 2  # We'll update this as we find matches
+# Number of browser workers processing sheet tabs concurrently
+PO_WORKERS = int(os.getenv("PO_WORKERS", "1"))
+
+# Only orders in these statuses need the search + modal handling
+ACTIONABLE_STATUSES = {"Received", "Partially Received"}
+
+# Give up scrolling the purchase-order list after this many attempts
+PO_LIST_MAX_SCROLLS = int(os.getenv("PO_LIST_MAX_SCROLLS", "200"))
+
+# Re-check orders the cache marks as fully reconciled
+PO_FORCE_REFRESH = os.getenv("PO_FORCE_REFRESH", "") == "1" or "--force-refresh" in sys.argv
+
+# Start over instead of resuming an interrupted run from its checkpoint journal
+PO_FRESH_RUN = os.getenv("PO_FRESH_RUN", "") == "1" or "--fresh-run" in sys.argv
 
-CREDENTIALS_JSON = os.getenv('CREDENTIALS_JSON')  
 GOOGLE_SHEET_NAME = "Admin1"
 
 
@@ -40,6 +56,9 @@ SEARCH_COLUMN_INDEX = 13  # Column M for ORDER #
 STATUS_COLUMN_INDEX = 14  # Column N
 NOTES_COLUMN_INDEX = 6     # Column F for "Notes"
 
+# Flush buffered sheet writes after each "order" or once per "tab"
+SHEET_FLUSH_SCOPE = os.getenv("SHEET_FLUSH_SCOPE", "order")
+
 # Environment Variables
 email = os.getenv("SQUARE_EMAIL")
 password = os.getenv("SQUARE_PASSWORD")
@@ -48,72 +67,44 @@ if not email or not password:
     exit(1)
 
 # -------------------------------------------------------------------
-# >>> SELENIUM & SHEETS INIT <<<
+# >>> PER-WORKER STATE <<<
 # -------------------------------------------------------------------
 
-def init_driver():
-    chrome_options = Options()
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_experimental_option(
-        "prefs",
-        {
-            "download.prompt_for_download": False,
-            "download.directory_upgrade": True,
-            "safebrowsing.enabled": True
-        }
-    )
-    driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
-    return driver
+class TabState:
+    """
+    State of one worker for the sheet tab it is processing.
+    Replaces the old module-level row pointer so workers never share it.
+    """
 
-def connect_to_google_sheet(sheet_name, sheet_tab_name):
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(CREDENTIALS_JSON, scope)
-    client = gspread.authorize(creds)
-    sheet = client.open(sheet_name).worksheet(sheet_tab_name)
-    return sheet
-
-def login_to_square(driver, email, password):
-    driver.get("https://app.squareup.com/dashboard/items/inventory/purchase-orders")
-    print("[INFO] Opened the login page.")
-
-    # Enter email
-    email_field = WebDriverWait(driver, 20).until(
-        EC.presence_of_element_located((By.ID, "mpui-combo-field-input"))
-    )
-    email_field.send_keys(email)
-    email_field.send_keys(Keys.RETURN)
-    print("[INFO] Entered email.")
+    def __init__(self, tab_name, order_statuses=None, cache=None, journal=None):
+        self.tab_name = tab_name
+        self.search_start_row = 2  # We'll update this as we find matches
+        self.line_index = None  # LineItemIndex of the tab, built on first use
+        self.order_statuses = order_statuses  # order# -> status from the list sweep
+        self.cache = cache  # ProcessedOrderCache of this worker
+        self.journal = journal  # RunJournal of this worker
+
+        # Outcome of the order currently being handled
+        self.last_status = None
+        self.last_line_items = None
+
+        # Run summary counters
+        self.processed = 0
+        self.skipped_cached = 0
+        self.skipped_status = 0
+        self.resumed = 0
+        self.match_counts = {"exact": 0, "fuzzy": 0, "missing": 0}
+        self.fuzzy_reviews = []  # (name, qty, sheet name, rows, score) left for manual review
 
-    # Enter password
-    password_field = WebDriverWait(driver, 20).until(
-        EC.presence_of_element_located((By.ID, "password"))
-    )
-    password_field.send_keys(password)
-    driver.find_element(By.NAME, "sign-in-button").click()
-    print("[INFO] Clicked 'Sign In' button.")
+# -------------------------------------------------------------------
+# >>> SELENIUM & SHEETS INIT <<<
+# -------------------------------------------------------------------
 
-    # Handle optional post-login prompts
-    try:
-        remind_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-sms-remind-me-btn"))
-        )
-        remind_button.click()
-        print("[INFO] Clicked 'Remind me next time' button.")
+PURCHASE_ORDERS_URL = f"{SQUARE_BASE_URL}/dashboard/items/inventory/purchase-orders"
 
-        continue_button = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-opt-out-modal-continue"))
-        )
-        continue_button.click()
-        print("[INFO] Clicked 'Continue to Square' button.")
-        
-        time.sleep(30)
-    except Exception as e:
-        print("[WARNING] Post-login prompts not encountered or skipped.")
+def connect_to_google_sheet(sheet_name, sheet_tab_name):
+    # Reuses one authorized client and spreadsheet handle for every tab
+    return open_worksheet(sheet_name, sheet_tab_name)
 
 # -------------------------------------------------------------------
 # >>> MODAL HELPER FUNCTIONS <<<
@@ -136,13 +127,34 @@ def close_modal(driver, timeout=10):
         )
         close_button.click()
         print("[INFO] 'Close' button clicked successfully.")
-        
-        time.sleep(1) 
+
+        wait_policy.wait(
+            driver, "po.modal_closed",
+            EC.invisibility_of_element_located((By.CSS_SELECTOR, "[aria-label='Close']")),
+            default_timeout=5, required=False
+        )
         
     except (NoSuchElementException, TimeoutException) as e:
         print("[ERROR] 'Close' button not found or not clickable. Details:", str(e))
         return  # Exit the function as "Close" is mandatory
 
+def wait_for_modal(driver):
+    """
+    Waits until the PO detail modal is open and its line items have rendered.
+    Raises TimeoutException if the modal does not open.
+    """
+    wait_policy.wait(
+        driver, "po.modal_loaded",
+        EC.presence_of_element_located((By.CSS_SELECTOR, "[aria-label='Close']")),
+        default_timeout=15
+    )
+    wait_policy.wait(
+        driver, "po.line_items",
+        rows_present("div[data-test-po-details-line-item]"),
+        default_timeout=10, required=False
+    )
+    wait_policy.wait(driver, "po.modal_idle", network_idle(), default_timeout=10, required=False)
+
 def click_save_button(driver, timeout=5):
     """
     Clicks the "Save" button if it appears after closing the modal.
@@ -165,6 +177,40 @@ def click_save_button(driver, timeout=5):
         # "Save" button is not present in the DOM
         print("[DEBUG] 'Save' button not found in the DOM.")
 
+# Reads Name, Qty and Status of every line item in the open PO modal.
+# Status is the "Receive" link text if present, else the status div text.
+LINE_ITEMS_SCRIPT = """
+return Array.from(document.querySelectorAll('div[data-test-po-details-line-item]')).map(function (row) {
+    function text(selector) {
+        var el = row.querySelector(selector);
+        return el ? el.innerText.trim() : null;
+    }
+    var receive = text('a[data-test-details-line-item-receive-link]');
+    return [
+        text('p.po-detail-sheet-row__item-name'),
+        text('[data-test-details-line-item-quantity]'),
+        receive !== null ? receive : text('div[data-test-details-line-item-status]')
+    ];
+});
+"""
+
+def extract_line_items(driver):
+    """
+    Returns [(name, qty, status), ...] for the open PO modal using a single
+    `execute_script` call instead of several WebDriver calls per line.
+
+    Parameters:
+    - driver: Selenium WebDriver instance.
+    """
+    line_items = []
+    for idx, (name_value, qty_value, line_status) in enumerate(driver.execute_script(LINE_ITEMS_SCRIPT), start=1):
+        if name_value is None or qty_value is None or line_status is None:
+            print(f"[DEBUG] Could not retrieve name/qty/status for line item #{idx}.")
+            continue
+        print(f"[DEBUG] Line item #{idx}: name='{name_value}', qty='{qty_value}', status='{line_status}'")
+        line_items.append((name_value, qty_value, line_status))
+    return line_items
+
 # -------------------------------------------------------------------
 # >>> DRIVER CLOSE FUNCTION <<<
 # -------------------------------------------------------------------
@@ -176,23 +222,65 @@ def close_driver(driver):
     Parameters:
     - driver: Selenium WebDriver instance.
     """
-    try:
-        driver.quit()
-        print("[INFO] WebDriver session closed successfully.")
-    except Exception as e:
-        print(f"[ERROR] Could not close WebDriver session. Error: {e}")
+    release_driver(driver)
+
+# -------------------------------------------------------------------
+# >>> LINE-ITEM MATCHING <<<
+# -------------------------------------------------------------------
+
+def reconcile_line_item(sheet, state, name_value, qty_value, min_row=1, take_all=False):
+    """
+    Finds the sheet row(s) of a received modal line item and moves their
+    Qty (column G) to the Notes column. Shared by both status handlers.
+    Only exact matches are written: a fuzzy match is logged for manual
+    review and its row is left as it is.
+
+    Parameters:
+    - sheet: SheetWriteBuffer of the tab.
+    - state: TabState of the tab; its LineItemIndex is built on first use.
+    - name_value, qty_value: Line item as read from the modal.
+    - min_row, take_all: See LineItemIndex.match().
+
+    Returns the LineMatch, whose kind ("exact", "fuzzy" or "missing") is
+    also counted on the tab and the current trace span.
+    """
+    if state.line_index is None:
+        state.line_index = LineItemIndex(sheet.get_all_values())
+    match = state.line_index.match(name_value, qty_value, min_row=min_row, take_all=take_all)
+    state.match_counts[match.kind] += 1
+    count(f"line_items_{match.kind}")
+
+    if match.kind == "missing":
+        print(f"[WARNING] Qty value '{qty_value}' with Name='{name_value}' from modal not found in sheet.")
+        return match
+
+    if match.kind == "fuzzy":
+        rows = ", ".join(str(r_idx) for r_idx in match.rows)
+        print(f"[WARNING] REVIEW: Name='{name_value}', Qty='{qty_value}' has no exact row; closest is "
+              f"'{match.sheet_name}' at row(s) {rows} (similarity {match.score:.2f}). Not moved.")
+        state.fuzzy_reviews.append((name_value, qty_value, match.sheet_name, match.rows, match.score))
+        return match
+
+    qty_normalized = normalize_qty(qty_value)
+    for r_idx in match.rows:
+        # Move value to the Notes column
+        sheet.update_cell(r_idx, NOTES_COLUMN_INDEX, qty_normalized)
+        # Clear the Qty in column G
+        sheet.update_cell(r_idx, 7, '')
+        print(f"[INFO] Moved qty '{qty_normalized}' from row {r_idx} to Notes column for Name='{name_value}'.")
+    return match
 
 # -------------------------------------------------------------------
 # >>> STATUS HANDLERS <<<
 # -------------------------------------------------------------------
 
-def process_status_pending(order_number, driver, sheet, row_index):
+def process_status_pending(order_number, driver, sheet, row_index, state):
     """Handler for Pending status."""
     print(f"[INFO] Order {order_number}: Status is 'Pending'. Skipping.")
     # No further processing required for Pending orders
     return False  # Skip to the next order
 
-def process_status_received(order_number, driver, sheet, row_index):
+def process_status_received(order_number, driver, sheet, row_index, state):
     """Handler for Received status."""
     print(f"[INFO] Order {order_number}: Status is 'Received'. Processing.")
     try:
@@ -222,86 +310,30 @@ def process_status_received(order_number, driver, sheet, row_index):
                 "td.table-cell.table-cell--selectable.page-inventory-list-table__cell--status."
                 "page-purchase-order-list__received-color"
             )
-            status_element = WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, status_css_selector))
+            status_element = wait_policy.wait(
+                driver, "po.status_clickable",
+                EC.element_to_be_clickable((By.CSS_SELECTOR, status_css_selector)),
+                default_timeout=15
             )
-            time.sleep(5)  # Reduced sleep time for efficiency
             status_element.click()
             print(f"[DEBUG] Clicked 'Received' status for order {order_number}.")
-            time.sleep(5)  # Reduced sleep time to wait for modal to load
         except TimeoutException:
             print(f"[WARNING] 'Received' status element not found for order {order_number}.")
             return False
 
         # --- Step 3: Wait for the modal to load ---
         try:
-            close_button_selector = "[aria-label='Close']"
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, close_button_selector))
-            )
+            wait_for_modal(driver)
             print(f"[DEBUG] Modal loaded for order {order_number}.")
-            time.sleep(5)  # Brief pause to ensure modal is fully loaded
         except TimeoutException:
             print(f"[WARNING] Modal did not load in time for order {order_number}.")
             return False
 
-        # --- Step 4: Gather line items ---
-        line_item_rows = driver.find_elements(
-            By.CSS_SELECTOR, "div[data-test-po-details-line-item]"
-        )
-
-        line_items = []
-        # --- Step 5: Extract Name, Qty, and Status for each line item ---
-        for idx, row_element in enumerate(line_item_rows, start=1):
-            try:
-                name_el = row_element.find_element(
-                    By.CSS_SELECTOR, "p.po-detail-sheet-row__item-name"
-                )
-                name_value = name_el.text.strip()
-
-                # Locate the Qty element
-                qty_el = row_element.find_element(
-                    By.CSS_SELECTOR, "[data-test-details-line-item-quantity]"
-                )
-                qty_value = qty_el.text.strip()
-
-                # Try to locate an <a> with "Receive" text
-                try:
-                    receive_link = row_element.find_element(
-                        By.CSS_SELECTOR, "a[data-test-details-line-item-receive-link]"
-                    )
-                    line_status = receive_link.text.strip()  # Usually "Receive"
-                except NoSuchElementException:
-                    # If there's no "Receive" link, look for a "Received" div
-                    status_div = row_element.find_element(
-                        By.CSS_SELECTOR, "div[data-test-details-line-item-status]"
-                    )
-                    line_status = status_div.text.strip()  # Usually "Received"
-
-                print(f"[DEBUG] Line item #{idx}: name='{name_value}', qty='{qty_value}', status='{line_status}'")
-                line_items.append((name_value, qty_value, line_status))
-
-            except Exception as e:
-                print(f"[DEBUG] Could not retrieve name/qty/status for line item #{idx}. Error: {e}")
-                continue
+        # --- Step 4 + 5: Gather Name, Qty and Status of every line item in one round trip ---
+        line_items = extract_line_items(driver)
+        state.last_line_items = line_items
 
-        # --- Step 6: Build a Lookup Dictionary from Sheet Data ---
-        lookup_dict = {}
-        sheet_values = sheet.get_all_values()  # Fetch all data at once for efficiency
-        for r_idx, row in enumerate(sheet_values, start=1):
-            sheet_name_value = str(row[0]).strip()  # Column A for Name
-            sheet_qty_value = str(row[6]).strip()  # Column G for Qty (0-based index)
-            if sheet_name_value and sheet_qty_value:
-                # Normalize quantities to integers for comparison
-                try:
-                    sheet_qty_normalized = int(float(sheet_qty_value))
-                except ValueError:
-                    print(f"[DEBUG] Invalid quantity '{sheet_qty_value}' at row {r_idx}. Skipping this row.")
-                    continue
-                lookup_key = (sheet_name_value.lower(), sheet_qty_normalized)
-                lookup_dict.setdefault(lookup_key, []).append(r_idx)
-
-        # --- Step 7: Update the Sheet based on Line Items ---
+        # --- Step 6 + 7: Match every received line item against the tab's line-item index ---
         for (name_value, qty_value, line_status) in line_items:
             # Skip lines where status == "Receive"
             if line_status.lower() == "receive":
@@ -313,30 +345,13 @@ def process_status_received(order_number, driver, sheet, row_index):
                 print("[DEBUG] Skipping empty qty value.")
                 continue
 
-            # Normalize values for comparison
-            name_normalized = name_value.lower()
-            try:
-                qty_normalized = int(float(qty_value))
-            except ValueError:
+            if normalize_qty(qty_value) is None:
                 print(f"[WARNING] Invalid qty '{qty_value}' for Name='{name_value}'. Skipping this item.")
                 continue
 
-            lookup_key = (name_normalized, qty_normalized)
-            matched_rows = lookup_dict.get(lookup_key, [])
-
-            if matched_rows:
-                for r_idx in matched_rows:
-                    # Move value to the Notes column
-                    sheet.update_cell(r_idx, NOTES_COLUMN_INDEX, qty_normalized)
-                    # Clear the Qty in column G
-                    sheet.update_cell(r_idx, 7, '')
-                    print(f"[INFO] Moved qty '{qty_normalized}' from row {r_idx} to Notes column for Name='{name_value}'.")
-                # Optionally, remove the matched rows to prevent duplicate processing
-                del lookup_dict[lookup_key]
-            else:
-                print(f"[WARNING] Qty value '{qty_value}' with Name='{name_value}' from modal not found in sheet.")
+            # Every row listing this item and qty is moved
+            reconcile_line_item(sheet, state, name_value, qty_value, take_all=True)
 
-        time.sleep(5)
         # --- Step 8: Close the modal ---
         close_modal(driver)
 
@@ -353,7 +368,7 @@ def process_status_received(order_number, driver, sheet, row_index):
         print(f"[WARNING] Could not process 'Received' for order {order_number}. Error: {e}")
         return False
 
-def process_status_partially_received(order_number, driver, sheet, row_index):
+def process_status_partially_received(order_number, driver, sheet, row_index, state):
     """
     Handler for 'Partially Received' status.
     - Clicks the 'Partially Received' order row.
@@ -364,71 +379,26 @@ def process_status_partially_received(order_number, driver, sheet, row_index):
     print(f"[INFO] Order {order_number}: Status is 'Partially Received'. Processing.")
     try:
         # 1) Click the "Partially Received" status on the main page
-        status_element = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located(
+        status_element = wait_policy.wait(
+            driver, "po.status_clickable",
+            EC.element_to_be_clickable(
                 (By.XPATH,
                  "//td[contains(@class, 'page-purchase-order-list__receiving-color') "
                  "and contains(., 'Partially Received')]"
                 )
-            )
+            ),
+            default_timeout=15
         )
-        time.sleep(5)  # Reduced sleep time for efficiency
         status_element.click()
         print(f"[DEBUG] Clicked 'Partially Received' status for order {order_number}.")
-        time.sleep(5)  # Wait for modal to load
 
         # 2) Wait for the modal to appear
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "[aria-label='Close']"))
-        )
+        wait_for_modal(driver)
         print(f"[DEBUG] Modal loaded for order {order_number}.")
-        time.sleep(5)  # Brief pause
-
-        # 3) Gather line items as <div data-test-po-details-line-item="...">
-        line_item_rows = driver.find_elements(
-            By.CSS_SELECTOR, "div[data-test-po-details-line-item]"
-        )
-
-        line_items = []
-        # 4) For each line-item div, get Name, Qty + Status
-        for idx, row_element in enumerate(line_item_rows, start=1):
-            try:
-                name_el = row_element.find_element(
-                    By.CSS_SELECTOR, "p.po-detail-sheet-row__item-name"
-                )
-                name_value = name_el.text.strip()
-
-                # Locate the Qty element
-                qty_el = row_element.find_element(
-                    By.CSS_SELECTOR, "[data-test-details-line-item-quantity]"
-                )
-                qty_value = qty_el.text.strip()
-
-                # Try to locate an <a> with "Receive" text
-                try:
-                    receive_link = row_element.find_element(
-                        By.CSS_SELECTOR, "a[data-test-details-line-item-receive-link]"
-                    )
-                    line_status = receive_link.text.strip()  # Usually "Receive"
-                except NoSuchElementException:
-                    # If there's no "Receive" link, look for a "Received" div
-                    status_div = row_element.find_element(
-                        By.CSS_SELECTOR, "div[data-test-details-line-item-status]"
-                    )
-                    line_status = status_div.text.strip()  # Usually "Received"
-
-                print(f"[DEBUG] Line item #{idx}: name='{name_value}', qty='{qty_value}', status='{line_status}'")
-                line_items.append((name_value, qty_value, line_status))
-
-            except Exception as e:
-                print(f"[DEBUG] Could not retrieve name/qty/status for line item #{idx}. Error: {e}")
-                continue
 
-        # >>> Global approach to track the row pointer <<<
-        global search_start_row_global
-
-        # Count how many total rows the sheet has in col_values(SEARCH_COLUMN_INDEX)
-        max_rows = len(sheet.col_values(SEARCH_COLUMN_INDEX)) + 1
+        # 3) + 4) Gather Name, Qty + Status of every line item in one round trip
+        line_items = extract_line_items(driver)
+        state.last_line_items = line_items
 
         # 5) Only move the Qty → Notes column if status is 'Received' and Name matches
         for (name_value, qty_value, line_status) in line_items:
@@ -442,28 +412,11 @@ def process_status_partially_received(order_number, driver, sheet, row_index):
                 print(f"[DEBUG] Skipping Name='{name_value}', Qty='{qty_value}' because status='{line_status}'.")
                 continue
 
-            matched = False
-            # Search from our global pointer forward
-            for r_idx in range(search_start_row_global, max_rows + 1):
-                sheet_qty_value = sheet.cell(r_idx, 7).value  # column G for Qty
-                sheet_name_value = sheet.cell(r_idx, 1).value  # column A for Name
-
-                # Normalize both Name and Qty for accurate comparison
-                if (str(sheet_name_value).strip().lower() == name_value.lower()) and (str(sheet_qty_value).strip() == str(qty_value).strip()):
-                    # Move value to the Notes column
-                    sheet.update_cell(r_idx, NOTES_COLUMN_INDEX, qty_value)
-                    # Clear the Qty in column G
-                    sheet.update_cell(r_idx, 7, '')
-                    print(f"[INFO] Moved qty '{qty_value}' from row {r_idx} to Notes column for Name='{name_value}'.")
-
-                    # Update the global pointer so the next item won't start over
-                    search_start_row_global = r_idx + 1
-                    matched = True
-                    break
-
-            if not matched:
-                print(f"[WARNING] Qty value '{qty_value}' with Name='{name_value}' from modal not found in sheet.")
-        time.sleep(5)
+            # Search from the tab's row pointer forward, then move the pointer past the match
+            match = reconcile_line_item(sheet, state, name_value, qty_value, min_row=state.search_start_row)
+            if match.kind == "exact":
+                state.search_start_row = match.rows[-1] + 1
+
         # 6) Close the modal
         close_modal(driver)
 
@@ -480,7 +433,7 @@ def process_status_partially_received(order_number, driver, sheet, row_index):
 # >>> ORDER STATUS DISPATCH <<<
 # -------------------------------------------------------------------
 
-def handle_order_status(order_number, driver, sheet, row_index):
+def handle_order_status(order_number, driver, sheet, row_index, state):
     """
     Determine the status of the order and process it accordingly.
     Returns True if processing was successful, False otherwise.
@@ -493,6 +446,7 @@ def handle_order_status(order_number, driver, sheet, row_index):
             ))
         )
         status_text = status_element.text.strip()
+        state.last_status = status_text
 
         # Map statuses to processing functions
         status_handlers = {
@@ -503,7 +457,7 @@ def handle_order_status(order_number, driver, sheet, row_index):
 
         # Call the appropriate handler
         if status_text in status_handlers:
-            return status_handlers[status_text](order_number, driver, sheet, row_index)
+            return status_handlers[status_text](order_number, driver, sheet, row_index, state)
         else:
             print(f"[WARNING] Order {order_number}: Unrecognized status '{status_text}'. Skipping.")
             return False
@@ -515,31 +469,344 @@ def handle_order_status(order_number, driver, sheet, row_index):
 # >>> MAIN LOOP: Checking Orders <<<
 # -------------------------------------------------------------------
 
-def check_order_status(sheet, driver):
-    """Main function to check and process all orders in the sheet."""
+def check_order_status(sheet, driver, state):
+    """
+    Main function to check and process all orders in the sheet.
+
+    Cell writes are queued in a SheetWriteBuffer and flushed as one batch
+    update per order (or per tab, see SHEET_FLUSH_SCOPE). Orders enter the
+    processed-order cache only after their writes were flushed.
+    """
+    sheet = SheetWriteBuffer(sheet)
     order_numbers = sheet.col_values(SEARCH_COLUMN_INDEX)[1:]  # Skip header row
+    order_rows = {}  # order # -> its 1-based sheet rows
+    for r_idx, order_number in enumerate(order_numbers, start=2):
+        order_rows.setdefault(order_number, []).append(r_idx)
+    print(f"[INFO] Loaded sheet '{sheet.title}' using {sheet.take_api_calls()} Sheets API call(s).")
 
+    awaiting_flush = []  # (order #, status) processed but not flushed yet
+
+    def flush_and_record():
+        """Flushes the queued writes; only then are the orders behind them marked as done."""
+        if not flush_sheet_writes(sheet):
+            return False
+        if state.journal:
+            state.journal.mark_applied(state.tab_name)
+        if state.cache:
+            for flushed_order, status in awaiting_flush:
+                state.cache.record(state.tab_name, flushed_order, status,
+                                   sheet_line_items(sheet, order_rows[flushed_order]))
+        awaiting_flush.clear()
+        return True
+
+    # Pick up where an interrupted run stopped: finish its unflushed writes, skip its completed orders
+    completed_orders = set()
+    if state.journal:
+        pending_writes = state.journal.pending_writes(state.tab_name)
+        for pending_order, writes in pending_writes.items():
+            # Replay only onto rows that still belong to the order; otherwise handle the order again
+            if any(order_numbers[row - 2:row - 1] != [pending_order] for row, _ in writes):
+                print(f"[WARNING] Sheet '{sheet.title}': rows of order {pending_order} moved since the journal "
+                      f"was written. Not replaying its writes; the order is checked again.")
+                state.journal.forget_order(state.tab_name, pending_order)
+                continue
+            print(f"[INFO] Sheet '{sheet.title}': replaying {len(writes)} unflushed cell write(s) of order "
+                  f"{pending_order} from the journal.")
+            for (row, col), value in writes.items():
+                sheet.update_cell(row, col, value)
+        if pending_writes:
+            flush_and_record()
+        completed_orders = state.journal.completed_orders(state.tab_name)
+        resume_row = state.journal.resume_row(state.tab_name)
+        if resume_row:
+            state.search_start_row = resume_row
+            print(f"[INFO] Sheet '{sheet.title}': resuming after {len(completed_orders)} completed order(s).")
+
+    seen_orders = set()
     for index, order_number in enumerate(order_numbers):
         if not order_number:
             continue  # Skip empty rows
 
+        # Each line-item row repeats its order number; one pass handles the whole order
+        if order_number in seen_orders:
+            continue
+        seen_orders.add(order_number)
+
+        if order_number in completed_orders:
+            state.resumed += 1
+            continue
+
+        # Skip orders reconciled to a terminal status on an earlier run, unless their sheet rows changed since
+        if state.cache and state.cache.should_skip(state.tab_name, order_number, sheet_line_items(sheet, order_rows[order_number])):
+            print(f"[INFO] Order {order_number}: Already reconciled on an earlier run. Skipping.")
+            state.skipped_cached += 1
+            continue
+
+        # Skip orders the list sweep already showed as not actionable
+        known_status = state.order_statuses.get(order_number) if state.order_statuses else None
+        if known_status is not None and known_status not in ACTIONABLE_STATUSES:
+            print(f"[INFO] Order {order_number}: Status is '{known_status}' in the order list. Skipping.")
+            state.skipped_status += 1
+            continue
+
+        with span("order", order=order_number) as order_span:
+            state.last_status = None
+            state.last_line_items = None
+
+            try:
+                # Search for the order in the UI
+                search_input = WebDriverWait(driver, 30).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder='Search Vendor or Order #']"))
+                )
+                search_input.clear()
+                search_input.send_keys(order_number)
+                search_input.send_keys(Keys.RETURN)
+
+                # Wait for the order to show up in the results, then for the list to settle
+                wait_policy.wait(
+                    driver, "po.search_results",
+                    EC.presence_of_element_located((
+                        By.XPATH,
+                        f"//td[contains(@class, 'table-cell--link') and normalize-space()='{order_number}']"
+                    )),
+                    default_timeout=15, required=False
+                )
+                wait_policy.wait(driver, "po.search_idle", network_idle(), default_timeout=10, required=False)
+
+                # Handle the order based on its status
+                queued_before = dict(sheet.pending)
+                if handle_order_status(order_number, driver, sheet, index + 1, state):
+                    state.processed += 1
+                    if state.journal:
+                        # Journal the order's cell writes before they are flushed
+                        writes = {cell: value for cell, value in sheet.pending.items()
+                                  if cell not in queued_before or queued_before[cell] != value}
+                        state.journal.record_order(state.tab_name, order_number, state.last_status, writes,
+                                                   state.search_start_row)
+                    awaiting_flush.append((order_number, state.last_status))
+                else:
+                    print(f"[INFO] Order {order_number}: Processing skipped or failed.")
+            except Exception as e:
+                print(f"[ERROR] Could not process order {order_number}. Error: {e}")
+
+            order_span.attrs["status"] = state.last_status
+            if SHEET_FLUSH_SCOPE == "order":
+                flush_and_record()
+            print(f"[INFO] Order {order_number}: used {sheet.take_api_calls()} Sheets API call(s).")
+
+    if flush_and_record() and state.journal:
+        state.journal.finish_tab(state.tab_name)
+    print(f"[INFO] Sheet '{sheet.title}': {sheet.total_api_calls} Sheets API call(s) in total.")
+    print(f"[INFO] Sheet '{sheet.title}': {state.processed} processed, {state.skipped_cached} skipped (cached), "
+          f"{state.skipped_status} skipped (status), {state.resumed} skipped (completed before a restart).")
+
+def sheet_line_items(sheet, rows):
+    """Returns [(name, notes, qty), ...] of the given 1-based rows as they stand in the sheet snapshot."""
+    return [(sheet.cell_value(r_idx, 1), sheet.cell_value(r_idx, NOTES_COLUMN_INDEX), sheet.cell_value(r_idx, 7))
+            for r_idx in rows]
+
+def flush_sheet_writes(sheet):
+    """
+    Flushes the buffered writes, logging instead of raising on API errors.
+    Returns True if nothing is left unflushed.
+    """
+    try:
+        sheet.flush()
+        return True
+    except Exception as e:
+        print(f"[ERROR] Could not flush sheet updates for '{sheet.title}'. Error: {e}")
+        return False
+
+# -------------------------------------------------------------------
+# >>> PURCHASE-ORDER LIST SWEEP <<<
+# -------------------------------------------------------------------
+
+# Reads (order #, status) for every row currently rendered in the list
+PO_LIST_ROWS_SCRIPT = """
+return Array.from(document.querySelectorAll('tr')).map(function (row) {
+    var order = row.querySelector('td.table-cell--link');
+    var status = row.querySelector('td.page-inventory-list-table__cell--status');
+    return order && status ? [order.textContent.trim(), status.textContent.trim()] : null;
+}).filter(Boolean);
+"""
+
+PO_LIST_SCROLL_SCRIPT = """
+var rows = document.querySelectorAll('tr');
+if (rows.length) { rows[rows.length - 1].scrollIntoView(); }
+"""
+
+def sweep_order_statuses(driver, max_scrolls=PO_LIST_MAX_SCROLLS):
+    """
+    Loads the purchase-order list once and scrolls through it, returning
+    an order# -> status map.
+
+    Parameters:
+    - driver: Selenium WebDriver instance.
+    - max_scrolls: Upper bound on scroll steps for very long lists.
+    """
+    driver.get(PURCHASE_ORDERS_URL)
+    WebDriverWait(driver, 30).until(
+        EC.presence_of_element_located((By.CSS_SELECTOR, "td.page-inventory-list-table__cell--status"))
+    )
+
+    statuses = {}
+    for _ in range(max_scrolls):
+        rows = driver.execute_script(PO_LIST_ROWS_SCRIPT)
+        for order_number, status_text in rows:
+            statuses.setdefault(order_number, status_text)
+
+        # Scroll and wait for more rows; none arriving means the end of the list
+        row_count = len(driver.find_elements(By.CSS_SELECTOR, "tr"))
+        driver.execute_script(PO_LIST_SCROLL_SCRIPT)
+        if wait_policy.wait(
+            driver, "po.list_page", row_count_changes("tr", row_count),
+            default_timeout=5, required=False, record_timeouts=False
+        ) is None:
+            break
+
+    actionable = sum(1 for status_text in statuses.values() if status_text in ACTIONABLE_STATUSES)
+    print(f"[INFO] Order list sweep: {len(statuses)} order(s), {actionable} actionable.")
+
+    # Back to the top of the list so the search box is usable again
+    driver.get(PURCHASE_ORDERS_URL)
+    return statuses
+
+class OrderStatusSweep:
+    """
+    Runs the purchase-order list sweep once per run and shares the result
+    across workers and sheet tabs.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.statuses = None
+
+    def get(self, driver):
+        with self.lock:
+            if self.statuses is None:
+                try:
+                    with span("order_list_sweep") as sweep_span:
+                        self.statuses = sweep_order_statuses(driver)
+                        sweep_span.count("orders", len(self.statuses))
+                except Exception as e:
+                    # Fall back to searching every order individually
+                    print(f"[WARNING] Order list sweep failed. Searching orders one by one. Error: {e}")
+                    self.statuses = {}
+            return self.statuses
+
+# -------------------------------------------------------------------
+# >>> WORKER POOL <<<
+# -------------------------------------------------------------------
+
+# Serializes logins so only the first worker re-authenticates an expired session
+login_lock = threading.Lock()
+
+def reconcile_worker(worker_id, tab_queue, status_sweep, tab_states, parent_span=None):
+    """
+    Processes sheet tabs from `tab_queue` until it is empty, using its own
+    browser tab on the shared Square session. The TabState of every tab
+    handled is appended to `tab_states` for the run summary.
+    """
+    cache = ProcessedOrderCache(force_refresh=PO_FORCE_REFRESH)
+    journal = RunJournal()
+    with span("browser_start", parent=parent_span, worker=worker_id):
+        driver = open_driver()
+    try:
+        with login_lock, span("login_check", parent=parent_span, worker=worker_id):
+            ensure_logged_in(driver, PURCHASE_ORDERS_URL, email, password)
+        order_statuses = status_sweep.get(driver)
+
+        while True:
+            try:
+                sheet_tab_name = tab_queue.get_nowait()
+            except queue.Empty:
+                return
+            print(f"[INFO] Worker {worker_id}: Processing sheet: '{sheet_tab_name}'")
+            try:
+                with span("tab", parent=parent_span, tab=sheet_tab_name, worker=worker_id):
+                    sheet = connect_to_google_sheet(GOOGLE_SHEET_NAME, sheet_tab_name)
+                    state = TabState(sheet_tab_name, order_statuses, cache, journal)
+                    tab_states.append(state)
+                    check_order_status(sheet, driver, state)
+            except Exception as e:
+                print(f"[ERROR] Worker {worker_id}: Could not process sheet '{sheet_tab_name}'. Error: {e}")
+    finally:
+        # Ensure any pending save actions are handled and driver is closed
         try:
-            # Search for the order in the UI
-            search_input = WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "input[placeholder='Search Vendor or Order #']"))
-            )
-            search_input.clear()
-            search_input.send_keys(order_number)
-            search_input.send_keys(Keys.RETURN)
-            time.sleep(3)  # Wait for results to load
-
-            # Handle the order based on its status
-            if not handle_order_status(order_number, driver, sheet, index + 1):
-                print(f"[INFO] Order {order_number}: Processing skipped or failed.")
+            click_save_button(driver)
         except Exception as e:
-            print(f"[ERROR] Could not process order {order_number}. Error: {e}")
+            print(f"[DEBUG] 'Save' button could not be clicked during cleanup. Error: {e}")
+        close_driver(driver)
+        cache.close()
+        journal.close()
 
-        time.sleep(2)  # Pause before processing next order
+def run_worker_pool(sheet_tab_names, workers=PO_WORKERS, parent_span=None):
+    """
+    Runs `workers` browser workers over the sheet tabs concurrently.
+    Each tab is handled by exactly one worker, so its sheet writes and row
+    pointer never interleave with another worker's. Tabs an interrupted
+    run already finished are skipped (see RunJournal). Returns the
+    TabState of every tab handled and the list of tabs left unfinished.
+    """
+    journal = RunJournal()
+    try:
+        if journal.begin_run(fresh=PO_FRESH_RUN):
+            print("[INFO] Resuming the interrupted run from the checkpoint journal.")
+        remaining_tabs = journal.unfinished_tabs(sheet_tab_names)
+    finally:
+        journal.close()
+    for sheet_tab_name in sheet_tab_names:
+        if sheet_tab_name not in remaining_tabs:
+            print(f"[INFO] Sheet '{sheet_tab_name}' was finished before the restart. Skipping.")
+
+    tab_queue = queue.Queue()
+    for sheet_tab_name in remaining_tabs:
+        tab_queue.put(sheet_tab_name)
+
+    status_sweep = OrderStatusSweep()
+    tab_states = []
+    workers = max(1, min(workers, len(remaining_tabs)))
+    try:
+        if remaining_tabs:
+            print(f"[INFO] Starting {workers} worker(s) for {len(remaining_tabs)} sheet(s).")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(reconcile_worker, worker_id, tab_queue, status_sweep, tab_states, parent_span) for worker_id in range(1, workers + 1)]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        print(f"[ERROR] A worker stopped with an error: {e}")
+    finally:
+        # Reached unless the process is killed; only a killed run is resumed
+        journal = RunJournal()
+        try:
+            unfinished_tabs = journal.unfinished_tabs(sheet_tab_names)
+            if unfinished_tabs:
+                journal.end_run()
+            else:
+                journal.finish_run()
+        finally:
+            journal.close()
+
+    print_run_summary(tab_states)
+    if unfinished_tabs:
+        print(f"[ERROR] Sheet(s) not finished: {', '.join(unfinished_tabs)}.")
+    return tab_states, unfinished_tabs
+
+def print_run_summary(tab_states):
+    """Prints processed/skipped order counts and line-item match kinds per sheet tab, then the fuzzy matches to review."""
+    print("[INFO] Run summary:")
+    print(f"{'Sheet':<20} {'Processed':>10} {'Cached':>10} {'Status':>10} {'Exact':>7} {'Fuzzy':>7} {'Missing':>8}")
+    for state in sorted(tab_states, key=lambda s: s.tab_name):
+        matches = state.match_counts
+        print(f"{state.tab_name:<20} {state.processed:>10} {state.skipped_cached:>10} {state.skipped_status:>10} "
+              f"{matches['exact']:>7} {matches['fuzzy']:>7} {matches['missing']:>8}")
+
+    reviews = [(state.tab_name,) + review for state in tab_states for review in state.fuzzy_reviews]
+    if reviews:
+        print(f"[WARNING] {len(reviews)} line item(s) need manual review (fuzzy matches were not written):")
+        for tab_name, name, qty, sheet_name, rows, score in sorted(reviews, key=lambda review: review[0]):
+            print(f"  {tab_name}: '{name}' x {qty} -> '{sheet_name}' row(s) {', '.join(map(str, rows))} ({score:.2f})")
 
 # -------------------------------------------------------------------
 # >>> MAIN ENTRY POINT <<<
@@ -547,28 +814,17 @@ def check_order_status(sheet, driver):
 
 if __name__ == "__main__":
     print("[INFO] Starting the script...")
+    script_span = trace_script("script", script="2-Check_POS.py")
 
+    exit_code = 0
     try:
-        driver = init_driver()
-        login_to_square(driver, email, password)
-
-        # Iterate over each sheet tab name
-        for sheet_tab_name in SHEET_TAB_NAMES:
-            print(f"[INFO] Processing sheet: '{sheet_tab_name}'")
-            sheet = connect_to_google_sheet(GOOGLE_SHEET_NAME, sheet_tab_name)
-            
-            # Reset the global search start row for each sheet
-            search_start_row_global = 2
-
-            # Process orders in the current sheet
-            check_order_status(sheet, driver)
+        _, unfinished_tabs = run_worker_pool(SHEET_TAB_NAMES, PO_WORKERS, parent_span=script_span)
+        if unfinished_tabs:
+            exit_code = 1
     except Exception as e:
         print(f"[ERROR] An error occurred: {e}")
+        exit_code = 1
     finally:
-        # Ensure any pending save actions are handled and driver is closed
-        try:
-            click_save_button(driver)  # Ensure any pending save actions are handled
-        except Exception as e:
-            print(f"[DEBUG] 'Save' button could not be clicked during cleanup. Error: {e}")
-        close_driver(driver)
         print("[INFO] Script completed.")
+    # Non-zero so the stage scheduler retries the run and reports it as failed
+    sys.exit(exit_code)
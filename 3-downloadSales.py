@@ -1,21 +1,24 @@
 import os
-import time
-import csv
+import sys
 from datetime import datetime, timedelta
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
 from dotenv import load_dotenv
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from square_session import SQUARE_BASE_URL, open_driver, ensure_logged_in, release_driver
+from download_tracker import DownloadTracker
+from wait_policy import wait_policy, text_changes
+from tracing import span, trace_script
+from sheets_import import (
+    measure_csv, load_progress, import_csv_in_chunks, upload_csv, copy_converted_sheet, delete_drive_file
+)
+from sales_store import SalesStore, sync_sales_sheet
+from sales_columns import load_sales_table
+from sales_rollups import SALES_ITEM_ROLLUP_SHEET, SALES_CATEGORY_ROLLUP_SHEET, update_sales_rollups
+from export_manifest import ExportManifest, content_hash
+from google_clients import open_spreadsheet
 
 # Load environment variables
 load_dotenv()
@@ -27,219 +30,239 @@ if not email or not password:
     print("[ERROR] Environment variables SQUARE_EMAIL and SQUARE_PASSWORD are not set.")
     exit(1)
 
-# Google Sheets setup
-def setup_google_sheets():
-    """
-    Authenticate and connect to Google Sheets.
-    """
-    print("[DEBUG] Setting up Google Sheets API connection...")
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive.file",
-        "https://www.googleapis.com/auth/drive"
-    ]
-    creds = ServiceAccountCredentials.from_json_keyfile_name(os.getenv("CREDENTIALS_JSON"), scope)
-    client = gspread.authorize(creds)
-    print("[DEBUG] Google Sheets API setup complete.")
-    return client
-
-def upload_csv_to_drive(download_directory):
+# "incremental" appends only new/changed rows to SALES_SHEET_NAME;
+# "full" recreates a sheet per export like before, writing the cells through the values API;
+# "drive" also recreates the sheet, but lets Drive convert the upload and copies that tab server side
+SALES_SYNC_MODE = os.getenv("SALES_SYNC_MODE", "incremental")
+SALES_SHEET_NAME = os.getenv("SALES_SHEET_NAME", "SalesDetail")
+# Item/SKU x Location x Date summary tabs computed locally (see sales_rollups.py);
+# with SALES_RAW_ROWS=0 the raw rows are no longer pushed at all
+SALES_ROLLUPS = os.getenv("SALES_ROLLUPS", "1") != "0"
+SALES_RAW_ROWS = os.getenv("SALES_RAW_ROWS", "1") != "0"
+
+def upload_csv_to_drive(file_path, convert=False):
     """
     Upload the downloaded CSV file to Google Drive with the same name (without extension).
+    With `convert`, Drive turns it into a Google spreadsheet for a server-side import.
     """
-    print("[DEBUG] Searching for CSV files in the download directory...")
-    files = os.listdir(download_directory)
-    csv_files = [f for f in files if f.endswith(".csv")]
-    
-    if not csv_files:
-        print("[ERROR] No CSV file found in the download directory.")
-        return None
-    
-    # Get the most recent CSV file by creation time
-    csv_file = max(csv_files, key=lambda f: os.path.getctime(os.path.join(download_directory, f)))
-    file_path = os.path.join(download_directory, csv_file)
-    print(f"[DEBUG] Found CSV file: {file_path}")
+    csv_file = os.path.basename(file_path)
+    print(f"[DEBUG] Uploading CSV file: {file_path}")
 
     # Remove the `.csv` extension from the file name
     file_name_without_extension = os.path.splitext(csv_file)[0]
     print(f"[DEBUG] Using file name without extension: {file_name_without_extension}")
 
     # Upload to Google Drive with the same name as the file (without extension)
-    service = build('drive', 'v3', credentials=ServiceAccountCredentials.from_json_keyfile_name(os.getenv("CREDENTIALS_JSON"), ["https://www.googleapis.com/auth/drive.file"]))
-    file_metadata = {
-        'name': file_name_without_extension,  # Use the downloaded file's name without extension
-        'mimeType': 'application/vnd.ms-excel'
-    }
-    media = MediaFileUpload(file_path, mimetype='text/csv', resumable=True)
-    uploaded_file = service.files().create(body=file_metadata, media_body=media, fields='id').execute()
+    file_id = upload_csv(file_path, file_name_without_extension, convert=convert)
 
-    print(f"[DEBUG] File uploaded to Google Drive. File ID: {uploaded_file['id']}")
-    return uploaded_file['id'], file_path, file_name_without_extension  # Return file ID, path, and file name without extension
+    print(f"[DEBUG] File uploaded to Google Drive. File ID: {file_id}")
+    return file_id, file_path, file_name_without_extension  # Return file ID, path, and file name without extension
 
 def create_new_sheet_and_import_csv(file_path, sheet_name):
     """
-    Create a new sheet and import the CSV data into it, after deleting the last sheet if it exists.
+    Create a new sheet and stream the CSV data into it in fixed-size row
+    blocks, after deleting the previous import's sheet if it exists. An
+    interrupted import of the same file resumes from its last committed block.
     """
     print(f"[DEBUG] Creating new sheet and importing CSV data...")
     
     # Connect to Google Sheets API
-    client = setup_google_sheets()
-    spreadsheet = client.open('Admin1')  # Replace with your actual Google Sheet name
+    spreadsheet = open_spreadsheet('Admin1')  # Replace with your actual Google Sheet name
 
-    # Delete the last sheet before proceeding
-    delete_last_sheet(spreadsheet)
+    # Determine the number of rows and columns without loading the file
+    num_rows, num_cols = measure_csv(file_path)
 
-    # Read the CSV data into memory and determine the number of rows and columns
-    with open(file_path, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.reader(f)
-        data = list(reader)
-    
-    num_rows = len(data)
-    num_cols = len(data[0]) if num_rows > 0 else 0
+    if load_progress(file_path, sheet_name):
+        # The last sheet is our own partial import: keep it and resume
+        worksheet = spreadsheet.worksheet(sheet_name)
+    else:
+        # Delete the previous import's sheet before proceeding
+        previous_sheet = previous_sales_sheet(spreadsheet)
+        if previous_sheet is not None:
+            spreadsheet.del_worksheet(previous_sheet)
+            print(f"[INFO] Deleted previous sales sheet: {previous_sheet.title}")
 
-    print(f"[DEBUG] Creating new worksheet with {num_rows} rows and {num_cols} columns.")
-    
-    # Create a new worksheet with the required number of rows and columns
-    spreadsheet.add_worksheet(title=sheet_name, rows=str(num_rows), cols=str(num_cols))
-    print(f"[INFO] Created new sheet '{sheet_name}' with {num_rows} rows and {num_cols} columns.")
+        print(f"[DEBUG] Creating new worksheet with {num_rows} rows and {num_cols} columns.")
 
-    # Get the newly created worksheet
-    worksheet = spreadsheet.worksheet(sheet_name)
+        # Create a new worksheet with the required number of rows and columns
+        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=str(num_rows), cols=str(num_cols))
+        remember_sales_sheet(worksheet.id)
+        print(f"[INFO] Created new sheet '{sheet_name}' with {num_rows} rows and {num_cols} columns.")
 
-    # Update the new sheet with the CSV data
-    worksheet.update('A1', data)  # Start inserting data from A1
+    # Stream the CSV data into the new sheet block by block
+    import_csv_in_chunks(worksheet, file_path, num_rows)
     print(f"[INFO] Data successfully imported into the new sheet: {sheet_name}")
 
-def delete_last_sheet(spreadsheet):
+def import_converted_csv(file_id, sheet_name):
     """
-    Deletes the last sheet in the spreadsheet.
+    Replace the previous import's sheet with the tab of the Drive-converted
+    CSV. No cell data is sent through the values API. The old tab is only
+    deleted once the copy succeeded; the converted Drive file is deleted
+    either way.
     """
-    sheets = spreadsheet.worksheets()
-    if sheets:
-        last_sheet = sheets[-1]  # Get the last sheet
-        spreadsheet.del_worksheet(last_sheet)  # Delete the last sheet
-        print(f"[INFO] Deleted last sheet: {last_sheet.title}")
-    else:
-        print("[INFO] No sheets found to delete.")
-
-# Set up Chrome options for Selenium
-download_directory = os.path.join(os.getcwd(), "download Sales")
-chrome_options = Options()
-chrome_options.add_argument("--start-maximized")
-chrome_options.add_experimental_option("prefs", {
-    "download.default_directory": download_directory,
-    "download.prompt_for_download": False,
-    "download.directory_upgrade": True,
-    "safebrowsing.enabled": True
-})
-
-# Set up ChromeDriver
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-def wait_for_download(download_directory):
+    print(f"[DEBUG] Copying the converted sheet into Admin1...")
+    try:
+        spreadsheet = open_spreadsheet('Admin1')
+        previous_sheet = previous_sales_sheet(spreadsheet)
+        remember_sales_sheet(copy_converted_sheet(file_id, spreadsheet, sheet_name, replace_sheet=previous_sheet))
+        if previous_sheet is not None:
+            print(f"[INFO] Deleted previous sales sheet: {previous_sheet.title}")
+        print(f"[INFO] Data successfully imported into the new sheet: {sheet_name}")
+    finally:
+        delete_drive_file(file_id)
+
+def sync_sales_incrementally(file_path):
     """
-    Wait until the CSV file is fully downloaded.
+    Add the CSV rows to the local sales store and push only the rows that
+    are new or changed since the last run to the sales sheet.
     """
-    print("[DEBUG] Waiting for CSV file to be downloaded...")
-    while True:
-        # List files in the download directory
-        files = os.listdir(download_directory)
-        # Look for any CSV file that's downloading (Chrome's .crdownload extension)
-        downloading = [f for f in files if f.endswith(".crdownload")]
-        if not downloading:
-            # Once the download is complete, check for the CSV file
-            csv_files = [f for f in files if f.endswith(".csv")]
-            if csv_files:
-                print(f"[DEBUG] Download complete. File: {csv_files[-1]}")
-                return os.path.join(download_directory, csv_files[-1])
-        time.sleep(1)  # Check every second
+    print("[DEBUG] Syncing sales rows incrementally...")
+    store = SalesStore()
+    try:
+        store.ingest(file_path)
+        spreadsheet = open_spreadsheet('Admin1')
+        sync_sales_sheet(spreadsheet, store, SALES_SHEET_NAME)
+    finally:
+        store.close()
+
+def previous_sales_sheet(spreadsheet):
+    """
+    Returns the worksheet written by the previous full/drive import, or None.
+
+    It is found by the sheet ID remembered after that import. Without one
+    (or if that tab is gone) it falls back to the last tab, as before, but
+    never to a summary tab or the incremental sales tab: those are created
+    after the import tab and would otherwise be the ones replaced.
+    """
+    store = SalesStore()
+    try:
+        sheet_id = store.get_meta("import_sheet_id")
+    finally:
+        store.close()
+    sheets = spreadsheet.worksheets()
+    for worksheet in sheets:
+        if worksheet.id == sheet_id:
+            return worksheet
+    kept_titles = {SALES_ITEM_ROLLUP_SHEET, SALES_CATEGORY_ROLLUP_SHEET, SALES_SHEET_NAME}
+    candidates = [worksheet for worksheet in sheets if worksheet.title not in kept_titles]
+    return candidates[-1] if candidates else None
+
+def remember_sales_sheet(sheet_id):
+    """Stores the sheet ID of the new import tab for previous_sales_sheet()."""
+    store = SalesStore()
+    try:
+        store.set_meta("import_sheet_id", sheet_id)
+        store.connection.commit()
+    finally:
+        store.close()
+
+# Attach to the shared logged-in browser (or start a private one)
+download_directory = os.path.join(os.getcwd(), "download Sales")
+trace_script("script", script="3-downloadSales.py")
+with span("browser_start"):
+    driver = open_driver(download_directory)
 
+exit_code = 0
 try:
-    # Step 1: Open the login page
-    print("[DEBUG] Opening login page...")
-    driver.get("https://app.squareup.com/dashboard/sales/reports/item-sales")
-    print("[INFO] Opened the login page.")
-
-    # Step 2: Wait for the email input field to become visible
-    print("[DEBUG] Waiting for the email input field...")
-    email_field = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "mpui-combo-field-input"))
-    )
-    email_field.send_keys(email)
-    email_field.send_keys(Keys.RETURN)
-
-    # Step 3: Wait for the password field and enter password
-    print("[DEBUG] Waiting for the password field...")
-    password_field = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.ID, "password"))
-    )
-    password_field.send_keys(password)
-    driver.find_element(By.NAME, "sign-in-button").click()
-
-    # Step 4: Handle "Remind me next time" and "Continue to Square"
-    print("[DEBUG] Handling 'Remind me next time' and 'Continue to Square'...")
-    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-sms-remind-me-btn"))).click()
-    WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-opt-out-modal-continue"))).click()
-
-    # Step 5: Navigate to the sales report page
+    # Steps 1-5: Open the sales report page, logging in only if the shared session has expired
     print("[DEBUG] Navigating to the sales report page...")
-    driver.get("https://app.squareup.com/dashboard/sales/reports/item-sales")
-
-    time.sleep(25)  # Wait for the page to load fully
-    
-    
-
-    # Step 6: Click on the date selector and set the range
-    print("[DEBUG] Clicking on the date selector and setting the range...")
-    date_selector_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "ember87")))
-    date_selector_button.click()
-
-    start_date = (datetime.now() - timedelta(days=30)).strftime("%m/%d/%Y")  # 30 days ago
-    start_date_field = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ember137")))
-    start_date_field.clear()
-    start_date_field.send_keys(start_date)
-
-    end_date = datetime.now().strftime("%m/%d/%Y")  # Today's date
-    end_date_field = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ember139")))
-    end_date_field.clear()
-    end_date_field.send_keys(end_date)
-    end_date_field.send_keys(Keys.RETURN)  # Submit
-
-    time.sleep(8)  # Wait for the data to load
+    ensure_logged_in(driver, f"{SQUARE_BASE_URL}/dashboard/sales/reports/item-sales", email, password)
+
+    with span("export", export="sales"):
+        # Step 6: Click on the date selector (as soon as the report has rendered) and set the range
+        print("[DEBUG] Clicking on the date selector and setting the range...")
+        date_selector_button = wait_policy.wait(
+            driver, "sales.report_loaded", EC.element_to_be_clickable((By.ID, "ember87")), default_timeout=35
+        )
+        range_label = date_selector_button.text
+        date_selector_button.click()
+
+        start_date = (datetime.now() - timedelta(days=30)).strftime("%m/%d/%Y")  # 30 days ago
+        start_date_field = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ember137")))
+        start_date_field.clear()
+        start_date_field.send_keys(start_date)
+
+        end_date = datetime.now().strftime("%m/%d/%Y")  # Today's date
+        end_date_field = WebDriverWait(driver, 10).until(EC.presence_of_element_located((By.ID, "ember139")))
+        end_date_field.clear()
+        end_date_field.send_keys(end_date)
+        end_date_field.send_keys(Keys.RETURN)  # Submit
+
+        # The date selector shows the new range once the report has reloaded for it
+        if not wait_policy.wait(driver, "sales.range_applied", text_changes((By.ID, "ember87"), range_label),
+                                default_timeout=15, required=False):
+            print("[WARNING] The date range label did not change; the report may still show the previous range.")
+
+        # Step 7: Click on the "Export" button
+        print("[DEBUG] Clicking on the Export button...")
+        export_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "ember283")))
+        export_button.click()
+
+        # Step 8: Click on the "Detail CSV" button once the export options are shown
+        print("[DEBUG] Clicking on the 'Detail CSV' button...")
+        detail_csv_button = wait_policy.wait(
+            driver, "sales.export_menu",
+            EC.element_to_be_clickable((By.CSS_SELECTOR, "market-row:nth-of-type(2) .market-export-link__label")),
+            default_timeout=15
+        )
+        # Snapshot the download folder so older CSVs and stray .crdownload files are ignored
+        tracker = DownloadTracker(download_directory, ".csv")
+        detail_csv_button.click()
+
+    # Wait for exactly this export to finish downloading
+    with span("download", export="sales"):
+        downloaded_file = tracker.wait_for_file(timeout=180)
+
+    # Skip the upload and Sheets writes entirely if this content was already pushed
+    manifest = ExportManifest()
+    try:
+        with span("content_hash", export="sales"):
+            export_hash = content_hash(downloaded_file)
+        if manifest.is_processed("sales", export_hash):
+            print("[INFO] Sales export is identical to the last one processed. Skipping upload and Sheets writes.")
+        else:
+            # Parse the export into typed columns once; the cache next to the CSV serves later reads
+            with span("parse", export="sales") as parse_span:
+                sales_table = load_sales_table(downloaded_file)
+                parse_span.count("rows", len(sales_table))
+
+            # Step 9: Upload the downloaded CSV to Google Drive and import it to Google Sheets
+            print("[DEBUG] Uploading the CSV file to Google Drive...")
+            with span("drive_upload"):
+                file_id, file_path, file_name_without_extension = upload_csv_to_drive(
+                    downloaded_file, convert=SALES_SYNC_MODE == "drive" and SALES_RAW_ROWS
+                )  # Upload the file to Google Drive
+            if file_id and SALES_RAW_ROWS:
+                print("[DEBUG] Importing the CSV data to Google Sheets...")
+                with span("sheets_write", mode=SALES_SYNC_MODE):
+                    if SALES_SYNC_MODE == "full":
+                        # Create a new sheet with the same name as the CSV file and import the CSV data
+                        create_new_sheet_and_import_csv(file_path, file_name_without_extension)  # Use the CSV file name without extension as the new sheet name
+                    elif SALES_SYNC_MODE == "drive":
+                        # Drive already converted the upload; copy that tab in under the CSV file name
+                        import_converted_csv(file_id, file_name_without_extension)
+                    else:
+                        sync_sales_incrementally(file_path)
+            if file_id and SALES_ROLLUPS:
+                print("[DEBUG] Updating the sales summary tabs...")
+                with span("sheets_write", mode="rollups"):
+                    update_sales_rollups(file_path, open_spreadsheet('Admin1'))
+            if file_id:
+                manifest.record("sales", export_hash, downloaded_file)
+            else:
+                print("[ERROR] The CSV could not be uploaded to Google Drive.")
+                exit_code = 1
+        manifest.archive_old_exports(download_directory, ".csv")
+    finally:
+        manifest.close()
 
-    # Step 7: Click on the "Export" button
-    print("[DEBUG] Clicking on the Export button...")
-    export_button = WebDriverWait(driver, 10).until(EC.element_to_be_clickable((By.ID, "ember283")))
-    export_button.click()
-
-    time.sleep(5)  # Wait for the export options to load
-
-    # Step 8: Click on the "Detail CSV" button
-    print("[DEBUG] Clicking on the 'Detail CSV' button...")
-    detail_csv_button = WebDriverWait(driver, 10).until(
-    EC.element_to_be_clickable((By.CSS_SELECTOR, "market-row:nth-of-type(2) .market-export-link__label"))
-)
-    detail_csv_button.click()
-
-
-    time.sleep(5)  # Wait for the CSV file to start downloading
-
-    # Wait for the CSV file to finish downloading
-    downloaded_file = wait_for_download(download_directory)
-
-    # Step 9: Upload the downloaded CSV to Google Drive and import it to Google Sheets
-    print("[DEBUG] Uploading the CSV file to Google Drive...")
-    file_id, file_path, file_name_without_extension = upload_csv_to_drive(download_directory)  # Upload the file to Google Drive
-    if file_id:
-        print("[DEBUG] Importing the CSV data to Google Sheets...")
-        # Create a new sheet with the same name as the CSV file and import the CSV data
-        create_new_sheet_and_import_csv(file_path, file_name_without_extension)  # Use the CSV file name without extension as the new sheet name
-        
 except Exception as e:
     print(f"[ERROR] An error occurred: {e}")
+    exit_code = 1
 
 finally:
     print("[INFO] Closing the browser.")
-    driver.quit()
+    release_driver(driver)
+
+# Non-zero so the stage scheduler retries the export and reports it as failed
+sys.exit(exit_code)
@@ -0,0 +1,84 @@
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import run_bench  # noqa: F401 (puts the repository on sys.path)
+from fake_square import FakeSquareConfig, build_catalog_xlsx
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+# Catalog sizes measured, as multiples of --catalog-rows
+DEFAULT_SCALES = [1, 10, 100]
+
+# Columns kept by the projected reader (a typical CATALOG_COLUMNS setting)
+PROJECTED_COLUMNS = ["Token", "Item Name", "SKU", "Price"]
+
+# -------------------------------------------------------------------
+# >>> READERS <<<
+# -------------------------------------------------------------------
+
+def read_full(file_path):
+    """The previous reader: full workbook load, every row copied into a list."""
+    from openpyxl import load_workbook
+    from catalog_sync import key_catalog_rows
+
+    wb = load_workbook(file_path)
+    data = [row for row in wb.active.iter_rows(values_only=True)]
+    return key_catalog_rows(data)
+
+def read_streaming(file_path):
+    from catalog_sync import iter_catalog_rows, key_catalog_rows
+    return key_catalog_rows(iter_catalog_rows(file_path, []))
+
+def read_projected(file_path):
+    from catalog_sync import iter_catalog_rows, key_catalog_rows
+    return key_catalog_rows(iter_catalog_rows(file_path, PROJECTED_COLUMNS))
+
+READERS = {"full": read_full, "stream": read_streaming, "projected": read_projected}
+
+def measure(reader, file_path):
+    """Returns (seconds, peak MB, rows); the timed pass runs without tracemalloc's overhead."""
+    started = time.perf_counter()
+    rows = len(reader(file_path))
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        reader(file_path)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak / (1024 * 1024), rows
+
+# -------------------------------------------------------------------
+# >>> MAIN ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Times the catalog xlsx readers and measures their peak Python memory at growing catalog sizes."
+    )
+    parser.add_argument("--catalog-rows", type=int, default=1000, help="Rows of the 1x catalog (today's export has ~1,100).")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--readers", nargs="+", choices=list(READERS), default=list(READERS))
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="catalog-reader-")
+    print(f"{'Scale':>6} {'Rows':>8} {'File MB':>8} {'Reader':<10} {'Seconds':>8} {'Peak MB':>8}")
+    for scale in args.scales:
+        file_path = os.path.join(workdir, f"catalog-{scale}x.xlsx")
+        with open(file_path, "wb") as f:
+            f.write(build_catalog_xlsx(FakeSquareConfig(catalog_rows=args.catalog_rows * scale)))
+        file_mb = os.path.getsize(file_path) / (1024 * 1024)
+        for name in args.readers:
+            elapsed, peak_mb, rows = measure(READERS[name], file_path)
+            print(f"{scale:>5}x {rows:>8} {file_mb:>8.1f} {name:<10} {elapsed:>8.2f} {peak_mb:>8.1f}")
+        os.remove(file_path)
+
+if __name__ == "__main__":
+    # Usage: python bench/bench_catalog_reader.py [--catalog-rows 1000] [--scales 1 10 100]
+    main()
@@ -0,0 +1,225 @@
+import os
+import sys
+import math
+import argparse
+from datetime import datetime, date, timedelta
+
+from run_bench import (
+    add_fixture_arguments, fixtures_from_arguments, seed_admin_spreadsheet,
+    bench_environment, load_script, run_script
+)
+from fake_square import FakeSquareServer, build_catalog_xlsx, build_sales_csv
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+SCENARIOS = ["catalog", "sales", "sales_tabs", "rollups", "po"]
+
+# Opening "Admin1": one Drive search plus the spreadsheet metadata
+OPEN_SPREADSHEET_BUDGET = {"drive.files.list": 1, "sheets.spreadsheets.get": 1}
+
+# -------------------------------------------------------------------
+# >>> BUDGETS <<<
+# -------------------------------------------------------------------
+
+def with_open(budget):
+    """Adds the calls of opening the spreadsheet to a per-method budget."""
+    merged = dict(OPEN_SPREADSHEET_BUDGET)
+    for method, calls in budget.items():
+        merged[method] = merged.get(method, 0) + calls
+    return merged
+
+def check_budget(name, stats, budget):
+    """
+    Prints the calls of one scenario against its budget and returns True
+    if no method went over budget and nothing was throttled. Methods
+    missing from the budget are allowed 0 calls.
+    """
+    print(f"\n[INFO] {name}")
+    print(f"{'Method':<36} {'Calls':>6} {'Budget':>7} {'Sent KB':>9} {'429s':>5}")
+    ok = True
+    for method in sorted(set(stats) | set(budget)):
+        entry = stats.get(method, {"calls": 0, "request_bytes": 0, "throttled": 0})
+        allowed = budget.get(method, 0)
+        over = entry["calls"] > allowed or entry["throttled"] > 0
+        ok = ok and not over
+        print(f"{method:<36} {entry['calls']:>6} {allowed:>7} {entry['request_bytes'] / 1024:>9.1f} "
+              f"{entry['throttled']:>5}{'  OVER BUDGET' if over else ''}")
+    return ok
+
+# -------------------------------------------------------------------
+# >>> SCENARIOS <<<
+# -------------------------------------------------------------------
+
+def scenario_catalog(google, config, workdir, env):
+    """append_data_to_google_sheet (1-openSheet.py): a first sync, then the same export again."""
+    downloads = os.path.join(workdir, "downloads")
+    os.makedirs(downloads, exist_ok=True)
+    with open(os.path.join(downloads, f"FAKE_catalog-{datetime.now():%Y-%m-%d-%H%M%S}.xlsx"), "wb") as f:
+        f.write(build_catalog_xlsx(config))
+
+    results = []
+    # First sync: read the used column once, write everything in one batch
+    google.reset_stats()
+    run_script("1-openSheet.py", workdir, env)
+    results.append(check_budget(
+        "append_data_to_google_sheet: first sync", google.snapshot_stats(),
+        with_open({"sheets.spreadsheets.get": 1, "sheets.values.get": 1, "sheets.values.batchUpdate": 1})
+    ))
+    # Unchanged export: the content hash matches the manifest, so no Google API calls at all
+    google.reset_stats()
+    run_script("1-openSheet.py", workdir, env)
+    results.append(check_budget(
+        "append_data_to_google_sheet: unchanged export", google.snapshot_stats(), {}
+    ))
+    return all(results)
+
+def scenario_sales(google, config, workdir, env):
+    """create_new_sheet_and_import_csv (3-downloadSales.py, SALES_SYNC_MODE=full), Drive upload included."""
+    from sheets_import import DEFAULT_CHUNK_ROWS
+
+    env = dict(env, SALES_SYNC_MODE="full", SALES_ROLLUPS="0")
+    google.reset_stats()
+    run_script("3-downloadSales.py", workdir, env)
+    chunks = math.ceil((config.sales_rows + 1) / DEFAULT_CHUNK_ROWS)
+    return check_budget(
+        f"create_new_sheet_and_import_csv: {config.sales_rows} rows", google.snapshot_stats(),
+        with_open({
+            "drive.files.create": 1,
+            "drive.files.upload": 1,
+            "sheets.spreadsheets.get": 1,           # worksheets() to find the last sheet
+            "sheets.spreadsheets.batchUpdate": 2,   # delete the last sheet, add the new one
+            "sheets.values.update": chunks,
+        })
+    )
+
+def scenario_sales_tabs(google, config, workdir, env):
+    """
+    3-downloadSales.py with the summary tabs on, twice per import mode:
+    each run must replace the previous import tab, never a summary tab.
+    """
+    from google_clients import open_spreadsheet
+    from sales_rollups import SALES_ITEM_ROLLUP_SHEET, SALES_CATEGORY_ROLLUP_SHEET
+
+    summary_titles = {SALES_ITEM_ROLLUP_SHEET, SALES_CATEGORY_ROLLUP_SHEET}
+    # Every tab but the last one (the old sales import the seed ends with) must survive
+    kept_titles = {worksheet.title for worksheet in open_spreadsheet('Admin1').worksheets()[:-1]}
+
+    results = []
+    summary_ids = None
+    for mode in ["full", "drive"]:
+        for run in range(1, 3):
+            # The same export every run: force it past the manifest so each run imports it again
+            result = run_script("3-downloadSales.py", workdir,
+                                dict(env, SALES_SYNC_MODE=mode, SALES_ROLLUPS="1", EXPORT_FORCE="1"))
+            sheets = open_spreadsheet('Admin1').worksheets()
+            titles = [worksheet.title for worksheet in sheets]
+            ids = {worksheet.title: worksheet.id for worksheet in sheets if worksheet.title in summary_titles}
+            imports = [title for title in titles if title not in kept_titles | summary_titles]
+
+            problems = [f"3-downloadSales.py exited with {result.returncode}"] if result.returncode else []
+            if set(ids) != summary_titles:
+                problems.append("a summary tab is missing")
+            elif summary_ids is not None and ids != summary_ids:
+                problems.append("a summary tab was deleted and recreated")
+            if len(imports) != 1:
+                problems.append(f"{len(imports)} sales import tabs instead of 1: {imports}")
+            if not kept_titles <= set(titles):
+                problems.append(f"deleted {sorted(kept_titles - set(titles))}")
+            summary_ids = ids or summary_ids
+
+            print(f"\n[INFO] sales tabs: {mode} import, run {run}: {', '.join(titles[-4:])}")
+            for problem in problems:
+                print(f"[ERROR] {problem}")
+            results.append(not problems)
+    return all(results)
+
+def scenario_rollups(google, config, workdir, env):
+    """update_sales_rollups (3-downloadSales.py): a first export, the same export again, then one more day."""
+    from sales_rollups import update_sales_rollups
+    from google_clients import open_spreadsheet
+
+    first_day = date.today() - timedelta(days=29)
+    exports = []
+    for name, start, end in [("first", first_day, date.today() - timedelta(days=1)),
+                             ("next", date.today() - timedelta(days=1), date.today())]:
+        path = os.path.join(workdir, f"rollups-{name}.csv")
+        with open(path, "wb") as f:
+            f.write(build_sales_csv(config, start, end))
+        exports.append(path)
+
+    # Two summary tabs: worksheet() each, then create/resize and one write per tab
+    results = []
+    for title, path, budget in [
+        ("first export", exports[0], {"sheets.spreadsheets.get": 2, "sheets.spreadsheets.batchUpdate": 2, "sheets.values.update": 2}),
+        ("unchanged export", exports[0], {"sheets.spreadsheets.get": 2}),
+        ("overlapping export", exports[1], {"sheets.spreadsheets.get": 2, "sheets.spreadsheets.batchUpdate": 2, "sheets.values.update": 2}),
+    ]:
+        google.reset_stats()
+        update_sales_rollups(path, open_spreadsheet('Admin1'))
+        results.append(check_budget(f"update_sales_rollups: {title}", google.snapshot_stats(), with_open(budget)))
+    return all(results)
+
+def scenario_po(google, config, workdir, env):
+    """The PO status handlers (2-Check_POS.py worker pool), with one flush per processed order."""
+    os.environ["SHEET_FLUSH_SCOPE"] = "order"
+    check_pos = load_script("2-Check_POS.py", "check_pos_budget")
+    google.reset_stats()
+    tab_states, _ = check_pos.run_worker_pool(check_pos.SHEET_TAB_NAMES, 1)
+    tabs = len(check_pos.SHEET_TAB_NAMES)
+    processed = sum(state.processed for state in tab_states)
+    return check_budget(
+        f"PO handlers: {processed} processed order(s) over {tabs} tab(s)", google.snapshot_stats(),
+        with_open({
+            "sheets.spreadsheets.get": tabs,    # worksheet() per tab
+            "sheets.values.get": tabs,          # one snapshot per tab
+            "sheets.values.batchUpdate": processed,
+        })
+    )
+
+# -------------------------------------------------------------------
+# >>> MAIN ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Checks Google API call budgets against the local fake backends.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="Comma-separated subset of: " + ", ".join(SCENARIOS) + " (sales and po need Chrome).")
+    add_fixture_arguments(parser)
+    parser.set_defaults(latency=0.05, google_latency=0.0, orders=30)
+    args = parser.parse_args()
+
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(",") if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+
+    config, google, workdir = fixtures_from_arguments(args)
+    results = {}
+    with FakeSquareServer(config) as server, google:
+        seed_admin_spreadsheet(google, config)
+        env = bench_environment(server, google, workdir, "budget-" + datetime.now().strftime("%Y%m%d-%H%M%S"))
+        # In-process scenarios read their settings at import, so configure this process too
+        os.environ.update(env)
+        os.chdir(workdir)
+        if "catalog" in scenarios:
+            results["catalog"] = scenario_catalog(google, config, workdir, env)
+        if "sales" in scenarios:
+            results["sales"] = scenario_sales(google, config, workdir, env)
+        if "sales_tabs" in scenarios:
+            results["sales_tabs"] = scenario_sales_tabs(google, config, workdir, env)
+        if "rollups" in scenarios:
+            results["rollups"] = scenario_rollups(google, config, workdir, env)
+        if "po" in scenarios:
+            results["po"] = scenario_po(google, config, workdir, env)
+
+    failed = [scenario for scenario, ok in results.items() if not ok]
+    if failed:
+        print(f"\n[ERROR] Over budget: {', '.join(failed)}")
+        sys.exit(1)
+    print("\n[INFO] All scenarios within their API call budgets.")
+
+if __name__ == "__main__":
+    # Usage: python bench/check_api_budget.py --scenarios catalog --catalog-rows 5000
+    main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import argparse
+import tempfile
+
+import run_bench  # noqa: F401 (puts the repository on sys.path)
+from fake_square import FakeSquareConfig, build_catalog_xlsx
+
+# -------------------------------------------------------------------
+# >>> LINE-ITEM MATCHING <<<
+# -------------------------------------------------------------------
+
+# (modal name, sheet name) pairs of different SKUs that must never match
+NEAR_MISS_SKUS = [
+    ("Blue Dream Runtz 2 Gm", "Blue Dream Runtz 1 Gm"),
+    ("STNR 1g", "STNR 2g"),
+    ("Raw Cones King Size 3 Pack", "Raw Cones King Size 32 Pack"),
+    ("Grape Gummies 10ct", "Grape Gummies 20ct"),
+    ("Vape Cart 0.5g", "Vape Cart 1g"),
+]
+
+# (modal name, sheet name) pairs of the same SKU written differently
+SAME_SKUS = [
+    ("Blue  Dream Runtz 1Gm", "Blue Dream Runtz 1 Gm"),
+    ("Zig-Zag Papers 1 1/4", "Zig Zag Papers - 1 1/4"),
+]
+
+def check_line_matcher():
+    """Near-miss SKUs are never matched; spelling variants are only fuzzy (never written)."""
+    from line_matcher import LineItemIndex
+
+    failures = []
+    for modal_name, sheet_name in NEAR_MISS_SKUS:
+        match = LineItemIndex([["Name"], [sheet_name, "", "", "", "", "", "1"]]).match(modal_name, "1")
+        if match.kind != "missing":
+            failures.append(f"'{modal_name}' matched '{sheet_name}' ({match.kind}, {match.score:.2f})")
+    for modal_name, sheet_name in SAME_SKUS:
+        index = LineItemIndex([["Name"], [sheet_name, "", "", "", "", "", "1"]])
+        match = index.match(modal_name, "1")
+        if match.kind != "fuzzy" or match.rows != [2]:
+            failures.append(f"'{modal_name}' did not fuzzy-match '{sheet_name}' ({match.kind})")
+        elif index.match(sheet_name, "1").kind != "exact":
+            failures.append(f"fuzzy match of '{modal_name}' took row 2 out of the index")
+    return failures
+
+# -------------------------------------------------------------------
+# >>> CATALOG EXPORT <<<
+# -------------------------------------------------------------------
+
+def check_catalog_header():
+    """
+    Catalog rows are keyed by Token from the real header, which Square's
+    export (like the fixture) puts on row 2 below a blank row, whether
+    the export is read in full or projected.
+    """
+    from catalog_sync import HEADER_KEY, LEADING_KEY, iter_catalog_rows, key_catalog_rows
+
+    file_path = os.path.join(tempfile.mkdtemp(prefix="catalog-check-"), "catalog.xlsx")
+    with open(file_path, "wb") as f:
+        f.write(build_catalog_xlsx(FakeSquareConfig(catalog_rows=20)))
+
+    failures = []
+    expected = {
+        (): ([f"{LEADING_KEY}#1", HEADER_KEY, f"TOKEN{1:019d}#1"], "Reference Handle"),
+        ("Token", "Item Name", "Price"): ([HEADER_KEY, f"TOKEN{1:019d}#1"], "Token"),
+    }
+    for columns, (first_keys, first_header) in expected.items():
+        keyed = key_catalog_rows(iter_catalog_rows(file_path, list(columns)))
+        keys = list(keyed)
+        if keys[:len(first_keys)] != first_keys or keyed[HEADER_KEY][0] != first_header or len(keys) != len(first_keys) + 19:
+            failures.append(f"columns={list(columns) or 'all'}: keys start {keys[:3]}, header {keyed.get(HEADER_KEY, [])[:2]}")
+    try:
+        key_catalog_rows([[None], ["Reference Handle", "SKU"], ["a", "1"]])
+        failures.append("an export without a Token header was keyed instead of rejected")
+    except ValueError:
+        pass
+    os.remove(file_path)
+    return failures
+
+# -------------------------------------------------------------------
+# >>> MAIN ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+CHECKS = {"line_matcher": check_line_matcher, "catalog_header": check_catalog_header}
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline checks pinning behaviour that once regressed.")
+    parser.add_argument("--checks", nargs="+", choices=list(CHECKS), default=list(CHECKS))
+    args = parser.parse_args()
+
+    failed = False
+    for name in args.checks:
+        failures = CHECKS[name]()
+        print(f"[{'ERROR' if failures else 'INFO'}] {name}: {'FAILED' if failures else 'ok'}")
+        for failure in failures:
+            print(f"  {failure}")
+        failed = failed or bool(failures)
+    if failed:
+        sys.exit(1)
+    print("[INFO] All checks passed.")
+
+if __name__ == "__main__":
+    # Usage: python bench/check_regressions.py [--checks line_matcher catalog_header]
+    main()
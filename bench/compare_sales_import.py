@@ -0,0 +1,114 @@
+import os
+import time
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+from run_bench import total_calls
+from fake_square import FakeSquareConfig, build_sales_csv
+from fake_google import FakeGoogleBackend
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+# SALES_SYNC_MODE values compared: values API (current "full" path) vs. Drive conversion
+MODES = ["full", "drive"]
+
+# -------------------------------------------------------------------
+# >>> IMPORT PATHS <<<
+# -------------------------------------------------------------------
+
+def import_full(spreadsheet, file_path, sheet_name):
+    """As SALES_SYNC_MODE=full: plain upload, then every cell through the values API."""
+    from sheets_import import upload_csv, measure_csv, import_csv_in_chunks
+
+    file_id = upload_csv(file_path, sheet_name)
+    num_rows, num_cols = measure_csv(file_path)
+    worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=str(num_rows), cols=str(num_cols))
+    import_csv_in_chunks(worksheet, file_path, num_rows)
+    return file_id
+
+def import_drive(spreadsheet, file_path, sheet_name):
+    """As SALES_SYNC_MODE=drive: converting upload, then a server-side tab copy."""
+    from sheets_import import upload_csv, copy_converted_sheet
+
+    file_id = upload_csv(file_path, sheet_name, convert=True)
+    copy_converted_sheet(file_id, spreadsheet, sheet_name)
+    return file_id
+
+IMPORTERS = {"full": import_full, "drive": import_drive}
+
+def run_mode(mode, spreadsheet, file_path, google=None):
+    """Imports the CSV with one mode, then removes the new tab and Drive file again."""
+    from google_clients import get_drive_service
+
+    sheet_name = f"import-compare-{mode}-{int(time.time())}"
+    if google:
+        google.reset_stats()
+    started = time.time()
+    file_id = IMPORTERS[mode](spreadsheet, file_path, sheet_name)
+    elapsed = time.time() - started
+    stats = google.snapshot_stats() if google else None
+
+    spreadsheet.del_worksheet(spreadsheet.worksheet(sheet_name))
+    get_drive_service().files().delete(fileId=file_id).execute()
+
+    result = {"mode": mode, "seconds": round(elapsed, 2)}
+    if stats is not None:
+        result["api_calls"] = total_calls(stats)
+        result["values_calls"] = total_calls(stats, "sheets.values.")
+        result["sent_kb"] = round(sum(entry["request_bytes"] for entry in stats.values()) / 1024, 1)
+    return result
+
+# -------------------------------------------------------------------
+# >>> MAIN ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Times the sales CSV import through the values API against Drive's server-side conversion."
+    )
+    parser.add_argument("--csv", help="Detail CSV to import (default: a generated one).")
+    parser.add_argument("--sales-rows", type=int, default=20000, help="Rows of the generated CSV.")
+    parser.add_argument("--google-latency", type=float, default=0.05, help="Seconds added to every fake Google API response.")
+    parser.add_argument("--live", action="store_true",
+                        help="Use the real Google APIs and 'Admin1' of the configured account instead of the emulator.")
+    args = parser.parse_args()
+
+    # Keep the traces the import spans write out of the repository
+    workdir = tempfile.mkdtemp(prefix="sales-import-")
+    os.environ["TRACE_DIRECTORY"] = os.path.join(workdir, "runs")
+
+    file_path = args.csv
+    if not file_path:
+        file_path = os.path.join(workdir, "items-compare.csv")
+        with open(file_path, "wb") as f:
+            f.write(build_sales_csv(FakeSquareConfig(sales_rows=args.sales_rows), date.today() - timedelta(days=30), date.today()))
+    print(f"[INFO] Importing {file_path}")
+
+    google = None
+    if not args.live:
+        google = FakeGoogleBackend(latency=args.google_latency)
+        google.start()
+        google.add_spreadsheet("Admin1")
+        os.environ["GOOGLE_API_EMULATOR_HOST"] = google.host
+    try:
+        # Imported only now, so the clients pick up the emulator host
+        from google_clients import open_spreadsheet
+        spreadsheet = open_spreadsheet('Admin1')
+        results = [run_mode(mode, spreadsheet, file_path, google) for mode in MODES]
+    finally:
+        if google:
+            google.stop()
+
+    print(f"{'Mode':<8} {'Seconds':>9} {'API calls':>10} {'Values API':>11} {'Sent KB':>9}")
+    for result in results:
+        print(f"{result['mode']:<8} {result['seconds']:>9.2f} {result.get('api_calls', '-'):>10} "
+              f"{result.get('values_calls', '-'):>11} {result.get('sent_kb', '-'):>9}")
+    if not args.live:
+        print("[INFO] The emulator converts uploads instantly; use --live for Drive's real conversion time.")
+
+if __name__ == "__main__":
+    # Usage: python bench/compare_sales_import.py --sales-rows 50000 [--live]
+    main()
@@ -0,0 +1,668 @@
+import re
+import io
+import csv
+import json
+import time
+import uuid
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, unquote
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+SPREADSHEET_MIME_TYPE = "application/vnd.google-apps.spreadsheet"
+
+DEFAULT_ROWS = 1000
+DEFAULT_COLS = 26
+
+CELL_PATTERN = re.compile(r"^([A-Za-z]*)(\d*)$")
+
+# -------------------------------------------------------------------
+# >>> A1 NOTATION <<<
+# -------------------------------------------------------------------
+
+def column_number(letters):
+    number = 0
+    for letter in letters.upper():
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+def column_letters(number):
+    letters = ""
+    while number:
+        number, remainder = divmod(number - 1, 26)
+        letters = chr(ord("A") + remainder) + letters
+    return letters
+
+def quote_title(title):
+    return "'" + title.replace("'", "''") + "'"
+
+def parse_cell(cell):
+    """Returns (row or None, col or None) for A1 parts like "B3", "B" or "3"."""
+    match = CELL_PATTERN.match(cell.strip())
+    if not match:
+        raise ApiError(400, f"Unable to parse range: {cell}", "INVALID_ARGUMENT")
+    letters, digits = match.groups()
+    return (int(digits) if digits else None), (column_number(letters) if letters else None)
+
+class ApiError(Exception):
+    """An error response in the Google API JSON error format."""
+
+    def __init__(self, code, message, status):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+
+    def to_json(self):
+        return {"error": {"code": self.code, "message": self.message, "status": self.status}}
+
+# -------------------------------------------------------------------
+# >>> DATA MODEL <<<
+# -------------------------------------------------------------------
+
+class FakeSheet:
+    """One tab: its grid size and values (strings, row-major, ragged)."""
+
+    def __init__(self, sheet_id, title, index, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, values=None):
+        self.sheet_id = sheet_id
+        self.title = title
+        self.index = index
+        self.rows = rows
+        self.cols = cols
+        self.values = [[str(value) for value in row] for row in (values or [])]
+
+    def properties(self):
+        return {
+            "sheetId": self.sheet_id,
+            "title": self.title,
+            "index": self.index,
+            "sheetType": "GRID",
+            "gridProperties": {"rowCount": self.rows, "columnCount": self.cols},
+        }
+
+    def bounds(self, cells):
+        """Returns (first_row, first_col, last_row, last_col) for the cell part of a range."""
+        if not cells:
+            return 1, 1, self.rows, self.cols
+        start, _, end = cells.partition(":")
+        start_row, start_col = parse_cell(start)
+        end_row, end_col = parse_cell(end) if end else (start_row, start_col)
+        return (start_row or 1, start_col or 1,
+                end_row or self.rows, end_col or self.cols)
+
+    def check_grid(self, last_row, last_col, range_name):
+        if last_row > self.rows or last_col > self.cols:
+            raise ApiError(
+                400,
+                f"Range ({range_name}) exceeds grid limits. Max rows: {self.rows}, max columns: {self.cols}",
+                "INVALID_ARGUMENT"
+            )
+
+    def read(self, first_row, first_col, last_row, last_col, major_dimension="ROWS"):
+        """Returns the values in the box, trimmed of trailing blanks like the real API."""
+        last_row = min(last_row, len(self.values))
+        box = []
+        for row in self.values[first_row - 1:last_row]:
+            box.append(row[first_col - 1:last_col])
+        if major_dimension == "COLUMNS":
+            width = max([len(row) for row in box] + [0])
+            box = [[row[i] if i < len(row) else "" for row in box] for i in range(width)]
+        trimmed = []
+        for line in box:
+            line = list(line)
+            while line and line[-1] == "":
+                line.pop()
+            trimmed.append(line)
+        while trimmed and not trimmed[-1]:
+            trimmed.pop()
+        return trimmed
+
+    def write(self, first_row, first_col, values):
+        for row_offset, row_values in enumerate(values):
+            row_index = first_row + row_offset - 1
+            while len(self.values) <= row_index:
+                self.values.append([])
+            row = self.values[row_index]
+            for col_offset, value in enumerate(row_values):
+                col_index = first_col + col_offset - 1
+                while len(row) <= col_index:
+                    row.append("")
+                row[col_index] = cell_text(value)
+
+    def clear(self, first_row, first_col, last_row, last_col):
+        for row in self.values[first_row - 1:last_row]:
+            for col_index in range(first_col - 1, min(last_col, len(row))):
+                row[col_index] = ""
+
+def cell_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+class FakeSpreadsheet:
+    def __init__(self, spreadsheet_id, title):
+        self.id = spreadsheet_id
+        self.title = title
+        self.sheets = []
+        self.next_sheet_id = 0
+
+    def add_sheet(self, title, rows=DEFAULT_ROWS, cols=DEFAULT_COLS, values=None, index=None):
+        if any(sheet.title == title for sheet in self.sheets):
+            raise ApiError(400, f'A sheet with the name "{title}" already exists.', "INVALID_ARGUMENT")
+        sheet = FakeSheet(self.next_sheet_id, title, len(self.sheets), rows, cols, values)
+        self.next_sheet_id += 1
+        self.sheets.insert(len(self.sheets) if index is None else index, sheet)
+        self.reindex()
+        return sheet
+
+    def reindex(self):
+        for index, sheet in enumerate(self.sheets):
+            sheet.index = index
+
+    def sheet_by_id(self, sheet_id):
+        for sheet in self.sheets:
+            if sheet.sheet_id == sheet_id:
+                return sheet
+        raise ApiError(400, f"No grid with id: {sheet_id}", "INVALID_ARGUMENT")
+
+    def resolve(self, range_name):
+        """Returns (sheet, cell part) for "'Title'!A1:B2", "Title", "A1:B2" (first sheet)."""
+        sheet_part, separator, cells = range_name.rpartition("!")
+        if not separator:
+            sheet_part, cells = range_name, ""
+        title = sheet_part
+        if sheet_part.startswith("'") and sheet_part.endswith("'"):
+            title = sheet_part[1:-1].replace("''", "'")
+        for sheet in self.sheets:
+            if sheet.title == title:
+                return sheet, cells
+        if not separator and self.sheets:
+            # No sheet name: the range refers to the first sheet
+            return self.sheets[0], range_name
+        raise ApiError(400, f"Unable to parse range: {range_name}", "INVALID_ARGUMENT")
+
+    def metadata(self):
+        return {
+            "spreadsheetId": self.id,
+            "properties": {"title": self.title, "locale": "en_US", "timeZone": "America/New_York"},
+            "sheets": [{"properties": sheet.properties()} for sheet in self.sheets],
+            "spreadsheetUrl": f"https://docs.google.com/spreadsheets/d/{self.id}/edit",
+        }
+
+# -------------------------------------------------------------------
+# >>> BACKEND <<<
+# -------------------------------------------------------------------
+
+class FakeGoogleBackend:
+    """
+    Local emulator of the Sheets v4 and Drive v3 endpoints the pipeline
+    uses through gspread and googleapiclient, with per-method accounting
+    of calls, request/response bytes and simulated quota (429) errors.
+
+    Point the scripts at it with GOOGLE_API_EMULATOR_HOST=<host:port>
+    (see google_clients.py).
+
+    Parameters:
+    - latency: Seconds added to every response.
+    - read_quota_per_minute / write_quota_per_minute: Sheets requests
+      allowed per rolling minute before 429 RESOURCE_EXHAUSTED is
+      returned (None = unlimited). Google's default is 60 each per user.
+
+    Usage:
+        with FakeGoogleBackend() as google:
+            google.add_spreadsheet("Admin1", {"POSUPK": rows})
+            ...
+            google.print_stats()
+    """
+
+    def __init__(self, latency=0.0, read_quota_per_minute=None, write_quota_per_minute=None,
+                 host="127.0.0.1", port=0):
+        self.latency = latency
+        self.quotas = {"read": read_quota_per_minute, "write": write_quota_per_minute}
+        self.windows = {"read": deque(), "write": deque()}
+        self.lock = threading.RLock()
+        self.spreadsheets = {}
+        self.files = {}
+        self.uploads = {}
+        self.stats = {}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.host = f"{host}:{self.httpd.server_address[1]}"
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"[INFO] Fake Google APIs listening on {self.host}")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    # --- Fixtures ---
+
+    def add_spreadsheet(self, title, tabs=None, rows=DEFAULT_ROWS, cols=DEFAULT_COLS):
+        """
+        Creates a spreadsheet from {tab title: [[cell, ...], ...]} and
+        returns its id. Tabs grow past rows/cols to fit their values.
+        """
+        with self.lock:
+            spreadsheet = FakeSpreadsheet(uuid.uuid4().hex, title)
+            for tab_title, values in (tabs or {"Sheet1": []}).items():
+                width = max([len(row) for row in values] + [0])
+                spreadsheet.add_sheet(tab_title, max(rows, len(values)), max(cols, width), values)
+            self.spreadsheets[spreadsheet.id] = spreadsheet
+            self.files[spreadsheet.id] = self._new_file(spreadsheet.id, title, SPREADSHEET_MIME_TYPE)
+            return spreadsheet.id
+
+    def spreadsheet_by_title(self, title):
+        with self.lock:
+            for spreadsheet in self.spreadsheets.values():
+                if spreadsheet.title == title:
+                    return spreadsheet
+        raise KeyError(title)
+
+    def sheet_values(self, spreadsheet_title, tab_title):
+        """Returns a copy of a tab's values for checking results."""
+        spreadsheet = self.spreadsheet_by_title(spreadsheet_title)
+        with self.lock:
+            sheet, _ = spreadsheet.resolve(quote_title(tab_title))
+            return [list(row) for row in sheet.values]
+
+    # --- Accounting ---
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+
+    def snapshot_stats(self):
+        with self.lock:
+            return {method: dict(entry) for method, entry in self.stats.items()}
+
+    def _account(self, method, request_bytes, response_bytes, throttled):
+        with self.lock:
+            entry = self.stats.setdefault(
+                method, {"calls": 0, "request_bytes": 0, "response_bytes": 0, "throttled": 0}
+            )
+            entry["calls"] += 1
+            entry["request_bytes"] += request_bytes
+            entry["response_bytes"] += response_bytes
+            entry["throttled"] += 1 if throttled else 0
+
+    def print_stats(self, stats=None):
+        stats = self.snapshot_stats() if stats is None else stats
+        print(f"{'Method':<36} {'Calls':>6} {'Sent KB':>9} {'Recv KB':>9} {'429s':>5}")
+        for method, entry in sorted(stats.items()):
+            print(f"{method:<36} {entry['calls']:>6} {entry['request_bytes'] / 1024:>9.1f} "
+                  f"{entry['response_bytes'] / 1024:>9.1f} {entry['throttled']:>5}")
+
+    def _check_quota(self, kind):
+        """Raises a 429 once more than the per-minute quota of `kind` requests were made."""
+        quota = self.quotas.get(kind)
+        if quota is None:
+            return
+        now = time.time()
+        with self.lock:
+            window = self.windows[kind]
+            while window and now - window[0] >= 60:
+                window.popleft()
+            if len(window) >= quota:
+                raise ApiError(
+                    429,
+                    f"Quota exceeded for quota metric '{kind.title()} requests' and limit "
+                    f"'{kind.title()} requests per minute per user'",
+                    "RESOURCE_EXHAUSTED"
+                )
+            window.append(now)
+
+    # --- Drive ---
+
+    def _new_file(self, file_id, name, mime_type, content=b""):
+        now = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+        return {"id": file_id, "name": name, "mimeType": mime_type, "content": content,
+                "createdTime": now, "modifiedTime": now}
+
+    def _public_file(self, entry):
+        return {key: value for key, value in entry.items() if key != "content"}
+
+    def drive_list(self, query):
+        q = query.get("q", [""])[0]
+        name = re.search(r"name\s*=\s*(['\"])(.*?)\1", q)
+        mime_type = re.search(r"mimeType\s*=\s*(['\"])(.*?)\1", q)
+        with self.lock:
+            files = [
+                self._public_file(entry) for entry in self.files.values()
+                if (not name or entry["name"] == name.group(2))
+                and (not mime_type or entry["mimeType"] == mime_type.group(2))
+            ]
+        return {"kind": "drive#fileList", "files": files}
+
+    def drive_create(self, metadata, content=b""):
+        with self.lock:
+            if metadata.get("mimeType") == SPREADSHEET_MIME_TYPE:
+                # An upload with a spreadsheet target type is converted, like Drive does for CSV
+                name = metadata.get("name", "Untitled spreadsheet")
+                if content:
+                    rows = list(csv.reader(io.StringIO(content.decode("utf-8"), newline="")))
+                    spreadsheet_id = self.add_spreadsheet(name, {name: rows}, rows=1, cols=1)
+                else:
+                    spreadsheet_id = self.add_spreadsheet(name)
+                return self._public_file(self.files[spreadsheet_id])
+            file_id = uuid.uuid4().hex
+            entry = self._new_file(file_id, metadata.get("name", "Untitled"),
+                                   metadata.get("mimeType", "application/octet-stream"), content)
+            self.files[file_id] = entry
+            return self._public_file(entry)
+
+    def drive_delete(self, file_id):
+        with self.lock:
+            if self.files.pop(file_id, None) is None:
+                raise ApiError(404, f"File not found: {file_id}.", "NOT_FOUND")
+            self.spreadsheets.pop(file_id, None)
+
+    # --- Sheets ---
+
+    def spreadsheet(self, spreadsheet_id):
+        spreadsheet = self.spreadsheets.get(spreadsheet_id)
+        if spreadsheet is None:
+            raise ApiError(404, "Requested entity was not found.", "NOT_FOUND")
+        return spreadsheet
+
+    def values_get(self, spreadsheet_id, range_name, query):
+        with self.lock:
+            sheet, cells = self.spreadsheet(spreadsheet_id).resolve(range_name)
+            first_row, first_col, last_row, last_col = sheet.bounds(cells)
+            major_dimension = query.get("majorDimension", ["ROWS"])[0]
+            result = {
+                "range": f"{quote_title(sheet.title)}!{column_letters(first_col)}{first_row}:"
+                         f"{column_letters(last_col)}{last_row}",
+                "majorDimension": major_dimension,
+            }
+            values = sheet.read(first_row, first_col, last_row, last_col, major_dimension)
+            if values:
+                result["values"] = values
+            return result
+
+    def values_update(self, spreadsheet_id, range_name, values):
+        with self.lock:
+            sheet, cells = self.spreadsheet(spreadsheet_id).resolve(range_name)
+            first_row, first_col, _, _ = sheet.bounds(cells)
+            width = max([len(row) for row in values] + [1])
+            last_row, last_col = first_row + max(len(values), 1) - 1, first_col + width - 1
+            sheet.check_grid(last_row, last_col, range_name)
+            sheet.write(first_row, first_col, values)
+            return {
+                "spreadsheetId": spreadsheet_id,
+                "updatedRange": f"{quote_title(sheet.title)}!{column_letters(first_col)}{first_row}:"
+                                f"{column_letters(last_col)}{last_row}",
+                "updatedRows": len(values),
+                "updatedColumns": width,
+                "updatedCells": sum(len(row) for row in values),
+            }
+
+    def values_append(self, spreadsheet_id, range_name, values):
+        with self.lock:
+            sheet, _ = self.spreadsheet(spreadsheet_id).resolve(range_name)
+            first_row = len(sheet.read(1, 1, sheet.rows, sheet.cols)) + 1
+            # Appends grow the grid instead of failing like updates do
+            sheet.rows = max(sheet.rows, first_row + len(values) - 1)
+            sheet.cols = max([sheet.cols] + [len(row) for row in values])
+            updates = self.values_update(spreadsheet_id, f"{quote_title(sheet.title)}!A{first_row}", values)
+            return {"spreadsheetId": spreadsheet_id, "updates": updates}
+
+    def values_batch_update(self, spreadsheet_id, body):
+        responses = [self.values_update(spreadsheet_id, entry["range"], entry.get("values", []))
+                     for entry in body.get("data", [])]
+        return {
+            "spreadsheetId": spreadsheet_id,
+            "totalUpdatedCells": sum(response["updatedCells"] for response in responses),
+            "responses": responses,
+        }
+
+    def values_clear(self, spreadsheet_id, range_name):
+        with self.lock:
+            sheet, cells = self.spreadsheet(spreadsheet_id).resolve(range_name)
+            sheet.clear(*sheet.bounds(cells))
+            return {"spreadsheetId": spreadsheet_id, "clearedRange": range_name}
+
+    def batch_update(self, spreadsheet_id, body):
+        """spreadsheets.batchUpdate: addSheet, deleteSheet, updateSheetProperties, appendDimension."""
+        replies = []
+        with self.lock:
+            spreadsheet = self.spreadsheet(spreadsheet_id)
+            for request in body.get("requests", []):
+                if "addSheet" in request:
+                    properties = request["addSheet"].get("properties", {})
+                    grid = properties.get("gridProperties", {})
+                    sheet = spreadsheet.add_sheet(
+                        properties.get("title", f"Sheet{len(spreadsheet.sheets) + 1}"),
+                        int(grid.get("rowCount", DEFAULT_ROWS)), int(grid.get("columnCount", DEFAULT_COLS)),
+                        index=properties.get("index")
+                    )
+                    replies.append({"addSheet": {"properties": sheet.properties()}})
+                elif "deleteSheet" in request:
+                    sheet = spreadsheet.sheet_by_id(request["deleteSheet"]["sheetId"])
+                    spreadsheet.sheets.remove(sheet)
+                    spreadsheet.reindex()
+                    replies.append({})
+                elif "updateSheetProperties" in request:
+                    properties = request["updateSheetProperties"]["properties"]
+                    sheet = spreadsheet.sheet_by_id(properties.get("sheetId", 0))
+                    grid = properties.get("gridProperties", {})
+                    sheet.rows = int(grid.get("rowCount", sheet.rows))
+                    sheet.cols = int(grid.get("columnCount", sheet.cols))
+                    sheet.title = properties.get("title", sheet.title)
+                    replies.append({})
+                elif "appendDimension" in request:
+                    dimension = request["appendDimension"]
+                    sheet = spreadsheet.sheet_by_id(dimension["sheetId"])
+                    if dimension["dimension"] == "ROWS":
+                        sheet.rows += int(dimension["length"])
+                    else:
+                        sheet.cols += int(dimension["length"])
+                    replies.append({})
+                else:
+                    raise ApiError(400, f"Unsupported request: {', '.join(request)}", "INVALID_ARGUMENT")
+        return {"spreadsheetId": spreadsheet_id, "replies": replies}
+
+    def copy_sheet(self, spreadsheet_id, sheet_id, body):
+        """sheets.copyTo: copies a tab, values included, into another spreadsheet."""
+        with self.lock:
+            source = self.spreadsheet(spreadsheet_id).sheet_by_id(sheet_id)
+            destination = self.spreadsheet(body.get("destinationSpreadsheetId", ""))
+            title = f"Copy of {source.title}"
+            titles = {sheet.title for sheet in destination.sheets}
+            suffix = 2
+            while title in titles:
+                title, suffix = f"Copy of {source.title} {suffix}", suffix + 1
+            sheet = destination.add_sheet(title, source.rows, source.cols, [list(row) for row in source.values])
+            return sheet.properties()
+
+    # --- HTTP ---
+
+    def _handler_class(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+            def handle_request(self, http_method):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                parsed = urlparse(self.path)
+                method, status, payload, headers = "unknown", 200, None, []
+                try:
+                    method, kind, handler = backend.route(http_method, parsed.path, parse_qs(parsed.query))
+                    if kind:
+                        backend._check_quota(kind)
+                    if backend.latency:
+                        time.sleep(backend.latency)
+                    status, payload, headers = handler(body, self.headers)
+                except ApiError as e:
+                    status, payload = e.code, e.to_json()
+                except (KeyError, ValueError) as e:
+                    status, payload = 400, ApiError(400, f"Invalid request: {e}", "INVALID_ARGUMENT").to_json()
+
+                data = json.dumps(payload).encode("utf-8") if payload is not None else b""
+                backend._account(method, len(body), len(data), status == 429)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=UTF-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self.handle_request("GET")
+
+            def do_POST(self):
+                self.handle_request("POST")
+
+            def do_PUT(self):
+                self.handle_request("PUT")
+
+            def do_DELETE(self):
+                self.handle_request("DELETE")
+
+        return Handler
+
+    def route(self, http_method, path, query):
+        """
+        Maps a request to (API method name, quota kind, handler). Each
+        handler takes (body bytes, headers) and returns (status, JSON, headers).
+        """
+        def ok(result):
+            return lambda body, headers: (200, result(json.loads(body or b"{}")), [])
+
+        if path == "/drive/v3/files" and http_method == "GET":
+            return "drive.files.list", None, ok(lambda body: self.drive_list(query))
+        if path == "/drive/v3/files" and http_method == "POST":
+            return "drive.files.create", None, ok(lambda body: self.drive_create(body))
+        if path.startswith("/drive/v3/files/") and http_method == "DELETE":
+            file_id = path.rsplit("/", 1)[1]
+            return "drive.files.delete", None, lambda body, headers: (self.drive_delete(file_id) or 204, None, [])
+        if path == "/upload/drive/v3/files":
+            return self.route_upload(http_method, query)
+
+        match = re.match(r"^/v4/spreadsheets/([^/:]+)(.*)$", path)
+        if not match:
+            raise ApiError(404, f"Unknown endpoint: {http_method} {path}", "NOT_FOUND")
+        spreadsheet_id, rest = match.groups()
+
+        if rest == "" and http_method == "GET":
+            return "sheets.spreadsheets.get", "read", \
+                lambda body, headers: (200, self._locked(lambda: self.spreadsheet(spreadsheet_id).metadata()), [])
+        if rest == ":batchUpdate":
+            return "sheets.spreadsheets.batchUpdate", "write", ok(lambda body: self.batch_update(spreadsheet_id, body))
+        copy_match = re.match(r"^/sheets/(\d+):copyTo$", rest)
+        if copy_match and http_method == "POST":
+            sheet_id = int(copy_match.group(1))
+            return "sheets.sheets.copyTo", "write", ok(lambda body: self.copy_sheet(spreadsheet_id, sheet_id, body))
+        if rest == "/values:batchUpdate":
+            return "sheets.values.batchUpdate", "write", \
+                ok(lambda body: self.values_batch_update(spreadsheet_id, body))
+        if rest == "/values:batchClear":
+            return "sheets.values.batchClear", "write", ok(lambda body: {
+                "spreadsheetId": spreadsheet_id,
+                "clearedRanges": [self.values_clear(spreadsheet_id, r)["clearedRange"] for r in body.get("ranges", [])]
+            })
+        if rest.startswith("/values/"):
+            range_part = rest[len("/values/"):]
+            for suffix, name in ((":append", "append"), (":clear", "clear")):
+                if range_part.endswith(suffix):
+                    range_name = unquote(range_part[:-len(suffix)])
+                    if name == "append":
+                        return "sheets.values.append", "write", \
+                            ok(lambda body: self.values_append(spreadsheet_id, range_name, body.get("values", [])))
+                    return "sheets.values.clear", "write", ok(lambda body: self.values_clear(spreadsheet_id, range_name))
+            range_name = unquote(range_part)
+            if http_method == "GET":
+                return "sheets.values.get", "read", ok(lambda body: self.values_get(spreadsheet_id, range_name, query))
+            if http_method == "PUT":
+                return "sheets.values.update", "write", \
+                    ok(lambda body: self.values_update(spreadsheet_id, range_name, body.get("values", [])))
+        raise ApiError(404, f"Unknown endpoint: {http_method} {path}", "NOT_FOUND")
+
+    def route_upload(self, http_method, query):
+        upload_type = query.get("uploadType", ["media"])[0]
+
+        if http_method == "POST" and upload_type == "resumable":
+            def start(body, headers):
+                upload_id = uuid.uuid4().hex
+                with self.lock:
+                    self.uploads[upload_id] = {"metadata": json.loads(body or b"{}"), "content": b""}
+                location = f"http://{self.host}/upload/drive/v3/files?uploadType=resumable&upload_id={upload_id}"
+                return 200, None, [("Location", location)]
+            return "drive.files.create", None, start
+
+        if http_method == "PUT" and "upload_id" in query:
+            upload_id = query["upload_id"][0]
+
+            def upload(body, headers):
+                with self.lock:
+                    upload = self.uploads.get(upload_id)
+                    if upload is None:
+                        raise ApiError(404, "Upload session not found.", "NOT_FOUND")
+                    upload["content"] += body
+                    total = headers.get("Content-Range", "").rpartition("/")[2]
+                    if total.isdigit() and len(upload["content"]) < int(total):
+                        return 308, None, [("Range", f"bytes=0-{len(upload['content']) - 1}")]
+                    del self.uploads[upload_id]
+                return 200, self.drive_create(upload["metadata"], upload["content"]), []
+            return "drive.files.upload", None, upload
+
+        if http_method == "POST" and upload_type == "multipart":
+            def multipart(body, headers):
+                boundary = headers.get("Content-Type", "").partition("boundary=")[2].strip('"')
+                parts = [part for part in body.split(b"--" + boundary.encode()) if part.strip(b"-\r\n")]
+                metadata, content = {}, b""
+                for index, part in enumerate(parts):
+                    _, _, part_body = part.partition(b"\r\n\r\n")
+                    part_body = part_body.rstrip(b"\r\n")
+                    if index == 0:
+                        metadata = json.loads(part_body or b"{}")
+                    else:
+                        content = part_body
+                return 200, self.drive_create(metadata, content), []
+            return "drive.files.create", None, multipart
+
+        raise ApiError(400, f"Unsupported upload: {http_method} uploadType={upload_type}", "INVALID_ARGUMENT")
+
+    def _locked(self, function):
+        with self.lock:
+            return function()
+
+if __name__ == "__main__":
+    # Usage: python bench/fake_google.py [port]  (serves an empty "Admin1" until Ctrl+C)
+    import sys
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8766
+    backend = FakeGoogleBackend(port=port)
+    backend.add_spreadsheet("Admin1")
+    backend.start()
+    print(f"[INFO] Run the scripts with GOOGLE_API_EMULATOR_HOST={backend.host}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        backend.print_stats()
+        backend.stop()
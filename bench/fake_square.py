@@ -0,0 +1,525 @@
+import io
+import csv
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs, quote
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+SESSION_COOKIE_NAME = "_js_session"
+TOASTER_COOKIE_NAME = "fake_square_toaster"
+
+ORDER_STATUSES = ["Received", "Partially Received", "Pending"]
+
+STATUS_CLASSES = {
+    "Received": "page-purchase-order-list__received-color",
+    "Partially Received": "page-purchase-order-list__receiving-color",
+    "Pending": "page-purchase-order-list__pending-color",
+}
+
+VENDORS = ["Marathon Supply", "Key West Traders", "Duval Wholesale", "Marco Imports", "Upper Keys Goods"]
+LOCATIONS = ["211 Duval", "222 Duval", "Duval-532", "Key West", "Marathon"]
+
+SALES_HEADER = [
+    "Date", "Time", "Time Zone", "Category", "Item", "Qty", "Price Point Name", "SKU",
+    "Modifiers Applied", "Gross Sales", "Discounts", "Net Sales", "Tax", "Transaction ID",
+    "Payment ID", "Device Name", "Notes", "Details", "Event Type", "Location", "Dining Option",
+    "Customer ID", "Customer Name", "Customer Reference ID", "Unit", "Count", "Itemization Type",
+    "Fulfillment Note", "Channel", "Token", "Card Brand", "PAN Suffix"
+]
+
+CATALOG_HEADER = [
+    "Reference Handle", "Token", "Item Name", "Variation Name", "SKU", "Description",
+    "Reporting Category", "GTIN", "Item Type", "Price", "Archived", "Default Unit Cost",
+    "Default Vendor Name"
+] + [f"Current Quantity {location}" for location in LOCATIONS]
+
+# -------------------------------------------------------------------
+# >>> FIXTURE DATA <<<
+# -------------------------------------------------------------------
+
+class FakeSquareConfig:
+    """
+    Size and speed of the fake dashboard.
+
+    Parameters:
+    - orders: Number of purchase orders in the list.
+    - line_items: Line items per purchase order.
+    - latency: Seconds every API response (list page, search, modal, export) is delayed.
+    - page_size: Rows loaded per scroll of the purchase-order list.
+    - catalog_rows: Item variations in the catalog export.
+    - sales_rows: Rows in the sales Detail CSV.
+    - seed: Seed for the generated data, so runs are comparable.
+    """
+
+    def __init__(self, orders=100, line_items=5, latency=0.2, page_size=50,
+                 catalog_rows=1000, sales_rows=5000, seed=1):
+        self.orders = orders
+        self.line_items = line_items
+        self.latency = latency
+        self.page_size = page_size
+        self.catalog_rows = catalog_rows
+        self.sales_rows = sales_rows
+        self.seed = seed
+
+def build_orders(config):
+    """
+    Returns the fake purchase orders as a list of
+    {"number", "vendor", "status", "line_items": [(name, qty, status), ...]}.
+    Statuses rotate through ORDER_STATUSES; partially received orders have
+    every other line still waiting to be received.
+    """
+    rng = random.Random(config.seed)
+    orders = []
+    for index in range(config.orders):
+        status = ORDER_STATUSES[index % len(ORDER_STATUSES)]
+        line_items = []
+        for line in range(config.line_items):
+            if status == "Received" or (status == "Partially Received" and line % 2 == 0):
+                line_status = "Received"
+            else:
+                line_status = "Receive"
+            name = f"Item {rng.randrange(1, config.catalog_rows + 1):05d}"
+            line_items.append((name, str(rng.randint(1, 24)), line_status))
+        orders.append({
+            "number": str(100001 + index),
+            "vendor": VENDORS[index % len(VENDORS)],
+            "status": status,
+            "line_items": line_items,
+        })
+    return orders
+
+def build_catalog_xlsx(config):
+    """Returns the bytes of a catalog export shaped like Square's (blank first row, header on row 2)."""
+    from openpyxl import Workbook
+
+    rng = random.Random(config.seed)
+    # Write-only, so 100x catalogs for bench_catalog_reader.py build in bounded memory
+    wb = Workbook(write_only=True)
+    sheet = wb.create_sheet("Items")
+    sheet.append([None] * len(CATALOG_HEADER))
+    sheet.append(CATALOG_HEADER)
+    for index in range(1, config.catalog_rows + 1):
+        name = f"Item {index:05d}"
+        sheet.append([
+            name.lower().replace(" ", "-"), f"TOKEN{index:019d}", name, "Regular", f"L{400000 + index}", "",
+            "", f"{rng.randrange(10 ** 11, 10 ** 12)}", "Physical good", f"{rng.randint(199, 9999) / 100:.2f}",
+            "N", f"{rng.randint(50, 5000) / 100:.2f}", VENDORS[index % len(VENDORS)]
+        ] + [str(rng.randint(0, 40)) for _ in LOCATIONS])
+    output = io.BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+def build_sales_csv(config, start_date, end_date):
+    """Returns a sales Detail CSV with `sales_rows` rows spread over the date range."""
+    rng = random.Random(config.seed)
+    days = max(1, (end_date - start_date).days + 1)
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(SALES_HEADER)
+    for index in range(config.sales_rows):
+        sold_at = start_date + timedelta(days=index * days // max(config.sales_rows, 1), seconds=rng.randrange(86400))
+        item = rng.randrange(1, config.catalog_rows + 1)
+        qty = rng.randint(1, 3)
+        price = rng.randint(199, 9999)
+        tax = price * qty * 75 // 1000
+        transaction_id = f"T{index // 3:09d}"
+        writer.writerow([
+            sold_at.strftime("%Y-%m-%d"), sold_at.strftime("%H:%M:%S"), "Eastern Time (US & Canada)",
+            "General", f"Item {item:05d}", qty, "Regular", f"L{400000 + item}", "",
+            f"${price * qty / 100:.2f}", "$0.00", f"${price * qty / 100:.2f}", f"${tax / 100:.2f}",
+            transaction_id, f"P{index // 3:09d}", "Register 1", "", "", "Payment",
+            LOCATIONS[item % len(LOCATIONS)], "", "", "", "", "ea", qty, "Item", "", "Point of Sale",
+            f"TOKEN{item:019d}", "Visa", f"{rng.randint(0, 9999):04d}"
+        ])
+    return output.getvalue().encode("utf-8")
+
+# -------------------------------------------------------------------
+# >>> PAGES <<<
+# -------------------------------------------------------------------
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body {{ font-family: sans-serif; margin: 0; }}
+td {{ height: 40px; padding: 0 12px; }}
+.modal {{ position: fixed; top: 10%; left: 20%; right: 20%; background: #fff; border: 1px solid #999; padding: 16px; }}
+market-button, market-row {{ display: inline-block; padding: 8px; cursor: pointer; }}
+market-row {{ display: block; }}
+</style></head>
+<body>{toaster}{body}
+<script>
+function afterLatency(callback) {{ fetch('/api/tick').then(function () {{ callback(); }}); }}
+{script}
+</script></body></html>"""
+
+TOASTER_HTML = """
+<div class="notifications-toaster svelte-9e69kb open" id="toaster">
+  <eh-market-button data-testid="notification-card-dismiss"></eh-market-button>
+</div>
+<script>
+customElements.define('eh-market-button', class extends HTMLElement {
+  constructor() {
+    super();
+    var root = this.attachShadow({mode: 'open'});
+    root.innerHTML = '<button class="dismiss">Dismiss</button>';
+    root.querySelector('.dismiss').addEventListener('click', function () {
+      document.getElementById('toaster').remove();
+      document.cookie = '""" + TOASTER_COOKIE_NAME + """=; max-age=0; path=/';
+    });
+  }
+});
+</script>"""
+
+LOGIN_BODY = """
+<input id="mpui-combo-field-input" type="email" placeholder="Email">
+<div id="password-step" style="display: none">
+  <input id="password" type="password">
+  <button name="sign-in-button" id="sign-in">Sign in</button>
+</div>"""
+
+LOGIN_SCRIPT = """
+document.getElementById('mpui-combo-field-input').addEventListener('keydown', function (e) {
+  if (e.key === 'Enter') { afterLatency(function () { document.getElementById('password-step').style.display = 'block'; }); }
+});
+document.getElementById('sign-in').addEventListener('click', function () {
+  fetch('/api/login', {method: 'POST'}).then(function () {
+    window.location = '/two-factor-promo?next=' + encodeURIComponent(new URLSearchParams(location.search).get('next') || '/dashboard');
+  });
+});"""
+
+PROMO_BODY = """
+<button id="2fa-post-login-promo-sms-remind-me-btn">Remind me next time</button>
+<div id="opt-out" style="display: none">
+  <button id="2fa-post-login-promo-opt-out-modal-continue">Continue to Square</button>
+</div>"""
+
+PROMO_SCRIPT = """
+document.getElementById('2fa-post-login-promo-sms-remind-me-btn').addEventListener('click', function () {
+  document.getElementById('opt-out').style.display = 'block';
+});
+document.getElementById('2fa-post-login-promo-opt-out-modal-continue').addEventListener('click', function () {
+  window.location = new URLSearchParams(location.search).get('next') || '/dashboard';
+});"""
+
+PO_LIST_BODY = """
+<input placeholder="Search Vendor or Order #" id="search">
+<button data-test-save-changes id="save" style="display: none">Save</button>
+<table><tbody id="rows"></tbody></table>
+<div id="sentinel" style="height: 1px"></div>
+<div id="modal-root"></div>"""
+
+PO_LIST_SCRIPT = """
+var STATUS_CLASSES = %(status_classes)s;
+var state = {query: '', offset: 0, loading: false, done: false, generation: 0};
+
+function escapeHtml(text) {
+  return String(text).replace(/[&<>"]/g, function (c) { return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c]; });
+}
+
+function loadMore() {
+  if (state.loading || state.done) { return; }
+  state.loading = true;
+  var generation = state.generation;
+  fetch('/api/purchase-orders?q=' + encodeURIComponent(state.query) + '&offset=' + state.offset)
+    .then(function (r) { return r.json(); })
+    .then(function (data) {
+      if (generation !== state.generation) { return; }
+      var body = document.getElementById('rows');
+      data.orders.forEach(function (order) {
+        var row = document.createElement('tr');
+        row.innerHTML =
+          '<td class="table-cell table-cell--selectable table-cell--link">' + escapeHtml(order.number) + '</td>' +
+          '<td class="table-cell">' + escapeHtml(order.vendor) + '</td>' +
+          '<td class="table-cell table-cell--selectable page-inventory-list-table__cell--status ' +
+          STATUS_CLASSES[order.status] + '">' + escapeHtml(order.status) + '</td>';
+        row.querySelector('.page-inventory-list-table__cell--status').addEventListener('click', function () {
+          openModal(order.number);
+        });
+        body.appendChild(row);
+      });
+      state.offset += data.orders.length;
+      state.done = !data.more;
+      state.loading = false;
+    });
+}
+
+function search(query) {
+  state = {query: query, offset: 0, loading: false, done: false, generation: state.generation + 1};
+  document.getElementById('rows').innerHTML = '';
+  loadMore();
+}
+
+function openModal(number) {
+  fetch('/api/purchase-orders/' + encodeURIComponent(number))
+    .then(function (r) { return r.json(); })
+    .then(function (order) {
+      var lines = order.line_items.map(function (item) {
+        var status = item[2] === 'Receive'
+          ? '<a href="#" data-test-details-line-item-receive-link>Receive</a>'
+          : '<div data-test-details-line-item-status>' + escapeHtml(item[2]) + '</div>';
+        return '<div data-test-po-details-line-item>' +
+          '<p class="po-detail-sheet-row__item-name">' + escapeHtml(item[0]) + '</p>' +
+          '<span data-test-details-line-item-quantity>' + escapeHtml(item[1]) + '</span>' + status + '</div>';
+      }).join('');
+      var root = document.getElementById('modal-root');
+      root.innerHTML = '<div class="modal"><button aria-label="Close" id="close">Close</button>' +
+        '<h2>' + escapeHtml(order.number) + '</h2>' + lines + '</div>';
+      document.getElementById('close').addEventListener('click', function () {
+        root.innerHTML = '';
+        document.getElementById('save').style.display = 'inline-block';
+      });
+    });
+}
+
+document.getElementById('search').addEventListener('keydown', function (e) {
+  if (e.key === 'Enter') { search(e.target.value.trim()); }
+});
+document.getElementById('save').addEventListener('click', function (e) {
+  var button = e.target;
+  fetch('/api/save', {method: 'POST'}).then(function () { button.style.display = 'none'; });
+});
+new IntersectionObserver(function (entries) {
+  if (entries[0].isIntersecting) { loadMore(); }
+}).observe(document.getElementById('sentinel'));
+loadMore();"""
+
+LIBRARY_BODY = """
+<div id="library" style="display: none">
+  <button id="item-library-actions-dropdown-button-label">Actions</button>
+  <div id="actions-menu" style="display: none">
+    <button id="item-library-actions-export-row-label">Export library</button>
+  </div>
+  <div id="export-modal" class="modal" style="display: none">
+    <market-button data-test-catalog-export-modal-export id="export">Export</market-button>
+  </div>
+</div>"""
+
+LIBRARY_SCRIPT = """
+afterLatency(function () { document.getElementById('library').style.display = 'block'; });
+document.getElementById('item-library-actions-dropdown-button-label').addEventListener('click', function () {
+  document.getElementById('actions-menu').style.display = 'block';
+});
+document.getElementById('item-library-actions-export-row-label').addEventListener('click', function () {
+  document.getElementById('export-modal').style.display = 'block';
+});
+document.getElementById('export').addEventListener('click', function () {
+  window.location = '/api/catalog/export';
+});"""
+
+SALES_BODY = """
+<div id="report" style="display: none">
+  <button id="ember87">Date range</button>
+  <div id="range" style="display: none">
+    <input id="ember137"> <input id="ember139">
+  </div>
+  <button id="ember283">Export</button>
+  <div id="export-menu" style="display: none">
+    <market-row><span class="market-export-link__label">Summary CSV</span></market-row>
+    <market-row><span class="market-export-link__label" id="detail-csv">Detail CSV</span></market-row>
+  </div>
+</div>"""
+
+SALES_SCRIPT = """
+afterLatency(function () { document.getElementById('report').style.display = 'block'; });
+document.getElementById('ember87').addEventListener('click', function () {
+  document.getElementById('range').style.display = 'block';
+});
+document.getElementById('ember139').addEventListener('keydown', function (e) {
+  if (e.key === 'Enter') {
+    afterLatency(function () {
+      document.getElementById('ember87').textContent =
+        document.getElementById('ember137').value + ' - ' + document.getElementById('ember139').value;
+    });
+  }
+});
+document.getElementById('ember283').addEventListener('click', function () {
+  afterLatency(function () { document.getElementById('export-menu').style.display = 'block'; });
+});
+document.getElementById('detail-csv').addEventListener('click', function () {
+  window.location = '/api/sales/export?start=' + encodeURIComponent(document.getElementById('ember137').value) +
+    '&end=' + encodeURIComponent(document.getElementById('ember139').value);
+});"""
+
+# -------------------------------------------------------------------
+# >>> SERVER <<<
+# -------------------------------------------------------------------
+
+class FakeSquareServer:
+    """
+    Local stand-in for the parts of the Square dashboard the pipeline
+    scripts drive: sign-in (with the 2FA promo and notification toaster),
+    the purchase-order list with search, infinite scroll and detail
+    modals, the item library export and the sales Detail CSV export.
+
+    Pages use the same ids and selectors as the real dashboard, so the
+    scripts run unchanged with SQUARE_BASE_URL pointed at `base_url`.
+
+    Usage:
+        with FakeSquareServer(FakeSquareConfig(orders=200)) as server:
+            print(server.base_url)
+    """
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeSquareConfig()
+        self.orders = build_orders(self.config)
+        self.orders_by_number = {order["number"]: order for order in self.orders}
+        self.requests = {}
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self.thread = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        print(f"[INFO] Fake Square dashboard listening on {self.base_url}")
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def count_request(self, path):
+        with self.lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    def search_orders(self, query, offset):
+        matches = [
+            order for order in self.orders
+            if not query or query in order["number"] or query.lower() in order["vendor"].lower()
+        ]
+        page = matches[offset:offset + self.config.page_size]
+        return {
+            "orders": [{key: order[key] for key in ("number", "vendor", "status")} for order in page],
+            "more": offset + len(page) < len(matches),
+        }
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output readable
+
+            def cookies(self):
+                return SimpleCookie(self.headers.get("Cookie", ""))
+
+            def send_body(self, body, content_type="text/html; charset=utf-8", headers=None, status=200):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("Cache-Control", "no-store")
+                for name, value in (headers or []):
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, payload, headers=None):
+                self.send_body(json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+            def send_page(self, title, body, script=""):
+                toaster = TOASTER_HTML if TOASTER_COOKIE_NAME in self.cookies() else ""
+                page = PAGE_TEMPLATE.format(title=title, toaster=toaster, body=body, script=script)
+                self.send_body(page.encode("utf-8"))
+
+            def redirect(self, location):
+                self.send_response(302)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_POST(self):
+                path = urlparse(self.path).path
+                server.count_request(path)
+                time.sleep(server.config.latency)
+                if path == "/api/login":
+                    self.send_json({"ok": True}, headers=[
+                        ("Set-Cookie", f"{SESSION_COOKIE_NAME}=fake; Path=/; Max-Age=86400"),
+                        ("Set-Cookie", f"{TOASTER_COOKIE_NAME}=1; Path=/"),
+                    ])
+                elif path == "/api/save":
+                    self.send_json({"ok": True})
+                else:
+                    self.send_error(404)
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                path, query = parsed.path, parse_qs(parsed.query)
+                server.count_request(path)
+
+                if path == "/login":
+                    return self.send_page("Sign in", LOGIN_BODY, LOGIN_SCRIPT)
+                if path == "/two-factor-promo":
+                    return self.send_page("Secure your account", PROMO_BODY, PROMO_SCRIPT)
+                if path == "/api/tick":
+                    # Simulated page work, also used before signing in
+                    time.sleep(server.config.latency)
+                    return self.send_json({"ok": True})
+                if SESSION_COOKIE_NAME not in self.cookies():
+                    if path.startswith("/api/"):
+                        return self.send_error(401)
+                    return self.redirect(f"/login?next={quote(path)}")
+
+                if path.startswith("/api/"):
+                    time.sleep(server.config.latency)
+                if path == "/api/purchase-orders":
+                    offset = int(query.get("offset", ["0"])[0])
+                    return self.send_json(server.search_orders(query.get("q", [""])[0], offset))
+                if path.startswith("/api/purchase-orders/"):
+                    order = server.orders_by_number.get(path.rsplit("/", 1)[1])
+                    return self.send_json(order) if order else self.send_error(404)
+                if path == "/api/catalog/export":
+                    file_name = f"FAKE_catalog-{datetime.now():%Y-%m-%d-%H%M%S}.xlsx"
+                    return self.send_body(
+                        build_catalog_xlsx(server.config),
+                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                        headers=[("Content-Disposition", f'attachment; filename="{file_name}"')]
+                    )
+                if path == "/api/sales/export":
+                    end_date = datetime.now()
+                    start_date = end_date - timedelta(days=30)
+                    file_name = f"items-{start_date:%Y-%m-%d}-{end_date:%Y-%m-%d}-{datetime.now():%H%M%S}.csv"
+                    return self.send_body(
+                        build_sales_csv(server.config, start_date, end_date), "text/csv",
+                        headers=[("Content-Disposition", f'attachment; filename="{file_name}"')]
+                    )
+
+                if path == "/dashboard/items/inventory/purchase-orders":
+                    script = PO_LIST_SCRIPT % {"status_classes": json.dumps(STATUS_CLASSES)}
+                    return self.send_page("Purchase Orders", PO_LIST_BODY, script)
+                if path == "/dashboard/items/library":
+                    return self.send_page("Item Library", LIBRARY_BODY, LIBRARY_SCRIPT)
+                if path == "/dashboard/sales/reports/item-sales":
+                    return self.send_page("Item Sales", SALES_BODY, SALES_SCRIPT)
+                if path.startswith("/dashboard"):
+                    return self.send_page("Dashboard", "<h1>Dashboard</h1>")
+                self.send_error(404)
+
+        return Handler
+
+if __name__ == "__main__":
+    # Usage: python bench/fake_square.py [port]  (serves until Ctrl+C)
+    import sys
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    server = FakeSquareServer(port=port)
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,268 @@
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+import importlib.util
+from datetime import datetime
+
+BENCH_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+REPO_DIRECTORY = os.path.dirname(BENCH_DIRECTORY)
+sys.path.insert(0, REPO_DIRECTORY)
+
+from fake_square import FakeSquareConfig, FakeSquareServer, build_orders
+from fake_google import FakeGoogleBackend
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+FLOWS = ["reconcile", "catalog", "sales"]
+
+# Scripts run (in order) for each export flow
+EXPORT_SCRIPTS = {
+    "catalog": ["1-cataLogFeedGoesHere.py", "1-openSheet.py"],
+    "sales": ["3-downloadSales.py"],
+}
+
+# Tab names and order # column of the PO spreadsheet, as in 2-Check_POS.py
+PO_TAB_NAMES = ["POSUPK", "PO-BPK", "PendingPOsKW", "PendingPOMarathon", "POMarco"]
+PO_SEARCH_COLUMN = 13   # Column M for ORDER #
+CATALOG_TAB_NAME = "CatalogFeedGoesHere"
+
+# -------------------------------------------------------------------
+# >>> HELPERS <<<
+# -------------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def bench_environment(server, google, workdir, run_id):
+    """
+    Environment that points the scripts at the fake dashboard and Google
+    APIs and keeps every runtime file (wait latencies, caches, traces)
+    inside `workdir`.
+    """
+    env = dict(os.environ)
+    env.update({
+        "SQUARE_BASE_URL": server.base_url,
+        "SQUARE_EMAIL": "bench@example.com",
+        "SQUARE_PASSWORD": "bench",
+        # A port nothing listens on, so the scripts never attach to a real browser daemon
+        "BROWSER_DEBUG_PORT": str(free_port()),
+        "BROWSER_PROFILE_DIR": os.path.join(workdir, "chrome-profile"),
+        "GOOGLE_API_EMULATOR_HOST": google.host,
+        "WAIT_LATENCY_PATH": os.path.join(workdir, "wait_latency.json"),
+        "PO_CACHE_PATH": os.path.join(workdir, "po_cache.sqlite3"),
+        "PO_JOURNAL_PATH": os.path.join(workdir, "po_journal.sqlite3"),
+        "EXPORT_MANIFEST_PATH": os.path.join(workdir, "export_manifest.sqlite3"),
+        "TRACE_DIRECTORY": os.path.join(workdir, "runs"),
+        "PIPELINE_RUN_ID": run_id,
+    })
+    env.pop("PIPELINE_PARENT_SPAN", None)
+    return env
+
+def load_script(file_name, module_name):
+    """Imports a pipeline script (whose file name is not a valid module name) without running its __main__ block."""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(REPO_DIRECTORY, file_name))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def run_script(file_name, workdir, env):
+    """Runs a pipeline script as a subprocess, printing its output if it fails."""
+    result = subprocess.run([sys.executable, os.path.join(REPO_DIRECTORY, file_name)], cwd=workdir, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if result.returncode != 0:
+        print(result.stdout)
+    return result
+
+def span_totals(workdir, run_id, names):
+    """Returns {span name: total seconds} for `names` in the run's trace."""
+    totals = {name: 0.0 for name in names}
+    path = os.path.join(workdir, "runs", f"{run_id}.jsonl")
+    if not os.path.exists(path):
+        return totals
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["name"] in totals:
+                totals[record["name"]] += record["duration"]
+    return totals
+
+def total_calls(stats, prefix=""):
+    return sum(entry["calls"] for method, entry in stats.items() if method.startswith(prefix))
+
+# -------------------------------------------------------------------
+# >>> GOOGLE FIXTURES <<<
+# -------------------------------------------------------------------
+
+def build_po_tabs(orders, tab_names=PO_TAB_NAMES, search_column=PO_SEARCH_COLUMN):
+    """
+    Spreads the fake orders over the PO tabs round-robin, one row per
+    line item: Name in column A, Qty in column G, order # in `search_column`.
+    """
+    tabs = {tab_name: [[""] * search_column] for tab_name in tab_names}
+    for index, order in enumerate(orders):
+        rows = tabs[tab_names[index % len(tab_names)]]
+        for name, qty, _ in order["line_items"]:
+            row = [""] * search_column
+            row[0], row[6], row[search_column - 1] = name, qty, order["number"]
+            rows.append(row)
+    return tabs
+
+def seed_admin_spreadsheet(google, config):
+    """
+    Creates "Admin1" with the PO tabs, a catalog tab wide enough for the
+    export at column T, and an old sales import as the last tab (which a
+    full sales import deletes).
+    """
+    tabs = build_po_tabs(build_orders(config))
+    tabs[CATALOG_TAB_NAME] = [[""] * 60 for _ in range(config.catalog_rows + 10)]
+    tabs["items-previous-import"] = [["Date"]]
+    return google.add_spreadsheet("Admin1", tabs)
+
+# -------------------------------------------------------------------
+# >>> FLOWS <<<
+# -------------------------------------------------------------------
+
+def bench_reconcile(server, google, workers):
+    """Runs 2-Check_POS.py's worker pool in-process against the fake dashboard and Sheets."""
+    check_pos = load_script("2-Check_POS.py", "check_pos_bench")
+    google.reset_stats()
+
+    started = time.time()
+    tab_states, _ = check_pos.run_worker_pool(check_pos.SHEET_TAB_NAMES, workers)
+    elapsed = time.time() - started
+
+    stats = google.snapshot_stats()
+    return {
+        "flow": "reconcile",
+        "items": len(server.orders),
+        "seconds": round(elapsed, 2),
+        "per_minute": round(len(server.orders) * 60 / elapsed, 1),
+        "processed": sum(state.processed for state in tab_states),
+        "sheets_calls": total_calls(stats, "sheets."),
+        "throttled": sum(entry["throttled"] for entry in stats.values()),
+    }
+
+def bench_export(flow, server, google, workdir, env):
+    """Runs an export flow's scripts as subprocesses and times them end to end and per span."""
+    run_id = env["PIPELINE_RUN_ID"]
+    google.reset_stats()
+    started = time.time()
+    for file_name in EXPORT_SCRIPTS[flow]:
+        run_script(file_name, workdir, env)
+    elapsed = time.time() - started
+
+    stats = google.snapshot_stats()
+    spans = span_totals(workdir, run_id, ["browser_start", "login", "export", "download", "drive_upload", "sheets_write"])
+    items = server.config.catalog_rows if flow == "catalog" else server.config.sales_rows
+    export_seconds = spans["export"] + spans["download"]
+    return {
+        "flow": flow,
+        "items": items,
+        "seconds": round(elapsed, 2),
+        "per_minute": round(60 / export_seconds, 1) if export_seconds else 0.0,
+        "export_seconds": round(export_seconds, 2),
+        "login_seconds": round(spans["login"], 2),
+        "browser_seconds": round(spans["browser_start"], 2),
+        "upload_seconds": round(spans["drive_upload"], 2),
+        "sheets_seconds": round(spans["sheets_write"], 2),
+        "sheets_calls": total_calls(stats, "sheets."),
+        "drive_calls": total_calls(stats, "drive."),
+    }
+
+def print_results(results):
+    print("[INFO] Benchmark results (per minute: orders for reconcile, exports for catalog/sales):")
+    print(f"{'Flow':<10} {'Items':>8} {'Seconds':>9} {'Per min':>9}  Details")
+    for result in results:
+        details = ", ".join(
+            f"{key}={value}" for key, value in result.items()
+            if key not in ("flow", "items", "seconds", "per_minute")
+        )
+        print(f"{result['flow']:<10} {result['items']:>8} {result['seconds']:>9.1f} "
+              f"{result['per_minute']:>9.1f}  {details}")
+
+# -------------------------------------------------------------------
+# >>> MAIN ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+def add_fixture_arguments(parser):
+    """Arguments shared with check_api_budget.py for sizing the fakes."""
+    parser.add_argument("--orders", type=int, default=100)
+    parser.add_argument("--line-items", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every fake Square response.")
+    parser.add_argument("--google-latency", type=float, default=0.05, help="Seconds added to every fake Google API response.")
+    parser.add_argument("--quota", type=int, help="Sheets read/write requests per minute before 429s (Google's default is 60).")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--catalog-rows", type=int, default=1000)
+    parser.add_argument("--sales-rows", type=int, default=5000)
+    parser.add_argument("--workdir", help="Keep runtime files here (reuse to benchmark with learned wait timeouts).")
+
+def fixtures_from_arguments(args):
+    """Returns (Square config, Google backend, workdir) for the parsed arguments."""
+    config = FakeSquareConfig(
+        orders=args.orders, line_items=args.line_items, latency=args.latency, page_size=args.page_size,
+        catalog_rows=args.catalog_rows, sales_rows=args.sales_rows
+    )
+    google = FakeGoogleBackend(latency=args.google_latency, read_quota_per_minute=args.quota,
+                               write_quota_per_minute=args.quota)
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="square-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    print(f"[INFO] Benchmark working directory: {workdir}")
+    return config, google, workdir
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the pipeline against local fake Square and Google APIs.")
+    parser.add_argument("--flows", default=",".join(FLOWS), help="Comma-separated subset of: " + ", ".join(FLOWS))
+    parser.add_argument("--workers", type=int, default=1, help="PO_WORKERS for the reconcile flow.")
+    parser.add_argument("--output", help="Append the results as one JSON line to this file.")
+    add_fixture_arguments(parser)
+    args = parser.parse_args()
+
+    flows = [flow.strip() for flow in args.flows.split(",") if flow.strip()]
+    unknown = set(flows) - set(FLOWS)
+    if unknown:
+        parser.error(f"Unknown flow(s): {', '.join(sorted(unknown))}")
+
+    output_path = os.path.abspath(args.output) if args.output else None
+    config, google, workdir = fixtures_from_arguments(args)
+
+    results = []
+    with FakeSquareServer(config) as server, google:
+        seed_admin_spreadsheet(google, config)
+        run_id = "bench-" + datetime.now().strftime("%Y%m%d-%H%M%S")
+        env = bench_environment(server, google, workdir, run_id)
+
+        for flow in flows:
+            if flow == "reconcile":
+                continue
+            env["PIPELINE_RUN_ID"] = f"{run_id}-{flow}"
+            results.append(bench_export(flow, server, google, workdir, env))
+
+        if "reconcile" in flows:
+            # The PO script reads its settings at import, so configure this process first
+            os.environ.update(env)
+            os.environ["PIPELINE_RUN_ID"] = f"{run_id}-reconcile"
+            os.chdir(workdir)
+            results.append(bench_reconcile(server, google, args.workers))
+
+    print_results(results)
+    if output_path:
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "config": vars(config),
+                "workers": args.workers,
+                "results": results,
+            }) + "\n")
+
+if __name__ == "__main__":
+    # Usage: python bench/run_bench.py --orders 300 --latency 0.3 --workers 2 --output bench-results.jsonl
+    main()
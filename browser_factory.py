@@ -0,0 +1,141 @@
+import os
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+from dotenv import load_dotenv
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+load_dotenv()
+
+# "0" shows the browser window, useful when debugging a flow
+BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "1") != "0"
+# "0" loads images, fonts and media again
+BROWSER_BLOCK_RESOURCES = os.getenv("BROWSER_BLOCK_RESOURCES", "1") != "0"
+# V8 heap limit per renderer, in MB
+BROWSER_JS_HEAP_MB = int(os.getenv("BROWSER_JS_HEAP_MB", "512"))
+BROWSER_RENDERER_LIMIT = int(os.getenv("BROWSER_RENDERER_LIMIT", "2"))
+
+# Pinned chromedriver: an explicit binary, or a version downloaded once
+CHROMEDRIVER_PATH = os.getenv("CHROMEDRIVER_PATH")
+CHROMEDRIVER_VERSION = os.getenv("CHROMEDRIVER_VERSION")
+CHROMEDRIVER_PATH_CACHE = os.path.join(os.getcwd(), ".chromedriver_path")
+
+# URL patterns never needed to drive the dashboard
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico",
+    "*.woff", "*.woff2", "*.ttf", "*.otf",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg"
+]
+
+_driver_path_lock = threading.Lock()
+_driver_path = None
+
+# -------------------------------------------------------------------
+# >>> DRIVER BINARY <<<
+# -------------------------------------------------------------------
+
+def get_driver_path():
+    """
+    Returns the chromedriver binary path without touching the network
+    after the first download.
+
+    Order: CHROMEDRIVER_PATH, the path cached in .chromedriver_path,
+    then a one-time ChromeDriverManager install (pinned to
+    CHROMEDRIVER_VERSION when set) whose result is cached.
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+        if CHROMEDRIVER_PATH:
+            _driver_path = CHROMEDRIVER_PATH
+            return _driver_path
+        if os.path.exists(CHROMEDRIVER_PATH_CACHE):
+            with open(CHROMEDRIVER_PATH_CACHE, "r", encoding="utf-8") as f:
+                cached_path = f.read().strip()
+            if os.path.exists(cached_path):
+                _driver_path = cached_path
+                return _driver_path
+
+        print("[INFO] Downloading chromedriver (one time)...")
+        if CHROMEDRIVER_VERSION:
+            _driver_path = ChromeDriverManager(driver_version=CHROMEDRIVER_VERSION).install()
+        else:
+            _driver_path = ChromeDriverManager().install()
+        with open(CHROMEDRIVER_PATH_CACHE, "w", encoding="utf-8") as f:
+            f.write(_driver_path)
+        return _driver_path
+
+# -------------------------------------------------------------------
+# >>> BROWSER FACTORY <<<
+# -------------------------------------------------------------------
+
+def build_chrome_options(download_directory=None, debug_port=None, profile_dir=None, headless=BROWSER_HEADLESS):
+    """
+    Returns Chrome options for a lightweight pipeline browser.
+
+    Parameters:
+    - download_directory: Folder Chrome should save downloads into.
+    - debug_port: Remote-debugging port to expose.
+    - profile_dir: Persistent user-data dir.
+    - headless: Run without a window.
+    """
+    chrome_options = Options()
+    if headless:
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--window-size=1920,1080")
+    else:
+        chrome_options.add_argument("--start-maximized")
+
+    # Keep each instance small so several fit on one server
+    chrome_options.add_argument(f"--js-flags=--max-old-space-size={BROWSER_JS_HEAP_MB}")
+    chrome_options.add_argument(f"--renderer-process-limit={BROWSER_RENDERER_LIMIT}")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--no-first-run")
+
+    if profile_dir:
+        chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+    if debug_port:
+        chrome_options.add_argument(f"--remote-debugging-port={debug_port}")
+
+    prefs = {
+        "download.prompt_for_download": False,
+        "download.directory_upgrade": True,
+        "safebrowsing.enabled": True
+    }
+    if BROWSER_BLOCK_RESOURCES:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    if download_directory:
+        prefs["download.default_directory"] = download_directory
+    chrome_options.add_experimental_option("prefs", prefs)
+    return chrome_options
+
+def block_resources(driver):
+    """Stops the current tab from loading images, fonts and media."""
+    if not BROWSER_BLOCK_RESOURCES:
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        print(f"[DEBUG] Could not enable resource blocking. Error: {e}")
+
+def create_driver(download_directory=None, debug_port=None, profile_dir=None, headless=BROWSER_HEADLESS):
+    """Starts a new lightweight Chrome and returns its driver."""
+    chrome_options = build_chrome_options(download_directory, debug_port, profile_dir, headless)
+    driver = webdriver.Chrome(service=Service(get_driver_path()), options=chrome_options)
+    block_resources(driver)
+    return driver
+
+def create_attached_driver(debugger_address):
+    """Returns a driver attached to an already running Chrome."""
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", debugger_address)
+    return webdriver.Chrome(service=Service(get_driver_path()), options=chrome_options)
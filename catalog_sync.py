@@ -0,0 +1,231 @@
+import os
+import json
+from openpyxl import load_workbook
+from gspread.utils import rowcol_to_a1, a1_to_rowcol
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+CATALOG_SNAPSHOT_PATH = os.getenv("CATALOG_SNAPSHOT_PATH", os.path.join(os.getcwd(), "catalog_snapshot.json"))
+
+# Column of the catalog export holding the item/variation token
+CATALOG_KEY_COLUMN = "Token"
+HEADER_KEY = "__header__"
+LEADING_KEY = "__leading__"  # Rows above the header (Square's export starts with a blank row)
+
+# Comma-separated header names of the export columns pushed to the sheet, in that order (default: all)
+CATALOG_COLUMNS = [name.strip() for name in os.getenv("CATALOG_COLUMNS", "").split(",") if name.strip()]
+
+# -------------------------------------------------------------------
+# >>> EXPORT READER <<<
+# -------------------------------------------------------------------
+
+def iter_catalog_rows(file_path, columns=CATALOG_COLUMNS):
+    """
+    Yields the rows of a catalog export one at a time, as value tuples.
+
+    The workbook is opened read-only, so openpyxl streams the sheet XML
+    instead of building a cell object for every cell; memory stays flat
+    however large the catalog grows.
+
+    Parameters:
+    - file_path: Catalog .xlsx export.
+    - columns: Header names to keep, in output order; must include
+      CATALOG_KEY_COLUMN. The projected rows start at the header (the
+      first row holding CATALOG_KEY_COLUMN): rows above it are dropped,
+      and names missing from the header come out as empty columns.
+
+    Raises ValueError if `columns` lacks the key column or the export
+    has no header row.
+    """
+    if columns and CATALOG_KEY_COLUMN not in columns:
+        raise ValueError(f"CATALOG_COLUMNS must include the '{CATALOG_KEY_COLUMN}' column.")
+    wb = load_workbook(file_path, read_only=True)
+    try:
+        indexes = None
+        for row in wb.active.iter_rows(values_only=True):
+            if not columns:
+                yield row
+                continue
+            if indexes is None:
+                header = [normalize_cell(v) for v in row]
+                if CATALOG_KEY_COLUMN not in header:
+                    continue
+                indexes = [header.index(name) if name in header else None for name in columns]
+            yield tuple(row[i] if i is not None and i < len(row) else None for i in indexes)
+        if columns and indexes is None:
+            raise ValueError(f"Catalog export has no header row with a '{CATALOG_KEY_COLUMN}' column.")
+    finally:
+        # Read-only workbooks keep the file open until closed
+        wb.close()
+
+# -------------------------------------------------------------------
+# >>> SNAPSHOT & DIFF <<<
+# -------------------------------------------------------------------
+
+def normalize_cell(value):
+    """Makes an openpyxl value comparable and JSON/Sheets friendly."""
+    if value is None:
+        return ""
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+def load_snapshot(path=CATALOG_SNAPSHOT_PATH):
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_snapshot(snapshot, path=CATALOG_SNAPSHOT_PATH):
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(snapshot, f)
+    os.replace(path + ".tmp", path)
+
+def key_catalog_rows(rows):
+    """
+    Returns {key: values} in export order. The header is the first row
+    holding CATALOG_KEY_COLUMN; rows above it are carried as LEADING_KEY
+    rows so the sheet layout stays the same, and every row below it is
+    keyed by its token (repeats and blanks numbered). `rows` may be any
+    iterable, e.g. iter_catalog_rows().
+
+    Raises ValueError if a non-empty export has no such header row.
+    """
+    rows = iter(rows)
+    keyed = {}
+    for row in rows:
+        header = [normalize_cell(v) for v in row]
+        if CATALOG_KEY_COLUMN in header:
+            break
+        keyed[f"{LEADING_KEY}#{len(keyed) + 1}"] = header
+    else:
+        if keyed:
+            raise ValueError(f"Catalog export has no header row with a '{CATALOG_KEY_COLUMN}' column.")
+        return {}
+    key_index = header.index(CATALOG_KEY_COLUMN)
+    keyed[HEADER_KEY] = header
+    seen = {}
+    for row in rows:
+        values = [normalize_cell(v) for v in row]
+        token = str(values[key_index]) if key_index < len(values) else ""
+        seen[token] = seen.get(token, 0) + 1
+        keyed[f"{token}#{seen[token]}"] = values
+    return keyed
+
+def header_offset(keyed_rows):
+    """Number of leading rows above the header."""
+    return sum(1 for key in keyed_rows if key.startswith(LEADING_KEY))
+
+def plan_catalog_update(snapshot, keyed_rows, start_row):
+    """
+    Diffs the new export against the previous snapshot.
+
+    Rows keep the sheet row they were first written to; changed rows are
+    rewritten in place, removed rows are cleared and new rows take freed
+    rows first, then go below the last used row. Leading rows and the
+    header always sit at the top, from `start_row`.
+
+    Returns (writes, clears, new_snapshot) where `writes` maps sheet row ->
+    values and `clears` lists sheet rows to blank out.
+    """
+    previous = snapshot["rows"] if snapshot else {}
+    next_row = snapshot["next_row"] if snapshot else start_row
+
+    writes = {}
+    positions = {}
+    freed = sorted(previous[key][0] for key in previous if key not in keyed_rows)
+    freed_set = set(freed)
+
+    for position, (key, values) in enumerate(keyed_rows.items()):
+        if key in previous:
+            sheet_row, old_values = previous[key]
+            if old_values != values:
+                writes[sheet_row] = values
+        elif key == HEADER_KEY or key.startswith(LEADING_KEY):
+            sheet_row = start_row + position
+            writes[sheet_row] = values
+        elif freed:
+            sheet_row = freed.pop(0)
+            writes[sheet_row] = values
+        else:
+            sheet_row = next_row
+            next_row += 1
+            writes[sheet_row] = values
+        positions[key] = [sheet_row, values]
+        next_row = max(next_row, sheet_row + 1)
+
+    clears = sorted(row for row in freed_set if row not in writes)
+    new_snapshot = {
+        "start_row": start_row, "key_column": CATALOG_KEY_COLUMN,
+        "header_offset": header_offset(keyed_rows),
+        "next_row": next_row, "rows": positions
+    }
+    return writes, clears, new_snapshot
+
+def build_row_ranges(writes, clears, first_col, width):
+    """
+    Merges row writes and clears into contiguous `batch_update` ranges,
+    padding every row to `width` so shorter rows also blank old cells.
+    """
+    rows = dict(writes)
+    for sheet_row in clears:
+        rows[sheet_row] = []
+
+    ranges = []
+    run = []
+    for sheet_row in sorted(rows) + [None]:
+        if run and (sheet_row is None or sheet_row != run[-1] + 1):
+            start = rowcol_to_a1(run[0], first_col)
+            end = rowcol_to_a1(run[-1], first_col + width - 1)
+            ranges.append({
+                "range": f"{start}:{end}",
+                "values": [list(rows[r]) + [""] * (width - len(rows[r])) for r in run]
+            })
+            run = []
+        if sheet_row is not None:
+            run.append(sheet_row)
+    return ranges
+
+# -------------------------------------------------------------------
+# >>> SHEET SYNC <<<
+# -------------------------------------------------------------------
+
+def sync_catalog_sheet(gsheet, rows, starting_column, start_row=3, snapshot_path=CATALOG_SNAPSHOT_PATH):
+    """
+    Writes only the catalog rows that changed since the last run.
+
+    Without a snapshot (first run), the whole export is written and any
+    rows left below it from a larger, older catalog are cleared.
+    Returns the number of sheet rows written or cleared.
+    """
+    return sync_keyed_catalog(gsheet, key_catalog_rows(rows), starting_column, start_row, snapshot_path)
+
+def sync_keyed_catalog(gsheet, keyed_rows, starting_column, start_row=3, snapshot_path=CATALOG_SNAPSHOT_PATH):
+    """As sync_catalog_sheet, for rows already keyed by key_catalog_rows()."""
+    first_col = a1_to_rowcol(f"{starting_column}1")[1]
+    snapshot = load_snapshot(snapshot_path)
+
+    layout = (start_row, CATALOG_KEY_COLUMN, header_offset(keyed_rows))
+    if snapshot and (snapshot.get("start_row"), snapshot.get("key_column"), snapshot.get("header_offset")) != layout:
+        # Laid out differently (or keyed before the header was detected): rewrite the whole export
+        snapshot = None
+    writes, clears, new_snapshot = plan_catalog_update(snapshot, keyed_rows, start_row)
+
+    if snapshot is None:
+        # Unknown sheet state: clear whatever an older export left below ours
+        used_rows = len(gsheet.col_values(first_col))
+        clears = list(range(new_snapshot["next_row"], used_rows + 1))
+
+    if not writes and not clears:
+        print("[INFO] Catalog unchanged since the last run. Skipping the sheet update.")
+        return 0
+
+    width = max([len(values) for _, values in new_snapshot["rows"].values()] +
+                [len(values) for _, values in (snapshot or {"rows": {}})["rows"].values()] + [1])
+    ranges = build_row_ranges(writes, clears, first_col, width)
+    gsheet.batch_update(ranges)
+    save_snapshot(new_snapshot, snapshot_path)
+    print(f"[INFO] Catalog sync: {len(writes)} row(s) written, {len(clears)} row(s) cleared in {len(ranges)} range(s).")
+    return len(writes) + len(clears)
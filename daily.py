@@ -1,43 +1,30 @@
 import subprocess
 import time
+from square_session import daemon_is_running
+from stage_scheduler import PIPELINE_STAGES, run_cycle
 
-# Global variable to store the subprocess instance
-current_process = None
-
-def run_script(script_name):
-    global current_process
-    
-    # If a previous process is running, terminate it
-    if current_process is not None:
-        print("Stopping previous execution...")
-        current_process.terminate()
-        current_process.wait()  # Wait for the process to terminate completely
-        print("Previous execution stopped.")  
-    
-    # Start a new process for the given script
-    print(f"Starting execution of {script_name}...")
-    current_process = subprocess.Popen(["python", script_name])
-    current_process.wait()  # Wait for the script to finish
-    print(f"Execution of {script_name} completed.")
-    
-    # Add a 30-40 second delay after each script execution
-    print(f"Waiting 10 Minuts before starting the next script...")
-    time.sleep(20 * 60)  # You can adjust the time here to 10 Minuts if needed (e.g., time.sleep(40))
-
-def run_scripts_in_sequence():
-    scripts = [
-        "1-cataLogFeedGoesHere.py",
-        "1-openSheet.py",
-        "2-Check_POS.py",
-        "3-downloadSales.py"
-    ]
-    
-    for script in scripts:
-        run_script(script)
+def start_browser_daemon(timeout=60):
+    """
+    Starts the shared logged-in browser if it is not already running, so the
+    scripts attach to it instead of logging in themselves.
+    """
+    if daemon_is_running():
+        print("Browser daemon already running.")
+        return None
+    print("Starting browser daemon...")
+    daemon_process = subprocess.Popen(["python", "square_session.py"])
+    end_time = time.time() + timeout
+    while time.time() < end_time and not daemon_is_running():
+        time.sleep(1)
+    return daemon_process
 
 def start_scheduler(interval_minutes):
     while True:
-        run_scripts_in_sequence()  # Run all scripts in sequence
+        # Restart the shared browser if it died or was killed since the last cycle
+        start_browser_daemon()
+        # Independent scripts run concurrently; 1-openSheet.py starts as soon as the catalog export is done.
+        # Every stage runs under a deadline and is killed with its Chrome processes if it hangs (see stage_scheduler.py)
+        run_cycle(PIPELINE_STAGES)
         time.sleep(interval_minutes * 60)  # Wait for the specified interval
 
 # Set the interval in minutes (e.g., 1440 minutes = 24 hours)
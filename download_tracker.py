@@ -0,0 +1,104 @@
+import os
+import time
+
+try:
+    # Optional: wake up on filesystem events instead of polling (Linux only)
+    from inotify_simple import INotify, flags
+except ImportError:
+    INotify = None
+
+# -------------------------------------------------------------------
+# >>> DOWNLOAD TRACKER <<<
+# -------------------------------------------------------------------
+
+PARTIAL_DOWNLOAD_SUFFIX = ".crdownload"
+
+class DownloadTracker:
+    """
+    Detects exactly the file produced by one export click.
+
+    Create the tracker *before* clicking the export button: it snapshots the
+    download directory, so files that were already there (older exports,
+    stray .crdownload leftovers) are never mistaken for the new download.
+
+    Parameters:
+    - directory: Folder Chrome downloads into.
+    - extension: Expected file extension, e.g. ".csv" or ".xlsx".
+    - poll_interval: Seconds between checks when no file events arrive.
+    """
+
+    def __init__(self, directory, extension, poll_interval=0.5):
+        self.directory = directory
+        self.extension = extension.lower()
+        self.poll_interval = poll_interval
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        """Returns {file name: (size, mtime_ns)} for the download directory."""
+        entries = {}
+        for entry in os.scandir(self.directory):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue  # Renamed away between listing and stat
+            entries[entry.name] = (stat.st_size, stat.st_mtime_ns)
+        return entries
+
+    def _changes(self, current):
+        """Returns names that are new or rewritten since the snapshot."""
+        return [name for name, stat in current.items() if self.snapshot.get(name) != stat]
+
+    def _open_watcher(self):
+        if INotify is None:
+            return None
+        watcher = INotify()
+        watcher.add_watch(self.directory, flags.CREATE | flags.MOVED_TO | flags.CLOSE_WRITE | flags.MODIFY)
+        return watcher
+
+    def _idle(self, watcher, seconds):
+        """Sleeps until a file event arrives or `seconds` pass."""
+        if watcher is None:
+            time.sleep(seconds)
+        else:
+            watcher.read(timeout=int(seconds * 1000))
+
+    def wait_for_file(self, timeout=120, stable_for=1.0):
+        """
+        Waits for the new download to finish and returns its full path.
+
+        The file counts as finished once no new partial download is pending
+        and its size has not changed for `stable_for` seconds.
+        Raises TimeoutError if that does not happen within `timeout` seconds.
+        """
+        print(f"[DEBUG] Waiting for a new '{self.extension}' file in {self.directory}...")
+        deadline = time.time() + timeout
+        watcher = self._open_watcher()
+        last_seen = None
+        stable_since = None
+        try:
+            while True:
+                current = self._scan()
+                changed = self._changes(current)
+                in_progress = [name for name in changed if name.endswith(PARTIAL_DOWNLOAD_SUFFIX)]
+                finished = [name for name in changed if name.lower().endswith(self.extension)]
+
+                if finished and not in_progress:
+                    newest = max(finished, key=lambda name: current[name][1])
+                    observed = (newest, current[newest][0])
+                    if observed != last_seen:
+                        last_seen, stable_since = observed, time.time()
+                    elif time.time() - stable_since >= stable_for:
+                        file_path = os.path.join(self.directory, newest)
+                        print(f"[DEBUG] Download complete. File: {newest} ({observed[1]} bytes)")
+                        return file_path
+
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise TimeoutError(
+                        f"No new '{self.extension}' download finished in {self.directory} within {timeout}s."
+                    )
+                self._idle(watcher, min(self.poll_interval, remaining))
+        finally:
+            if watcher is not None:
+                watcher.close()
@@ -0,0 +1,160 @@
+import os
+import csv
+import gzip
+import time
+import shutil
+import sqlite3
+import zipfile
+import hashlib
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+EXPORT_MANIFEST_PATH = os.getenv("EXPORT_MANIFEST_PATH", os.path.join(os.getcwd(), "export_manifest.sqlite3"))
+
+# Push exports even if their content was already processed
+EXPORT_FORCE = os.getenv("EXPORT_FORCE", "") == "1"
+
+# Newest exports per directory left untouched; older ones are deduplicated and compressed
+EXPORT_KEEP_FILES = int(os.getenv("EXPORT_KEEP_FILES", "2"))
+
+# Formats worth gzipping (xlsx files are zip archives already)
+COMPRESSIBLE_EXTENSIONS = {".csv"}
+
+# Caches kept next to an export (see sales_columns.py), removed when it is archived
+EXPORT_CACHE_SUFFIXES = (".columns", ".parquet", ".import.json")
+
+# -------------------------------------------------------------------
+# >>> CONTENT HASHING <<<
+# -------------------------------------------------------------------
+
+def _hash_csv(file_path, digest):
+    # Parsed rows, so line endings and quoting style do not matter
+    with open(file_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            digest.update(("\x1f".join(cell.strip() for cell in row) + "\x1e").encode("utf-8"))
+
+def _hash_xlsx(file_path, digest):
+    # Workbook parts only: docProps/ carries creation timestamps that change on every export
+    with zipfile.ZipFile(file_path) as archive:
+        for name in sorted(archive.namelist()):
+            if name.startswith("docProps/"):
+                continue
+            digest.update(name.encode("utf-8"))
+            with archive.open(name) as member:
+                for block in iter(lambda: member.read(1 << 20), b""):
+                    digest.update(block)
+
+def content_hash(file_path):
+    """
+    Returns a SHA-256 of the export's normalized content, so two downloads
+    of the same data hash alike whatever their file names and timestamps.
+    """
+    digest = hashlib.sha256()
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension == ".csv":
+        _hash_csv(file_path, digest)
+    elif extension == ".xlsx":
+        _hash_xlsx(file_path, digest)
+    else:
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+# -------------------------------------------------------------------
+# >>> MANIFEST <<<
+# -------------------------------------------------------------------
+
+class ExportManifest:
+    """
+    Content-addressed record of the exports each stage has processed.
+
+    A stage records the content hash of its input after pushing it; the
+    next run skips the stage if its new download hashes the same. The
+    manifest also remembers the archived copy of every content hash, so
+    old downloads with identical content are deleted instead of kept.
+    Use one instance per process.
+
+    Parameters:
+    - path: SQLite database file.
+    """
+
+    def __init__(self, path=EXPORT_MANIFEST_PATH):
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS processed_exports (
+                stage TEXT PRIMARY KEY,
+                digest TEXT NOT NULL,
+                file_name TEXT,
+                processed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS archived_exports (
+                digest TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                archived_at REAL NOT NULL
+            );
+        """)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def is_processed(self, stage, digest):
+        """Returns True if `stage` already pushed an export with this content."""
+        if EXPORT_FORCE:
+            return False
+        row = self.connection.execute("SELECT digest FROM processed_exports WHERE stage = ?", (stage,)).fetchone()
+        return row is not None and row[0] == digest
+
+    def record(self, stage, digest, file_path):
+        """Records that `stage` finished pushing the export."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO processed_exports (stage, digest, file_name, processed_at) VALUES (?, ?, ?, ?)",
+            (stage, digest, os.path.basename(file_path), time.time())
+        )
+        self.connection.commit()
+
+    def archive_old_exports(self, directory, extension, keep=EXPORT_KEEP_FILES):
+        """
+        Tidies the download directory: the newest `keep` exports stay as
+        they are; an older one is deleted if an archived copy of the same
+        content exists, otherwise it becomes that archived copy (gzipped
+        for CSV). Returns (deleted_count, compressed_count).
+        """
+        paths = sorted(
+            (os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(extension)),
+            key=os.path.getmtime, reverse=True
+        )
+        deleted = compressed = 0
+        for path in paths[keep:]:
+            if self.connection.execute(
+                "SELECT 1 FROM archived_exports WHERE path = ?", (os.path.abspath(path),)
+            ).fetchone():
+                continue  # Already the archived copy of its content
+            digest = content_hash(path)
+            row = self.connection.execute("SELECT path FROM archived_exports WHERE digest = ?", (digest,)).fetchone()
+            if row and os.path.exists(row[0]) and os.path.abspath(row[0]) != os.path.abspath(path):
+                os.remove(path)
+                deleted += 1
+            else:
+                archived_path = path
+                if extension.lower() in COMPRESSIBLE_EXTENSIONS:
+                    archived_path = path + ".gz"
+                    with open(path, "rb") as source, gzip.open(archived_path, "wb") as target:
+                        shutil.copyfileobj(source, target)
+                    shutil.copystat(path, archived_path)
+                    os.remove(path)
+                    compressed += 1
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO archived_exports (digest, path, archived_at) VALUES (?, ?, ?)",
+                    (digest, os.path.abspath(archived_path), time.time())
+                )
+            for suffix in EXPORT_CACHE_SUFFIXES:
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        self.connection.commit()
+        if deleted or compressed:
+            print(f"[INFO] Old exports in {directory}: {deleted} duplicate(s) deleted, {compressed} compressed.")
+        return deleted, compressed
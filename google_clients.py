@@ -0,0 +1,176 @@
+import os
+import json
+import tempfile
+import threading
+from datetime import datetime, timedelta
+import gspread
+import requests
+import google.auth.credentials
+import google.auth.transport.requests
+from google.oauth2.service_account import Credentials
+from googleapiclient.discovery import build
+from dotenv import load_dotenv
+from tracing import span
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+load_dotenv()
+
+CREDENTIALS_JSON = os.getenv("CREDENTIALS_JSON")
+
+GOOGLE_SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive.file",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Access token shared between the pipeline scripts until it expires
+TOKEN_CACHE_PATH = os.getenv("GOOGLE_TOKEN_CACHE", os.path.join(os.getcwd(), ".google_token.json"))
+TOKEN_EXPIRY_MARGIN = timedelta(minutes=2)
+
+# host:port of a local Sheets/Drive emulator (see bench/fake_google.py);
+# when set, no credentials are loaded and no request leaves the machine
+GOOGLE_API_EMULATOR_HOST = os.getenv("GOOGLE_API_EMULATOR_HOST")
+GOOGLE_API_HOSTS = ("https://sheets.googleapis.com", "https://www.googleapis.com")
+
+_lock = threading.RLock()
+_credentials = None
+_gspread_client = None
+_drive_service = None
+_spreadsheets = {}
+
+# -------------------------------------------------------------------
+# >>> CREDENTIALS & TOKEN CACHE <<<
+# -------------------------------------------------------------------
+
+def _load_cached_token(credentials):
+    """Reuses a still-valid access token saved by an earlier process."""
+    if not os.path.exists(TOKEN_CACHE_PATH):
+        return
+    try:
+        with open(TOKEN_CACHE_PATH, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        expiry = datetime.fromisoformat(cached["expiry"])
+        if cached.get("client_email") == credentials.service_account_email and \
+                expiry - TOKEN_EXPIRY_MARGIN > datetime.utcnow():
+            credentials.token = cached["token"]
+            credentials.expiry = expiry
+    except (OSError, ValueError, KeyError) as e:
+        print(f"[DEBUG] Ignoring unreadable token cache. Error: {e}")
+
+def _save_cached_token(credentials):
+    """
+    Saves the access token for later processes. Each writer uses its own
+    temp file (created 0o600, so the token is never world-readable) and
+    swaps it in atomically; a failed write only costs a token fetch later.
+    """
+    temp_path = None
+    try:
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(TOKEN_CACHE_PATH) or ".",
+                                         prefix=".google_token.", suffix=".tmp", delete=False) as f:
+            temp_path = f.name
+            json.dump({
+                "client_email": credentials.service_account_email,
+                "token": credentials.token,
+                "expiry": credentials.expiry.isoformat()
+            }, f)
+        os.replace(temp_path, TOKEN_CACHE_PATH)
+    except OSError as e:
+        print(f"[WARNING] Could not save the token cache. Error: {e}")
+        if temp_path and os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def get_credentials():
+    """
+    Returns the shared service-account credentials with a valid access
+    token, fetching a new token only when the cached one has expired.
+    """
+    global _credentials
+    with _lock:
+        if _credentials is None and GOOGLE_API_EMULATOR_HOST:
+            _credentials = google.auth.credentials.AnonymousCredentials()
+        if _credentials is None:
+            if not CREDENTIALS_JSON:
+                raise ValueError("CREDENTIALS_JSON path not found in .env file.")
+            _credentials = Credentials.from_service_account_file(CREDENTIALS_JSON, scopes=GOOGLE_SCOPES)
+            _load_cached_token(_credentials)
+        if not _credentials.valid and not GOOGLE_API_EMULATOR_HOST:
+            print("[DEBUG] Fetching a new Google access token...")
+            with span("google_token_fetch"):
+                _credentials.refresh(google.auth.transport.requests.Request())
+            _save_cached_token(_credentials)
+        return _credentials
+
+# -------------------------------------------------------------------
+# >>> API EMULATOR <<<
+# -------------------------------------------------------------------
+
+def emulator_url(url):
+    """Rewrites a Google API URL to the same path on GOOGLE_API_EMULATOR_HOST."""
+    for host in GOOGLE_API_HOSTS:
+        if url.startswith(host):
+            return f"http://{GOOGLE_API_EMULATOR_HOST}{url[len(host):]}"
+    return url
+
+class _EmulatorAdapter(requests.adapters.HTTPAdapter):
+    """Sends the gspread session's requests to the emulator."""
+
+    def send(self, request, **kwargs):
+        request.url = emulator_url(request.url)
+        return super().send(request, **kwargs)
+
+def _emulator_http():
+    """An httplib2 client for googleapiclient that talks to the emulator."""
+    import httplib2
+
+    class EmulatorHttp(httplib2.Http):
+        def request(self, uri, method="GET", body=None, headers=None, *args, **kwargs):
+            return super().request(emulator_url(uri), method, body, headers, *args, **kwargs)
+
+    return EmulatorHttp()
+
+# -------------------------------------------------------------------
+# >>> SHARED CLIENTS <<<
+# -------------------------------------------------------------------
+
+def get_gspread_client():
+    """Returns one gspread client (and keep-alive HTTP session) per process."""
+    global _gspread_client
+    with _lock:
+        if _gspread_client is None:
+            _gspread_client = gspread.authorize(get_credentials())
+            if GOOGLE_API_EMULATOR_HOST:
+                # gspread 6 keeps its session on `http_client`, older versions on the client
+                session = getattr(_gspread_client, "http_client", _gspread_client).session
+                for host in GOOGLE_API_HOSTS:
+                    session.mount(host, _EmulatorAdapter())
+        return _gspread_client
+
+def open_spreadsheet(name):
+    """Returns a cached spreadsheet handle, opening it on first use."""
+    with _lock:
+        if name not in _spreadsheets:
+            _spreadsheets[name] = get_gspread_client().open(name)
+        return _spreadsheets[name]
+
+def open_worksheet(spreadsheet_name, tab_name):
+    return open_spreadsheet(spreadsheet_name).worksheet(tab_name)
+
+def get_drive_service():
+    """
+    Returns a shared Drive v3 service built from the discovery document
+    bundled with google-api-python-client, so no discovery fetch is made.
+    The service is not thread-safe; use it from one thread.
+    """
+    global _drive_service
+    with _lock:
+        if _drive_service is None and GOOGLE_API_EMULATOR_HOST:
+            _drive_service = build("drive", "v3", http=_emulator_http(), static_discovery=True, cache_discovery=False)
+        if _drive_service is None:
+            _drive_service = build(
+                "drive", "v3", credentials=get_credentials(), static_discovery=True, cache_discovery=False
+            )
+        return _drive_service
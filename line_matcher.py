@@ -0,0 +1,140 @@
+import os
+import re
+import difflib
+from collections import deque, namedtuple
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+# Minimum similarity (0-1) of two names for a fuzzy match; near-miss SKUs ("1g"/"2g") score ~0.95
+FUZZY_MATCH_THRESHOLD = float(os.getenv("FUZZY_MATCH_THRESHOLD", "0.97"))
+
+NAME_COLUMN = 1  # Column A for Name
+QTY_COLUMN = 7   # Column G for Qty
+
+# kind is "exact", "fuzzy" or "missing"; rows are 1-based sheet rows
+LineMatch = namedtuple("LineMatch", ["kind", "rows", "sheet_name", "score"])
+
+# -------------------------------------------------------------------
+# >>> NORMALIZATION <<<
+# -------------------------------------------------------------------
+
+def normalize_name(name):
+    """Case-folds a name and collapses runs of whitespace."""
+    return " ".join(str(name).split()).casefold()
+
+def normalize_qty(qty):
+    """Returns "12", "12.0" or "1,200" as a number, or None if it is not one."""
+    try:
+        value = float(str(qty).strip().replace(",", ""))
+    except ValueError:
+        return None
+    return int(value) if value.is_integer() else value
+
+def name_words(normalized_name):
+    """Words of a normalized name, in order, without punctuation."""
+    return re.findall(r"[^\W_]+", normalized_name)
+
+def name_tokens(normalized_name):
+    return set(name_words(normalized_name))
+
+def size_tokens(normalized_name):
+    """
+    Numbers of a normalized name with the unit that follows them, e.g.
+    "runtz 2 gm" -> [("2", "gm")]; "2gm" and "2.0 gm" give the same.
+    """
+    return sorted(
+        (f"{float(number):g}", unit)
+        for number, unit in re.findall(r"(\d+(?:\.\d+)?)\s*([^\W\d_]*)", normalized_name)
+    )
+
+def similarity(first, second):
+    """Similarity of two normalized names, ignoring punctuation and spacing."""
+    return difflib.SequenceMatcher(None, "".join(name_words(first)), "".join(name_words(second))).ratio()
+
+# -------------------------------------------------------------------
+# >>> LINE-ITEM INDEX <<<
+# -------------------------------------------------------------------
+
+class LineItemIndex:
+    """
+    Index of a PO sheet tab's line-item rows for matching modal line items.
+
+    Rows are grouped by (normalized name, qty) into queues in sheet order,
+    so an exact match is a dict lookup instead of a scan. A token index
+    over the names narrows the fuzzy fallback to names sharing a word.
+    Exactly matched rows are taken out of the index, so no row is matched
+    twice. Fuzzy matches are only proposals: they never differ in a size
+    or count token and leave their rows in the index.
+
+    Parameters:
+    - values: Sheet snapshot (list of rows, as from get_all_values()).
+    - start_row: First 1-based row holding line items (after the header).
+    """
+
+    def __init__(self, values, start_row=2):
+        self.queues = {}        # (name, qty) -> deque of rows
+        self.token_index = {}   # token -> set of (name, qty) keys
+        for r_idx, row in enumerate(values[start_row - 1:], start=start_row):
+            name = row[NAME_COLUMN - 1] if len(row) >= NAME_COLUMN else ""
+            qty = normalize_qty(row[QTY_COLUMN - 1]) if len(row) >= QTY_COLUMN else None
+            name = normalize_name(name)
+            if not name or qty is None:
+                continue
+            key = (name, qty)
+            if key not in self.queues:
+                self.queues[key] = deque()
+                for token in name_tokens(name):
+                    self.token_index.setdefault(token, set()).add(key)
+            self.queues[key].append(r_idx)
+
+    def _take(self, key, min_row, take_all, remove=True):
+        queue = self.queues.get(key)
+        if not queue:
+            return []
+        if take_all:
+            rows = [r_idx for r_idx in queue if r_idx >= min_row]
+        else:
+            rows = next(([r_idx] for r_idx in queue if r_idx >= min_row), [])
+        if remove:
+            for r_idx in rows:
+                queue.remove(r_idx)
+        return rows
+
+    def _fuzzy_keys(self, name, qty):
+        """Returns [(score, key)] of candidate names with the same qty and sizes, best first."""
+        sizes = size_tokens(name)
+        candidates = set()
+        for token in name_tokens(name):
+            candidates.update(key for key in self.token_index.get(token, ()) if key[1] == qty)
+        candidates = {key for key in candidates if size_tokens(key[0]) == sizes}
+        scored = [(similarity(name, key[0]), key) for key in candidates if self.queues[key]]
+        return sorted((item for item in scored if item[0] >= FUZZY_MATCH_THRESHOLD),
+                      key=lambda item: (-item[0], self.queues[item[1]][0]))
+
+    def match(self, name, qty, min_row=1, take_all=False):
+        """
+        Finds sheet rows for one modal line item. Exact matches are removed
+        from the index; fuzzy ones stay, as they are only reported.
+
+        Parameters:
+        - name, qty: Line item as read from the modal.
+        - min_row: Only rows at or after this 1-based row are considered.
+        - take_all: Take every matching row instead of the first one.
+
+        Returns a LineMatch whose kind is "exact", "fuzzy" or "missing".
+        """
+        name, qty = normalize_name(name), normalize_qty(qty)
+        if not name or qty is None:
+            return LineMatch("missing", [], None, 0.0)
+
+        rows = self._take((name, qty), min_row, take_all)
+        if rows:
+            return LineMatch("exact", rows, name, 1.0)
+
+        for score, key in self._fuzzy_keys(name, qty):
+            rows = self._take(key, min_row, take_all, remove=False)
+            if rows:
+                return LineMatch("fuzzy", rows, key[0], score)
+        return LineMatch("missing", [], None, 0.0)
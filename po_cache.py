@@ -0,0 +1,97 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+PO_CACHE_PATH = os.getenv("PO_CACHE_PATH", os.path.join(os.getcwd(), "po_cache.sqlite3"))
+PO_CACHE_TTL_DAYS = float(os.getenv("PO_CACHE_TTL_DAYS", "30"))
+
+# Orders in these statuses never change again once reconciled
+TERMINAL_STATUSES = {"Received"}
+
+# -------------------------------------------------------------------
+# >>> PROCESSED ORDER CACHE <<<
+# -------------------------------------------------------------------
+
+def hash_line_items(line_items):
+    """Returns a stable hash of an order's line items, e.g. [(name, notes, qty), ...] from its sheet rows."""
+    payload = json.dumps([list(item) for item in line_items or []])
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+class ProcessedOrderCache:
+    """
+    Durable record of purchase orders already reconciled per sheet tab.
+
+    Orders that reached a terminal status are skipped on later runs until
+    their entry is older than the TTL, or always re-checked when
+    `force_refresh` is set. An entry is dropped as soon as the order's
+    line items no longer hash the same, so an edited order is checked
+    again. Record an order only once its sheet writes have landed. Use
+    one instance per thread.
+
+    Parameters:
+    - path: SQLite database file.
+    - ttl_days: Days before a terminal order is checked again.
+    - force_refresh: Ignore the cache and re-check every order.
+    """
+
+    def __init__(self, path=PO_CACHE_PATH, ttl_days=PO_CACHE_TTL_DAYS, force_refresh=False):
+        self.ttl_seconds = ttl_days * 24 * 3600
+        self.force_refresh = force_refresh
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS processed_orders (
+                tab TEXT NOT NULL,
+                order_number TEXT NOT NULL,
+                status TEXT NOT NULL,
+                line_items_hash TEXT,
+                processed_at REAL NOT NULL,
+                PRIMARY KEY (tab, order_number)
+            )
+        """)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def should_skip(self, tab, order_number, line_items=None):
+        """
+        Returns True if the order is terminal and was processed within the TTL.
+
+        Parameters:
+        - line_items: The order's line items as they stand now, in the
+          form given to record(); if they hash differently, the entry is
+          invalidated and the order is not skipped.
+        """
+        if self.force_refresh:
+            return False
+        row = self.connection.execute(
+            "SELECT status, line_items_hash, processed_at FROM processed_orders WHERE tab = ? AND order_number = ?",
+            (tab, order_number)
+        ).fetchone()
+        if row is None:
+            return False
+        status, line_items_hash, processed_at = row
+        if line_items is not None and line_items_hash != hash_line_items(line_items):
+            print(f"[INFO] Order {order_number}: Line items changed since it was reconciled. Checking it again.")
+            self.invalidate(tab, order_number)
+            return False
+        return status in TERMINAL_STATUSES and time.time() - processed_at < self.ttl_seconds
+
+    def invalidate(self, tab, order_number):
+        self.connection.execute("DELETE FROM processed_orders WHERE tab = ? AND order_number = ?", (tab, order_number))
+        self.connection.commit()
+
+    def record(self, tab, order_number, status, line_items=None):
+        """Stores the outcome of a processed order whose sheet writes were flushed."""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO processed_orders (tab, order_number, status, line_items_hash, processed_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (tab, order_number, status, hash_line_items(line_items), time.time())
+        )
+        self.connection.commit()
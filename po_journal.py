@@ -0,0 +1,163 @@
+import os
+import json
+import time
+import sqlite3
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+PO_JOURNAL_PATH = os.getenv("PO_JOURNAL_PATH", os.path.join(os.getcwd(), "po_journal.sqlite3"))
+
+# An interrupted run older than this is not resumed
+PO_JOURNAL_MAX_AGE_HOURS = float(os.getenv("PO_JOURNAL_MAX_AGE_HOURS", "20"))
+
+# -------------------------------------------------------------------
+# >>> RUN JOURNAL <<<
+# -------------------------------------------------------------------
+
+class RunJournal:
+    """
+    Checkpoint journal of the current PO reconciliation run.
+
+    Every successfully handled order is recorded together with the sheet
+    cells it is about to write, before those writes are flushed. After a
+    crash the next run replays the cells that were never confirmed as
+    flushed (the writes set absolute values, so replaying is idempotent,
+    as long as each row still belongs to the order), skips the orders
+    already completed and restores each tab's row pointer. Only a run
+    that never reached end_run() (a crash or kill) is resumed; a run that
+    ended with tabs unfinished is not, and the next run starts from an
+    empty journal. Finished tabs are skipped outright; the journal is cleared
+    once every tab of a run has finished. Use one instance per thread.
+
+    Parameters:
+    - path: SQLite database file.
+    """
+
+    def __init__(self, path=PO_JOURNAL_PATH):
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS journal_orders (
+                tab TEXT NOT NULL,
+                order_number TEXT NOT NULL,
+                status TEXT,
+                writes TEXT NOT NULL,
+                search_start_row INTEGER,
+                applied INTEGER NOT NULL DEFAULT 0,
+                recorded_at REAL NOT NULL,
+                PRIMARY KEY (tab, order_number)
+            );
+            CREATE TABLE IF NOT EXISTS journal_tabs (
+                tab TEXT PRIMARY KEY,
+                finished_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS journal_meta (name TEXT PRIMARY KEY, value TEXT);
+        """)
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def begin_run(self, fresh=False, max_age_hours=PO_JOURNAL_MAX_AGE_HOURS):
+        """
+        Starts a run, resuming the previous one if it was interrupted
+        before end_run(), unless it is older than `max_age_hours` or
+        `fresh` is set. Otherwise everything
+        journaled is dropped, unflushed writes included: the sheet may
+        have been edited since, so their (row, col) positions cannot be
+        trusted. Returns True if the run resumes.
+        """
+        row = self.connection.execute("SELECT value FROM journal_meta WHERE name = 'run_started_at'").fetchone()
+        started_at = float(row[0]) if row else None
+        ended = self.connection.execute("SELECT 1 FROM journal_meta WHERE name = 'run_ended_at'").fetchone()
+        resume = (started_at is not None and not ended and not fresh
+                  and time.time() - started_at < max_age_hours * 3600)
+        if not resume:
+            self.connection.execute("DELETE FROM journal_orders")
+            self.connection.execute("DELETE FROM journal_tabs")
+            self.connection.execute("DELETE FROM journal_meta")
+            self.connection.execute(
+                "INSERT OR REPLACE INTO journal_meta (name, value) VALUES ('run_started_at', ?)", (str(time.time()),)
+            )
+        self.connection.commit()
+        return resume
+
+    def end_run(self):
+        """
+        Marks the run as ended, finished or not, so the next run starts
+        afresh instead of resuming it.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO journal_meta (name, value) VALUES ('run_ended_at', ?)", (str(time.time()),)
+        )
+        self.connection.commit()
+
+    def finish_run(self):
+        """Clears the journal after every tab of the run has finished."""
+        self.connection.execute("DELETE FROM journal_orders")
+        self.connection.execute("DELETE FROM journal_tabs")
+        self.connection.execute("DELETE FROM journal_meta")
+        self.connection.commit()
+
+    def record_order(self, tab, order_number, status, writes, search_start_row):
+        """
+        Records a completed order and the cells it writes, before they are flushed.
+
+        Parameters:
+        - writes: {(row, col): value} queued for the order (1-based).
+        - search_start_row: The tab's row pointer after the order.
+        """
+        self.connection.execute(
+            "INSERT OR REPLACE INTO journal_orders "
+            "(tab, order_number, status, writes, search_start_row, applied, recorded_at) VALUES (?, ?, ?, ?, ?, 0, ?)",
+            (tab, order_number, status, json.dumps([[row, col, value] for (row, col), value in writes.items()]),
+             search_start_row, time.time())
+        )
+        self.connection.commit()
+
+    def mark_applied(self, tab):
+        """Marks every recorded write of the tab as flushed to the sheet."""
+        self.connection.execute("UPDATE journal_orders SET applied = 1 WHERE tab = ? AND applied = 0", (tab,))
+        self.connection.commit()
+
+    def pending_writes(self, tab):
+        """
+        Returns {order_number: {(row, col): value}} recorded for the tab but
+        never confirmed as flushed, in the order they were recorded.
+        """
+        writes = {}
+        for order_number, payload in self.connection.execute(
+            "SELECT order_number, writes FROM journal_orders WHERE tab = ? AND applied = 0 ORDER BY recorded_at", (tab,)
+        ):
+            writes[order_number] = {(row, col): value for row, col, value in json.loads(payload)}
+        return writes
+
+    def forget_order(self, tab, order_number):
+        """Drops an order from the journal, so the run handles it again from scratch."""
+        self.connection.execute("DELETE FROM journal_orders WHERE tab = ? AND order_number = ?", (tab, order_number))
+        self.connection.commit()
+
+    def completed_orders(self, tab):
+        """Returns the order numbers of the tab completed in this run."""
+        return {order_number for (order_number,) in self.connection.execute(
+            "SELECT order_number FROM journal_orders WHERE tab = ? AND search_start_row IS NOT NULL", (tab,)
+        )}
+
+    def resume_row(self, tab):
+        """Returns the tab's row pointer after its last completed order, or None."""
+        row = self.connection.execute(
+            "SELECT search_start_row FROM journal_orders WHERE tab = ? AND search_start_row IS NOT NULL "
+            "ORDER BY recorded_at DESC LIMIT 1", (tab,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def finish_tab(self, tab):
+        self.connection.execute("INSERT OR REPLACE INTO journal_tabs (tab, finished_at) VALUES (?, ?)", (tab, time.time()))
+        self.connection.commit()
+
+    def tab_finished(self, tab):
+        return self.connection.execute("SELECT 1 FROM journal_tabs WHERE tab = ?", (tab,)).fetchone() is not None
+
+    def unfinished_tabs(self, tabs):
+        return [tab for tab in tabs if not self.tab_finished(tab)]
@@ -0,0 +1,313 @@
+import os
+import sys
+import csv
+import json
+import time
+import zipfile
+import calendar
+from array import array
+
+try:
+    # Optional: cache parsed exports as Parquet instead of the built-in column files
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+# "parquet" (needs pyarrow), "columns" (stdlib zip of typed arrays) or "auto"
+SALES_CACHE_FORMAT = os.getenv("SALES_CACHE_FORMAT", "auto")
+CACHE_VERSION = 1
+
+# Detail CSV columns holding "$1,234.56" style amounts, stored as integer cents
+MONEY_COLUMNS = {
+    "Gross Sales", "Discounts", "Service Charges", "Net Sales", "Tax", "Tip",
+    "Commission", "Total Collected", "Fees", "Net Total"
+}
+# Numeric columns that may be fractional (weighted items), stored as floats
+NUMBER_COLUMNS = {"Qty", "Count"}
+# Date + Time are combined into one "Timestamp" column (seconds, wall clock of the export's time zone)
+DATE_COLUMN = "Date"
+TIME_COLUMN = "Time"
+TIMESTAMP_COLUMN = "Timestamp"
+
+# array typecodes per column type
+TYPECODES = {"cents": "q", "number": "d", "timestamp": "q"}
+
+# -------------------------------------------------------------------
+# >>> VALUE PARSERS <<<
+# -------------------------------------------------------------------
+
+def parse_cents(text):
+    """Returns "$1,234.56", "-$5.00" or "($5.00)" as integer cents (0 for blanks)."""
+    text = text.strip()
+    if not text:
+        return 0
+    negative = text.startswith("-") or text.startswith("(")
+    digits = text.strip("-()$ ").replace("$", "").replace(",", "")
+    whole, _, fraction = digits.partition(".")
+    cents = int(whole or 0) * 100 + int((fraction + "00")[:2])
+    return -cents if negative else cents
+
+def format_cents(cents):
+    """Inverse of parse_cents, in the export's "$1,234.56" / "-$5.00" style."""
+    sign = "-" if cents < 0 else ""
+    whole, fraction = divmod(abs(cents), 100)
+    return f"{sign}${whole:,}.{fraction:02d}"
+
+def parse_number(text):
+    text = text.strip().replace(",", "")
+    return float(text) if text else 0.0
+
+def format_number(value):
+    return str(int(value)) if value.is_integer() else repr(value)
+
+def parse_day(text):
+    """Returns the epoch seconds of midnight for "2024-01-31" or "01/31/2024"."""
+    if "/" in text:
+        month, day, year = text.split("/")
+    else:
+        year, month, day = text.split("-")
+    return calendar.timegm((int(year), int(month), int(day), 0, 0, 0))
+
+def parse_time_of_day(text):
+    parts = [int(part) for part in text.split(":")] + [0, 0]
+    return parts[0] * 3600 + parts[1] * 60 + parts[2]
+
+def format_timestamp(seconds):
+    """Returns ("YYYY-MM-DD", "HH:MM:SS") for a Timestamp value."""
+    parts = time.gmtime(seconds)
+    return time.strftime("%Y-%m-%d", parts), time.strftime("%H:%M:%S", parts)
+
+# -------------------------------------------------------------------
+# >>> COLUMNAR TABLE <<<
+# -------------------------------------------------------------------
+
+class SalesTable:
+    """
+    A Detail CSV held as typed columns.
+
+    Money columns are arrays of integer cents, Qty/Count arrays of floats,
+    and Date + Time become one "Timestamp" array of epoch seconds (the
+    export's wall-clock time). Every other column is a list of strings,
+    with repeated values interned so they share memory.
+
+    Parameters:
+    - columns: {name: array or list}, all of the same length.
+    - types: {name: "text" | "cents" | "number" | "timestamp"}.
+    - header: Column order of the source CSV (Date/Time included).
+    """
+
+    def __init__(self, columns, types, header):
+        self.columns = columns
+        self.types = types
+        self.header = header
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), []))
+
+    def column(self, name):
+        return self.columns[name]
+
+    def total(self, name):
+        """Sum of a numeric column (cents for money columns)."""
+        return sum(self.columns[name])
+
+    def text_rows(self):
+        """
+        Yields the rows as strings in the CSV's column order, e.g. for
+        re-uploading a cached export without reading the CSV again.
+        """
+        formatters = []
+        for name in self.header:
+            if name in (DATE_COLUMN, TIME_COLUMN) and TIMESTAMP_COLUMN in self.columns:
+                index = 0 if name == DATE_COLUMN else 1
+                timestamps = self.columns[TIMESTAMP_COLUMN]
+                formatters.append(lambda i, t=timestamps, x=index: format_timestamp(t[i])[x])
+            elif self.types.get(name) == "cents":
+                formatters.append(lambda i, c=self.columns[name]: format_cents(c[i]))
+            elif self.types.get(name) == "number":
+                formatters.append(lambda i, c=self.columns[name]: format_number(c[i]))
+            else:
+                formatters.append(lambda i, c=self.columns[name]: c[i])
+        for i in range(len(self)):
+            yield [formatter(i) for formatter in formatters]
+
+def column_type(name):
+    if name in MONEY_COLUMNS:
+        return "cents"
+    if name in NUMBER_COLUMNS:
+        return "number"
+    return "text"
+
+def parse_sales_csv(file_path):
+    """
+    Parses a Detail CSV into a SalesTable in one pass over the file:
+    rows are split by the C csv reader, transposed with zip() and each
+    column is then converted as a whole.
+    """
+    with open(file_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = next(reader, None) or []
+        width = len(header)
+        rows = [row if len(row) == width else (row + [""] * width)[:width] for row in reader if row]
+
+    raw_columns = list(zip(*rows)) if rows else [() for _ in header]
+    columns, types = {}, {}
+    interned = {}
+    for name, values in zip(header, raw_columns):
+        kind = column_type(name)
+        if name in (DATE_COLUMN, TIME_COLUMN):
+            continue
+        if kind == "cents":
+            columns[name] = array("q", map(parse_cents, values))
+        elif kind == "number":
+            columns[name] = array("d", map(parse_number, values))
+        else:
+            columns[name] = [interned.setdefault(value, value) for value in values]
+        types[name] = kind
+
+    if DATE_COLUMN in header:
+        dates = raw_columns[header.index(DATE_COLUMN)]
+        times = raw_columns[header.index(TIME_COLUMN)] if TIME_COLUMN in header else [""] * len(dates)
+        day_cache = {}
+        timestamps = array("q")
+        for date_text, time_text in zip(dates, times):
+            day = day_cache.get(date_text)
+            if day is None:
+                day = day_cache[date_text] = parse_day(date_text) if date_text else 0
+            timestamps.append(day + (parse_time_of_day(time_text) if time_text else 0))
+        columns[TIMESTAMP_COLUMN] = timestamps
+        types[TIMESTAMP_COLUMN] = "timestamp"
+
+    return SalesTable(columns, types, header)
+
+# -------------------------------------------------------------------
+# >>> COLUMNAR CACHE <<<
+# -------------------------------------------------------------------
+
+def cache_format():
+    if SALES_CACHE_FORMAT == "parquet" and pa is None:
+        print("[WARNING] SALES_CACHE_FORMAT=parquet but pyarrow is not installed. Using column files.")
+    if SALES_CACHE_FORMAT in ("parquet", "auto") and pa is not None:
+        return "parquet"
+    return "columns"
+
+def cache_path_for(file_path, fmt=None):
+    """Returns the cache file kept next to the CSV."""
+    return f"{file_path}.{fmt or cache_format()}"
+
+def source_signature(file_path):
+    stat = os.stat(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": CACHE_VERSION}
+
+def _write_parquet(table, path, meta):
+    arrow_types = {"cents": pa.int64(), "number": pa.float64(), "timestamp": pa.int64(), "text": pa.string()}
+    arrow_table = pa.table(
+        {name: pa.array(list(values), type=arrow_types[table.types[name]]) for name, values in table.columns.items()},
+        metadata={"sales_columns": json.dumps(meta)}
+    )
+    pq.write_table(arrow_table, path)
+
+def _read_parquet(path):
+    arrow_table = pq.read_table(path)
+    meta = json.loads(arrow_table.schema.metadata[b"sales_columns"])
+    columns = {}
+    for name in arrow_table.column_names:
+        values = arrow_table.column(name).to_pylist()
+        typecode = TYPECODES.get(meta["types"][name])
+        columns[name] = array(typecode, values) if typecode else values
+    return meta, columns
+
+def _write_columns(table, path, meta):
+    """Stdlib column file: a zip with schema.json plus one member per column."""
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("schema.json", json.dumps(meta))
+        for index, (name, values) in enumerate(table.columns.items()):
+            if isinstance(values, array):
+                archive.writestr(f"{index}.bin", values.tobytes())
+            else:
+                archive.writestr(f"{index}.json", json.dumps(values))
+
+def _read_columns(path):
+    columns = {}
+    with zipfile.ZipFile(path) as archive:
+        meta = json.loads(archive.read("schema.json"))
+        for index, name in enumerate(meta["order"]):
+            typecode = TYPECODES.get(meta["types"][name])
+            if typecode:
+                values = array(typecode)
+                values.frombytes(archive.read(f"{index}.bin"))
+            else:
+                values = json.loads(archive.read(f"{index}.json"))
+            columns[name] = values
+    return meta, columns
+
+def save_sales_cache(table, file_path):
+    fmt = cache_format()
+    path = cache_path_for(file_path, fmt)
+    meta = {
+        "source": source_signature(file_path),
+        "header": table.header,
+        "types": table.types,
+        "order": list(table.columns),
+    }
+    writer = _write_parquet if fmt == "parquet" else _write_columns
+    writer(table, path + ".tmp", meta)
+    os.replace(path + ".tmp", path)
+    return path
+
+def load_sales_cache(file_path):
+    """Returns the cached SalesTable for the CSV, or None if missing or stale."""
+    for fmt in ("parquet", "columns"):
+        path = cache_path_for(file_path, fmt)
+        if not os.path.exists(path) or (fmt == "parquet" and pa is None):
+            continue
+        try:
+            meta, columns = _read_parquet(path) if fmt == "parquet" else _read_columns(path)
+        except Exception as e:
+            print(f"[DEBUG] Ignoring unreadable sales cache {path}. Error: {e}")
+            continue
+        if meta["source"] == source_signature(file_path):
+            return SalesTable(columns, meta["types"], meta["header"])
+    return None
+
+def load_sales_table(file_path):
+    """
+    Returns the typed SalesTable of a Detail CSV, parsing it only the
+    first time; later calls read the columnar cache next to the CSV.
+    """
+    table = load_sales_cache(file_path)
+    if table is not None:
+        return table
+    table = parse_sales_csv(file_path)
+    try:
+        save_sales_cache(table, file_path)
+    except OSError as e:
+        print(f"[WARNING] Could not write the sales cache. Error: {e}")
+    return table
+
+if __name__ == "__main__":
+    # Usage: python sales_columns.py <detail.csv>  (parses, caches and compares load times)
+    if len(sys.argv) < 2:
+        print("Usage: python sales_columns.py <detail.csv>")
+        sys.exit(1)
+    csv_path = sys.argv[1]
+
+    started = time.time()
+    parsed = parse_sales_csv(csv_path)
+    parse_seconds = time.time() - started
+    cache_file = save_sales_cache(parsed, csv_path)
+
+    started = time.time()
+    cached = load_sales_cache(csv_path)
+    load_seconds = time.time() - started
+
+    print(f"[INFO] {len(parsed)} rows, {len(parsed.columns)} columns; cache: {cache_file}")
+    print(f"[INFO] Parse CSV: {parse_seconds:.3f}s, load cache: {load_seconds:.3f}s")
+    for name, kind in parsed.types.items():
+        if kind == "cents":
+            print(f"[INFO] {name}: {format_cents(cached.total(name))}")
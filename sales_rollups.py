@@ -0,0 +1,247 @@
+import os
+import sys
+import json
+import bisect
+import sqlite3
+import hashlib
+from gspread.utils import rowcol_to_a1
+from gspread.exceptions import WorksheetNotFound
+from sales_store import SALES_STORE_PATH
+from sales_columns import TIMESTAMP_COLUMN, format_timestamp, load_sales_table
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+SALES_ITEM_ROLLUP_SHEET = os.getenv("SALES_ITEM_ROLLUP_SHEET", "SalesByItemDay")
+SALES_CATEGORY_ROLLUP_SHEET = os.getenv("SALES_CATEGORY_ROLLUP_SHEET", "SalesByCategoryDay")
+
+# Detail CSV columns summed per Item/SKU x Location x Date (money columns as cents)
+ROLLUP_QTY_COLUMN = "Qty"
+ROLLUP_MONEY_COLUMNS = ["Gross Sales", "Discounts", "Net Sales", "Tax", "Commission"]
+
+ITEM_ROLLUP_HEADER = ["Date", "Item", "SKU", "Location", "Category", "Qty"] + ROLLUP_MONEY_COLUMNS
+CATEGORY_ROLLUP_HEADER = ["Date", "Category", "Location", "Qty"] + ROLLUP_MONEY_COLUMNS
+
+WRITE_CHUNK_ROWS = 5000
+SECONDS_PER_DAY = 86400
+
+# -------------------------------------------------------------------
+# >>> AGGREGATION <<<
+# -------------------------------------------------------------------
+
+def aggregate_sales(table):
+    """
+    Sums a SalesTable by (date, item, SKU, location).
+
+    Returns {date: {(item, sku, location): [category, qty, cents...]}},
+    with one cents total per ROLLUP_MONEY_COLUMNS entry. Columns missing
+    from the export count as zero.
+    """
+    count = len(table)
+    blank, zeros = [""] * count, [0] * count
+    items = table.columns.get("Item", blank)
+    skus = table.columns.get("SKU", blank)
+    locations = table.columns.get("Location", blank)
+    categories = table.columns.get("Category", blank)
+    quantities = table.columns.get(ROLLUP_QTY_COLUMN, zeros)
+    money = [table.columns.get(name, zeros) for name in ROLLUP_MONEY_COLUMNS]
+
+    day_names = {}
+    days = {}
+    for i, timestamp in enumerate(table.columns[TIMESTAMP_COLUMN]):
+        day_number = timestamp // SECONDS_PER_DAY
+        day = day_names.get(day_number)
+        if day is None:
+            day = day_names[day_number] = format_timestamp(day_number * SECONDS_PER_DAY)[0]
+        groups = days.setdefault(day, {})
+        key = (items[i], skus[i], locations[i])
+        totals = groups.get(key)
+        if totals is None:
+            totals = groups[key] = [categories[i], 0.0] + [0] * len(money)
+        totals[1] += quantities[i]
+        for j, column in enumerate(money):
+            totals[2 + j] += column[i]
+    return days
+
+# -------------------------------------------------------------------
+# >>> LOCAL ROLLUP STORE <<<
+# -------------------------------------------------------------------
+
+class RollupStore:
+    """
+    Per-day sales rollups kept next to the sales rows in the local SQLite store.
+
+    Every export replaces the rollups of the days it covers; days whose
+    totals did not change are left alone. The earliest changed day is
+    remembered until the summary tabs have been rewritten from it.
+    """
+
+    def __init__(self, path=SALES_STORE_PATH):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sales_rollups (
+                day TEXT NOT NULL,
+                item TEXT NOT NULL,
+                sku TEXT NOT NULL,
+                location TEXT NOT NULL,
+                category TEXT,
+                qty REAL NOT NULL,
+                gross_sales INTEGER NOT NULL,
+                discounts INTEGER NOT NULL,
+                net_sales INTEGER NOT NULL,
+                tax INTEGER NOT NULL,
+                commission INTEGER NOT NULL,
+                PRIMARY KEY (day, item, sku, location)
+            );
+            CREATE TABLE IF NOT EXISTS rollup_days (day TEXT PRIMARY KEY, totals_hash TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def get_meta(self, name, default=None):
+        row = self.connection.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, name, value):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value))
+        )
+
+    @property
+    def dirty_from(self):
+        """Earliest day whose rollups changed since the summary tabs were last written (or None)."""
+        return self.get_meta("rollups_dirty_from")
+
+    def update(self, days):
+        """
+        Replaces the stored rollups of every day in `days` (as returned by
+        aggregate_sales). Returns the sorted list of days that changed.
+        """
+        changed = []
+        for day in sorted(days):
+            groups = sorted((key + tuple(totals)) for key, totals in days[day].items())
+            totals_hash = hashlib.sha1(json.dumps(groups).encode("utf-8")).hexdigest()
+            stored = self.connection.execute("SELECT totals_hash FROM rollup_days WHERE day = ?", (day,)).fetchone()
+            if stored and stored[0] == totals_hash:
+                continue
+            self.connection.execute("DELETE FROM sales_rollups WHERE day = ?", (day,))
+            self.connection.executemany(
+                "INSERT INTO sales_rollups VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(day,) + group for group in groups]
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO rollup_days (day, totals_hash) VALUES (?, ?)", (day, totals_hash)
+            )
+            changed.append(day)
+
+        if changed:
+            dirty_from = self.dirty_from
+            self.set_meta("rollups_dirty_from", min(changed[0], dirty_from) if dirty_from else changed[0])
+        self.connection.commit()
+        return changed
+
+    def mark_synced(self):
+        self.set_meta("rollups_dirty_from", None)
+        self.connection.commit()
+
+    def item_rows(self):
+        """Rows of the Item/SKU x Location x Date tab, ordered by date."""
+        return [
+            [day, item, sku, location, category, format_qty(qty)] + [cents / 100 for cents in money]
+            for day, item, sku, location, category, qty, *money in self.connection.execute(
+                "SELECT * FROM sales_rollups ORDER BY day, item, sku, location"
+            )
+        ]
+
+    def category_rows(self):
+        """Rows of the Category x Location x Date tab, ordered by date."""
+        return [
+            [day, category, location, format_qty(qty)] + [cents / 100 for cents in money]
+            for day, category, location, qty, *money in self.connection.execute("""
+                SELECT day, COALESCE(category, ''), location, SUM(qty), SUM(gross_sales),
+                       SUM(discounts), SUM(net_sales), SUM(tax), SUM(commission)
+                FROM sales_rollups GROUP BY day, category, location ORDER BY day, category, location
+            """)
+        ]
+
+def format_qty(qty):
+    return int(qty) if float(qty).is_integer() else qty
+
+# -------------------------------------------------------------------
+# >>> SHEET SYNC <<<
+# -------------------------------------------------------------------
+
+def sync_rollup_sheet(spreadsheet, sheet_name, header, rows, dirty_from):
+    """
+    Writes a summary tab whose rows are ordered by date (first column).
+
+    Rows before `dirty_from` are already on the sheet and are skipped;
+    everything from that day on is rewritten and the tab is resized to
+    the new row count. A missing tab is created and written in full.
+    Returns the number of rows written.
+    """
+    total_rows = len(rows) + 1
+    try:
+        worksheet = spreadsheet.worksheet(sheet_name)
+        if dirty_from is None:
+            print(f"[INFO] Summary tab '{sheet_name}' is already up to date.")
+            return 0
+        start = bisect.bisect_left([row[0] for row in rows], dirty_from)
+        if worksheet.row_count != total_rows:
+            worksheet.resize(rows=total_rows)
+    except WorksheetNotFound:
+        print(f"[INFO] Summary tab '{sheet_name}' not found. Creating it.")
+        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows=str(total_rows), cols=str(len(header)))
+        start = 0
+
+    values = ([header] if start == 0 else []) + rows[start:]
+    first_row = 1 if start == 0 else start + 2
+    for offset in range(0, len(values), WRITE_CHUNK_ROWS):
+        worksheet.update(range_name=rowcol_to_a1(first_row + offset, 1), values=values[offset:offset + WRITE_CHUNK_ROWS])
+    print(f"[INFO] Wrote {len(rows) - start} row(s) of '{sheet_name}' ({len(rows)} in total).")
+    return len(rows) - start
+
+def sync_sales_rollups(spreadsheet, store):
+    """Brings both summary tabs up to date with the rollup store."""
+    dirty_from = store.dirty_from
+    sync_rollup_sheet(spreadsheet, SALES_ITEM_ROLLUP_SHEET, ITEM_ROLLUP_HEADER, store.item_rows(), dirty_from)
+    sync_rollup_sheet(spreadsheet, SALES_CATEGORY_ROLLUP_SHEET, CATEGORY_ROLLUP_HEADER, store.category_rows(), dirty_from)
+    store.mark_synced()
+
+def update_sales_rollups(file_path, spreadsheet):
+    """
+    Folds a Detail CSV into the local rollups and pushes the changed part
+    of the summary tabs. Returns the list of days whose totals changed.
+    """
+    store = RollupStore()
+    try:
+        changed = store.update(aggregate_sales(load_sales_table(file_path)))
+        print(f"[INFO] Sales rollups: {len(changed)} day(s) changed in {os.path.basename(file_path)}.")
+        sync_sales_rollups(spreadsheet, store)
+        return changed
+    finally:
+        store.close()
+
+# -------------------------------------------------------------------
+# >>> BACKFILL ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+if __name__ == "__main__":
+    from google_clients import open_spreadsheet
+
+    # Usage: python sales_rollups.py <detail.csv> [<detail.csv> ...]
+    # Folds older exports into the rollups, then rewrites the summary tabs from the earliest changed day.
+    if len(sys.argv) < 2:
+        print("Usage: python sales_rollups.py <detail.csv> [<detail.csv> ...]")
+        sys.exit(1)
+    store = RollupStore()
+    try:
+        for csv_path in sys.argv[1:]:
+            changed = store.update(aggregate_sales(load_sales_table(csv_path)))
+            print(f"[INFO] Sales rollups: {len(changed)} day(s) changed in {os.path.basename(csv_path)}.")
+        sync_sales_rollups(open_spreadsheet('Admin1'), store)
+    finally:
+        store.close()
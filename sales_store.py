@@ -0,0 +1,234 @@
+import os
+import csv
+import json
+import sqlite3
+import hashlib
+from gspread.utils import rowcol_to_a1
+from gspread.exceptions import WorksheetNotFound
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+SALES_STORE_PATH = os.getenv("SALES_STORE_PATH", os.path.join(os.getcwd(), "sales_store.sqlite3"))
+
+# Columns of the Detail CSV that identify one sold line item
+SALES_KEY_COLUMNS = ("Transaction ID", "Payment ID", "Token")
+
+APPEND_CHUNK_ROWS = 2000
+
+# -------------------------------------------------------------------
+# >>> LOCAL STORE <<<
+# -------------------------------------------------------------------
+
+class SalesStore:
+    """
+    Local SQLite copy of every sales row ever exported, keyed by
+    Transaction ID + Payment ID + Token.
+
+    Each row also remembers the sheet row it was written to (NULL until it
+    has been pushed), so a sync only sends rows that are new or changed.
+    Older CSV exports can be ingested at any time to backfill history.
+    """
+
+    def __init__(self, path=SALES_STORE_PATH):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript("""
+            CREATE TABLE IF NOT EXISTS sales_rows (
+                key TEXT PRIMARY KEY,
+                row_hash TEXT NOT NULL,
+                row_json TEXT NOT NULL,
+                sale_date TEXT,
+                seq INTEGER NOT NULL,
+                sheet_row INTEGER,
+                dirty INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS sales_rows_pending ON sales_rows (sheet_row, dirty);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT);
+        """)
+
+    def close(self):
+        self.connection.close()
+
+    def get_meta(self, name, default=None):
+        row = self.connection.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, name, value):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, json.dumps(value))
+        )
+
+    @property
+    def header(self):
+        return self.get_meta("header", [])
+
+    def ingest(self, file_path):
+        """
+        Loads a Detail CSV into the store.
+        Returns (new_count, changed_count); unchanged rows are left alone.
+        """
+        new_count = changed_count = 0
+        seq = self.connection.execute("SELECT COALESCE(MAX(seq), 0) FROM sales_rows").fetchone()[0]
+
+        with open(file_path, "r", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            csv_header = next(reader, None)
+            if not csv_header:
+                return 0, 0
+            if not self.header:
+                self.set_meta("header", csv_header)
+            header = self.header
+            if csv_header != header:
+                print(f"[WARNING] CSV header differs from the stored header; columns are mapped by name.")
+
+            key_indexes = [csv_header.index(column) for column in SALES_KEY_COLUMNS]
+            date_index = csv_header.index("Date") if "Date" in csv_header else None
+            occurrences = {}
+
+            for row in reader:
+                values = dict(zip(csv_header, row))
+                base_key = "|".join(row[i] if i < len(row) else "" for i in key_indexes)
+                # The same item can appear twice in one payment; number the repeats
+                occurrences[base_key] = occurrences.get(base_key, 0) + 1
+                key = f"{base_key}#{occurrences[base_key]}"
+
+                ordered = [values.get(column, "") for column in header]
+                row_json = json.dumps(ordered)
+                row_hash = hashlib.sha1(row_json.encode("utf-8")).hexdigest()
+                sale_date = row[date_index] if date_index is not None and date_index < len(row) else None
+
+                existing = self.connection.execute(
+                    "SELECT row_hash FROM sales_rows WHERE key = ?", (key,)
+                ).fetchone()
+                if existing is None:
+                    seq += 1
+                    self.connection.execute(
+                        "INSERT INTO sales_rows (key, row_hash, row_json, sale_date, seq) VALUES (?, ?, ?, ?, ?)",
+                        (key, row_hash, row_json, sale_date, seq)
+                    )
+                    new_count += 1
+                elif existing[0] != row_hash:
+                    self.connection.execute(
+                        "UPDATE sales_rows SET row_hash = ?, row_json = ?, sale_date = ?, dirty = 1 WHERE key = ?",
+                        (row_hash, row_json, sale_date, key)
+                    )
+                    changed_count += 1
+
+        self.connection.commit()
+        print(f"[INFO] Sales store: {new_count} new and {changed_count} changed row(s) from {os.path.basename(file_path)}.")
+        return new_count, changed_count
+
+    def unsynced_rows(self):
+        """Returns [(key, values)] for rows not yet written to the sheet, oldest first."""
+        return [
+            (key, json.loads(row_json)) for key, row_json in self.connection.execute(
+                "SELECT key, row_json FROM sales_rows WHERE sheet_row IS NULL ORDER BY sale_date, seq"
+            )
+        ]
+
+    def changed_rows(self):
+        """Returns [(key, sheet_row, values)] for synced rows whose content changed."""
+        return [
+            (key, sheet_row, json.loads(row_json)) for key, sheet_row, row_json in self.connection.execute(
+                "SELECT key, sheet_row, row_json FROM sales_rows WHERE sheet_row IS NOT NULL AND dirty = 1"
+            )
+        ]
+
+    def rows_between(self, start_date=None, end_date=None):
+        """Returns stored rows for an inclusive date range (dates as in the CSV)."""
+        query = "SELECT row_json FROM sales_rows WHERE 1 = 1"
+        params = []
+        if start_date:
+            query += " AND sale_date >= ?"
+            params.append(start_date)
+        if end_date:
+            query += " AND sale_date <= ?"
+            params.append(end_date)
+        return [json.loads(row_json) for (row_json,) in self.connection.execute(query + " ORDER BY sale_date, seq", params)]
+
+    def reset_sheet_rows(self):
+        """Forgets all sheet positions, e.g. after the sales sheet was recreated."""
+        self.connection.execute("UPDATE sales_rows SET sheet_row = NULL, dirty = 0")
+        self.set_meta("next_sheet_row", 2)
+        self.connection.commit()
+
+# -------------------------------------------------------------------
+# >>> SHEET SYNC <<<
+# -------------------------------------------------------------------
+
+def sync_sales_sheet(spreadsheet, store, sheet_name):
+    """
+    Pushes only new and changed store rows to `sheet_name`.
+
+    New rows are appended below the last synced row; changed rows are
+    rewritten in place with one batch update. The sheet is created (and
+    fully populated from the store) if it does not exist yet.
+    Returns (appended_count, updated_count).
+    """
+    header = store.header
+    try:
+        worksheet = spreadsheet.worksheet(sheet_name)
+    except WorksheetNotFound:
+        print(f"[INFO] Sales sheet '{sheet_name}' not found. Creating it from the local store.")
+        worksheet = spreadsheet.add_worksheet(title=sheet_name, rows="1", cols=str(len(header)))
+        worksheet.update(range_name="A1", values=[header])
+        store.reset_sheet_rows()
+
+    # Append new rows
+    pending = store.unsynced_rows()
+    next_row = store.get_meta("next_sheet_row", 2)
+    if pending:
+        last_row = next_row + len(pending) - 1
+        if worksheet.row_count < last_row:
+            worksheet.add_rows(last_row - worksheet.row_count)
+        for offset in range(0, len(pending), APPEND_CHUNK_ROWS):
+            chunk = pending[offset:offset + APPEND_CHUNK_ROWS]
+            start_row = next_row + offset
+            worksheet.update(range_name=rowcol_to_a1(start_row, 1), values=[values for _, values in chunk])
+            store.connection.executemany(
+                "UPDATE sales_rows SET sheet_row = ?, dirty = 0 WHERE key = ?",
+                [(start_row + i, key) for i, (key, _) in enumerate(chunk)]
+            )
+            store.set_meta("next_sheet_row", start_row + len(chunk))
+            store.connection.commit()
+        print(f"[INFO] Appended {len(pending)} new sales row(s) to '{sheet_name}'.")
+
+    # Rewrite changed rows in place
+    changed = store.changed_rows()
+    if changed:
+        worksheet.batch_update([
+            {
+                "range": f"{rowcol_to_a1(sheet_row, 1)}:{rowcol_to_a1(sheet_row, len(values))}",
+                "values": [values]
+            }
+            for _, sheet_row, values in changed
+        ])
+        store.connection.executemany(
+            "UPDATE sales_rows SET dirty = 0 WHERE key = ?", [(key,) for key, _, _ in changed]
+        )
+        store.connection.commit()
+        print(f"[INFO] Updated {len(changed)} changed sales row(s) in '{sheet_name}'.")
+
+    if not pending and not changed:
+        print(f"[INFO] Sales sheet '{sheet_name}' is already up to date.")
+    return len(pending), len(changed)
+
+# -------------------------------------------------------------------
+# >>> BACKFILL ENTRY POINT <<<
+# -------------------------------------------------------------------
+
+if __name__ == "__main__":
+    import sys
+
+    # Usage: python sales_store.py <detail.csv> [<detail.csv> ...]
+    # Loads older exports into the store; the next sales run pushes them.
+    if len(sys.argv) < 2:
+        print("Usage: python sales_store.py <detail.csv> [<detail.csv> ...]")
+        sys.exit(1)
+    store = SalesStore()
+    try:
+        for csv_path in sys.argv[1:]:
+            store.ingest(csv_path)
+    finally:
+        store.close()
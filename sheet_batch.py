@@ -0,0 +1,104 @@
+from gspread.utils import rowcol_to_a1
+from tracing import count
+
+# -------------------------------------------------------------------
+# >>> BUFFERED SHEET WRITES <<<
+# -------------------------------------------------------------------
+
+class SheetWriteBuffer:
+    """
+    Collects cell reads and writes for one worksheet and sends the writes
+    as a single `batch_update` call when flushed.
+
+    Reads are served from one `get_all_values()` snapshot which is kept in
+    step with the buffered writes, so a handler can scan the sheet as often
+    as it likes without costing extra Sheets API round trips.
+
+    Parameters:
+    - sheet: gspread Worksheet instance.
+    """
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.title = sheet.title
+        self.pending = {}       # (row, col) -> value, both 1-based
+        self.api_calls = 0      # Calls since the last take_api_calls()
+        self.total_api_calls = 0
+        self._values = None
+
+    def _count_call(self):
+        self.api_calls += 1
+        self.total_api_calls += 1
+        count("sheets_api_calls")
+
+    def get_all_values(self):
+        """Returns the cached sheet snapshot, fetching it on first use."""
+        if self._values is None:
+            self._values = self.sheet.get_all_values()
+            self._count_call()
+        return self._values
+
+    def col_values(self, col):
+        """Returns the values of a 1-based column, trimmed like gspread does."""
+        values = [row[col - 1] if len(row) >= col else "" for row in self.get_all_values()]
+        while values and values[-1] == "":
+            values.pop()
+        return values
+
+    def cell_value(self, row, col):
+        """Returns the value at a 1-based (row, col) from the snapshot."""
+        values = self.get_all_values()
+        if row > len(values) or col > len(values[row - 1]):
+            return ""
+        return values[row - 1][col - 1]
+
+    def update_cell(self, row, col, value):
+        """Queues a cell write; nothing is sent until flush()."""
+        self.pending[(row, col)] = value
+
+        # Keep the snapshot consistent with what the sheet will contain
+        if self._values is not None:
+            while len(self._values) < row:
+                self._values.append([])
+            sheet_row = self._values[row - 1]
+            while len(sheet_row) < col:
+                sheet_row.append("")
+            sheet_row[col - 1] = "" if value is None else str(value)
+
+    def _build_ranges(self):
+        """Merges queued cells into contiguous per-row ranges (e.g. F5:G5)."""
+        ranges = []
+        for row in sorted({r for r, _ in self.pending}):
+            cols = sorted(c for r, c in self.pending if r == row)
+            run = [cols[0]]
+            for col in cols[1:] + [None]:
+                if col is not None and col == run[-1] + 1:
+                    run.append(col)
+                    continue
+                start, end = rowcol_to_a1(row, run[0]), rowcol_to_a1(row, run[-1])
+                ranges.append({
+                    "range": start if start == end else f"{start}:{end}",
+                    "values": [[self.pending[(row, c)] for c in run]],
+                })
+                if col is not None:
+                    run = [col]
+        return ranges
+
+    def flush(self):
+        """
+        Sends every queued write in one `batch_update` call.
+        Returns the number of cells written.
+        """
+        if not self.pending:
+            return 0
+        cell_count = len(self.pending)
+        self.sheet.batch_update(self._build_ranges(), value_input_option="USER_ENTERED")
+        self._count_call()
+        self.pending.clear()
+        print(f"[DEBUG] Flushed {cell_count} cell(s) to '{self.title}' in one batch update.")
+        return cell_count
+
+    def take_api_calls(self):
+        """Returns the API calls made since the last call and resets the counter."""
+        calls, self.api_calls = self.api_calls, 0
+        return calls
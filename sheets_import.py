@@ -0,0 +1,190 @@
+import os
+import csv
+import json
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from gspread.utils import rowcol_to_a1
+from googleapiclient.http import MediaFileUpload
+from google_clients import get_drive_service, get_gspread_client
+from tracing import span, current_span
+
+# -------------------------------------------------------------------
+# >>> STREAMING CSV IMPORT <<<
+# -------------------------------------------------------------------
+
+DEFAULT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "2000"))
+DEFAULT_IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "1"))
+
+def progress_file_for(file_path):
+    """Returns the resume-marker path kept next to the CSV."""
+    return f"{file_path}.import.json"
+
+def load_progress(file_path, sheet_name):
+    """
+    Returns the number of rows already committed to `sheet_name` by an
+    earlier, interrupted import of `file_path` (0 if none).
+    """
+    marker = progress_file_for(file_path)
+    if not os.path.exists(marker):
+        return 0
+    with open(marker, "r", encoding="utf-8") as f:
+        progress = json.load(f)
+    if progress.get("sheet_name") != sheet_name or progress.get("file_size") != os.path.getsize(file_path):
+        return 0
+    return progress.get("rows_committed", 0)
+
+def save_progress(file_path, sheet_name, rows_committed):
+    marker = progress_file_for(file_path)
+    with open(marker + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "sheet_name": sheet_name,
+            "file_size": os.path.getsize(file_path),
+            "rows_committed": rows_committed
+        }, f)
+    os.replace(marker + ".tmp", marker)
+
+def clear_progress(file_path):
+    marker = progress_file_for(file_path)
+    if os.path.exists(marker):
+        os.remove(marker)
+
+def measure_csv(file_path):
+    """
+    Returns (row_count, column_count) in one streaming pass, without keeping
+    the rows in memory.
+    """
+    rows = 0
+    cols = 0
+    with open(file_path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            rows += 1
+            cols = max(cols, len(row))
+    return rows, cols
+
+def iter_csv_blocks(file_path, chunk_rows, skip_rows=0):
+    """Yields (first_row_number, rows) blocks of at most `chunk_rows` rows (1-based)."""
+    with open(file_path, "r", newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        for _ in islice(reader, skip_rows):
+            pass
+        start_row = skip_rows + 1
+        while True:
+            block = list(islice(reader, chunk_rows))
+            if not block:
+                return
+            yield start_row, block
+            start_row += len(block)
+
+def import_csv_in_chunks(worksheet, file_path, total_rows, chunk_rows=DEFAULT_CHUNK_ROWS,
+                         workers=DEFAULT_IMPORT_WORKERS):
+    """
+    Streams a CSV file into `worksheet` in fixed-size row blocks.
+
+    At most `workers * 2` blocks are held in memory at once. After each
+    block the number of contiguously committed rows is saved next to the
+    CSV, so a re-run resumes from the last committed block.
+
+    Parameters:
+    - worksheet: gspread Worksheet to write into (already sized).
+    - file_path: Path to the CSV file.
+    - total_rows: Row count of the CSV, used for progress output.
+    - chunk_rows: Rows per `update` request.
+    - workers: Number of blocks written concurrently.
+    """
+    committed = load_progress(file_path, worksheet.title)
+    if committed:
+        print(f"[INFO] Resuming import of '{worksheet.title}' after row {committed}.")
+
+    finished = {}   # first row -> block length, for blocks done out of order
+    import_span = current_span()
+    in_flight = {}
+
+    def write_block(start_row, block):
+        # Runs on a pool thread, so nest under the caller's span explicitly
+        with span("sheets_chunk", parent=import_span, start_row=start_row) as chunk_span:
+            worksheet.update(range_name=rowcol_to_a1(start_row, 1), values=block)
+            chunk_span.count("sheets_api_calls")
+            chunk_span.count("rows", len(block))
+        return start_row, len(block)
+
+    def collect(done):
+        nonlocal committed
+        for future in done:
+            del in_flight[future]
+            start_row, length = future.result()
+            finished[start_row] = length
+        # Only advance the resume marker over a gap-free prefix
+        while committed + 1 in finished:
+            committed += finished.pop(committed + 1)
+        save_progress(file_path, worksheet.title, committed)
+        print(f"[INFO] Imported {committed}/{total_rows} rows ({committed * 100 // max(total_rows, 1)}%).")
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for start_row, block in iter_csv_blocks(file_path, chunk_rows, skip_rows=committed):
+            in_flight[executor.submit(write_block, start_row, block)] = start_row
+            if len(in_flight) >= workers * 2:
+                collect(wait(in_flight, return_when=FIRST_COMPLETED)[0])
+        while in_flight:
+            collect(wait(in_flight, return_when=FIRST_COMPLETED)[0])
+
+    clear_progress(file_path)
+    return committed
+
+# -------------------------------------------------------------------
+# >>> SERVER-SIDE DRIVE IMPORT <<<
+# -------------------------------------------------------------------
+
+SPREADSHEET_MIME_TYPE = "application/vnd.google-apps.spreadsheet"
+
+def upload_csv(file_path, name, convert=False):
+    """
+    Uploads a CSV file to Google Drive and returns its file ID.
+
+    Parameters:
+    - file_path: Path to the CSV file.
+    - name: Drive file name.
+    - convert: Let Drive convert the upload into a Google spreadsheet.
+    """
+    file_metadata = {
+        'name': name,
+        'mimeType': SPREADSHEET_MIME_TYPE if convert else 'application/vnd.ms-excel'
+    }
+    media = MediaFileUpload(file_path, mimetype='text/csv', resumable=True)
+    uploaded_file = get_drive_service().files().create(body=file_metadata, media_body=media, fields='id').execute()
+    return uploaded_file['id']
+
+def copy_converted_sheet(converted_id, spreadsheet, sheet_name, replace_sheet=None):
+    """
+    Copies the first tab of a Drive-converted spreadsheet into
+    `spreadsheet` as `sheet_name`. The cells are copied by the Sheets
+    backend, so none of them pass through this process or count against
+    the values API. Returns the sheet ID of the new tab.
+
+    With `replace_sheet` (a Worksheet), that tab is deleted in the same
+    batch update that names the copy, only once the copy exists, so a
+    failed copy never leaves the spreadsheet without the old tab.
+    """
+    source = get_gspread_client().open_by_key(converted_id).sheet1
+    properties = source.copy_to(spreadsheet.id)
+    requests = [{"deleteSheet": {"sheetId": replace_sheet.id}}] if replace_sheet is not None else []
+    requests.append({
+        "updateSheetProperties": {
+            "properties": {"sheetId": properties["sheetId"], "title": sheet_name},
+            "fields": "title",
+        }
+    })
+    try:
+        spreadsheet.batch_update({"requests": requests})
+    except Exception:
+        # Leave the spreadsheet as it was: drop the half-imported copy
+        spreadsheet.batch_update({"requests": [{"deleteSheet": {"sheetId": properties["sheetId"]}}]})
+        raise
+    return properties["sheetId"]
+
+def delete_drive_file(file_id):
+    """Deletes a Drive file, logging instead of raising on API errors."""
+    try:
+        get_drive_service().files().delete(fileId=file_id).execute()
+        print(f"[DEBUG] Deleted Drive file {file_id}.")
+    except Exception as e:
+        print(f"[WARNING] Could not delete Drive file {file_id}. Error: {e}")
@@ -0,0 +1,249 @@
+import os
+import time
+import urllib.request
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import NoSuchElementException, TimeoutException
+from dotenv import load_dotenv
+from browser_factory import create_driver, create_attached_driver, block_resources
+from wait_policy import wait_policy, network_idle
+from tracing import span
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+load_dotenv()
+
+# Overridden by the offline benchmark to point at its local fake dashboard
+SQUARE_BASE_URL = os.getenv("SQUARE_BASE_URL", "https://app.squareup.com").rstrip("/")
+SQUARE_HOME_URL = f"{SQUARE_BASE_URL}/dashboard"
+
+# Persistent profile and remote-debugging endpoint of the shared browser
+BROWSER_PROFILE_DIR = os.getenv("BROWSER_PROFILE_DIR", os.path.join(os.getcwd(), "chrome-profile"))
+BROWSER_DEBUG_HOST = os.getenv("BROWSER_DEBUG_HOST", "127.0.0.1")
+BROWSER_DEBUG_PORT = int(os.getenv("BROWSER_DEBUG_PORT", "9222"))
+
+# Cookie whose expiry marks the end of the Square session
+SESSION_COOKIE_NAME = os.getenv("SQUARE_SESSION_COOKIE", "_js_session")
+SESSION_CHECK_INTERVAL = int(os.getenv("SESSION_CHECK_INTERVAL", "300"))  # seconds
+
+# Set by the stage scheduler: file the tab ids opened on the shared browser
+# are appended to, so the tabs of a killed stage can be closed afterwards
+BROWSER_TAB_LOG = os.getenv("BROWSER_TAB_LOG")
+
+# -------------------------------------------------------------------
+# >>> LOGIN <<<
+# -------------------------------------------------------------------
+
+def on_login_page(driver):
+    """Returns True if the current page is the Square sign-in form."""
+    if "/login" in driver.current_url:
+        return True
+    return bool(driver.find_elements(By.ID, "mpui-combo-field-input"))
+
+def session_is_active(driver):
+    """
+    Checks whether the browser still holds a valid Square session.
+
+    The session cookie expiry is checked first, so no page load is needed
+    while the cookie is still valid.
+    """
+    cookie = driver.get_cookie(SESSION_COOKIE_NAME)
+    if cookie and cookie.get("expiry") and cookie["expiry"] <= time.time():
+        print(f"[INFO] Session cookie '{SESSION_COOKIE_NAME}' has expired.")
+        return False
+    return not on_login_page(driver)
+
+def login_to_square(driver, email, password):
+    """
+    Runs the email/password sign-in on the current page and dismisses the
+    optional 2FA promo prompts.
+    """
+    # Enter email
+    email_field = WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.ID, "mpui-combo-field-input"))
+    )
+    email_field.send_keys(email)
+    email_field.send_keys(Keys.RETURN)
+    print("[INFO] Entered email.")
+
+    # Enter password
+    password_field = WebDriverWait(driver, 20).until(
+        EC.presence_of_element_located((By.ID, "password"))
+    )
+    password_field.send_keys(password)
+    driver.find_element(By.NAME, "sign-in-button").click()
+    print("[INFO] Clicked 'Sign In' button.")
+
+    # Handle optional post-login prompts
+    try:
+        remind_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-sms-remind-me-btn"))
+        )
+        remind_button.click()
+        print("[INFO] Clicked 'Remind me next time' button.")
+
+        continue_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "2fa-post-login-promo-opt-out-modal-continue"))
+        )
+        continue_button.click()
+        print("[INFO] Clicked 'Continue to Square' button.")
+
+        wait_policy.wait(driver, "login.settled", network_idle(), default_timeout=30, required=False)
+    except Exception:
+        print("[WARNING] Post-login prompts not encountered or skipped.")
+
+    dismiss_notification_toaster(driver)
+
+def dismiss_notification_toaster(driver):
+    """Dismisses the post-login notification card if it is shown."""
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CLASS_NAME, "notifications-toaster.svelte-9e69kb.open"))
+        )
+        print("[DEBUG] Notifications toaster found.")
+
+        shadow_host = WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "eh-market-button[data-testid='notification-card-dismiss']"))
+        )
+        dismiss_button = WebDriverWait(shadow_host.shadow_root, 10).until(
+            EC.element_to_be_clickable((By.CLASS_NAME, "dismiss"))
+        )
+        dismiss_button.click()
+        print("[INFO] Dismiss button clicked.")
+    except (TimeoutException, NoSuchElementException):
+        print("[DEBUG] No notification toaster to dismiss.")
+    except Exception as e:
+        print(f"[DEBUG] Could not dismiss notification toaster. Error: {e}")
+
+def ensure_logged_in(driver, url, email, password):
+    """
+    Opens `url` and signs in only if Square redirected to the login form.
+    """
+    with span("navigate", url=url):
+        driver.get(url)
+    if on_login_page(driver):
+        print("[INFO] Square session not active. Logging in...")
+        with span("login"):
+            login_to_square(driver, email, password)
+        with span("navigate", url=url):
+            driver.get(url)
+    else:
+        print("[INFO] Reusing the existing Square session.")
+
+# -------------------------------------------------------------------
+# >>> BROWSER ATTACH / LAUNCH <<<
+# -------------------------------------------------------------------
+
+def daemon_is_running():
+    """Returns True if the shared browser answers on its debugging endpoint."""
+    try:
+        with urllib.request.urlopen(
+            f"http://{BROWSER_DEBUG_HOST}:{BROWSER_DEBUG_PORT}/json/version", timeout=2
+        ):
+            return True
+    except OSError:
+        return False
+
+def set_download_directory(driver, download_directory):
+    """Points Chrome downloads at `download_directory` (works on attached sessions)."""
+    os.makedirs(download_directory, exist_ok=True)
+    driver.execute_cdp_cmd("Page.setDownloadBehavior", {
+        "behavior": "allow",
+        "downloadPath": download_directory
+    })
+
+def attach_driver(download_directory=None):
+    """
+    Attaches to the shared browser daemon and opens a fresh tab for the caller.
+    """
+    driver = create_attached_driver(f"{BROWSER_DEBUG_HOST}:{BROWSER_DEBUG_PORT}")
+    driver.switch_to.new_window("tab")
+    driver.attached_to_daemon = True
+    if BROWSER_TAB_LOG:
+        # Chromedriver window handles are the DevTools target ids
+        with open(BROWSER_TAB_LOG, "a") as f:
+            f.write(driver.current_window_handle + "\n")
+    block_resources(driver)
+    if download_directory:
+        set_download_directory(driver, download_directory)
+    print(f"[INFO] Attached to shared browser on port {BROWSER_DEBUG_PORT}.")
+    return driver
+
+def launch_driver(download_directory=None, debug_port=None, profile_dir=None):
+    """
+    Starts a new lightweight Chrome (see browser_factory).
+
+    Parameters:
+    - download_directory: Folder Chrome should save downloads into.
+    - debug_port: Remote-debugging port to expose (daemon mode only).
+    - profile_dir: Persistent user-data dir; only one Chrome may use it at a time.
+    """
+    driver = create_driver(download_directory, debug_port, profile_dir)
+    driver.attached_to_daemon = False
+    if download_directory:
+        # Headless Chrome only honours the download folder set over CDP
+        set_download_directory(driver, download_directory)
+    return driver
+
+def open_driver(download_directory=None):
+    """
+    Returns a driver for a pipeline script.
+
+    Attaches to the browser daemon when it is running, otherwise falls back
+    to a private Chrome; call ensure_logged_in() afterwards in either case.
+    """
+    if daemon_is_running():
+        return attach_driver(download_directory)
+    print("[WARNING] Browser daemon not running. Starting a private browser.")
+    return launch_driver(download_directory)
+
+def release_driver(driver):
+    """
+    Closes the caller's tab on the shared browser, or quits a private browser.
+    """
+    try:
+        if getattr(driver, "attached_to_daemon", False):
+            # Only the caller's tab is closed; chromedriver leaves an
+            # attached browser running on quit()
+            driver.close()
+        driver.quit()
+        print("[INFO] WebDriver session closed successfully.")
+    except Exception as e:
+        print(f"[ERROR] Could not close WebDriver session. Error: {e}")
+
+# -------------------------------------------------------------------
+# >>> DAEMON <<<
+# -------------------------------------------------------------------
+
+def run_browser_daemon(email, password):
+    """
+    Keeps one logged-in Chrome alive on the remote-debugging port and
+    re-authenticates only when the Square session has expired.
+    """
+    driver = launch_driver(debug_port=BROWSER_DEBUG_PORT, profile_dir=BROWSER_PROFILE_DIR)
+    print(f"[INFO] Browser daemon listening on {BROWSER_DEBUG_HOST}:{BROWSER_DEBUG_PORT}.")
+    try:
+        ensure_logged_in(driver, SQUARE_HOME_URL, email, password)
+        home_window = driver.current_window_handle
+        while True:
+            time.sleep(SESSION_CHECK_INTERVAL)
+            driver.switch_to.window(home_window)
+            driver.refresh()  # Also keeps the session warm
+            if not session_is_active(driver):
+                # Reload so an expired session lands on the login form
+                ensure_logged_in(driver, SQUARE_HOME_URL, email, password)
+    finally:
+        driver.quit()
+        print("[INFO] Browser daemon stopped.")
+
+if __name__ == "__main__":
+    email = os.getenv("SQUARE_EMAIL")
+    password = os.getenv("SQUARE_PASSWORD")
+    if not email or not password:
+        print("[ERROR] Environment variables SQUARE_EMAIL and SQUARE_PASSWORD are not set.")
+        exit(1)
+    run_browser_daemon(email, password)
@@ -0,0 +1,307 @@
+import os
+import json
+import time
+import signal
+import subprocess
+import urllib.request
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from tracing import span, start_run, child_environment, summarize
+
+# -------------------------------------------------------------------
+# >>> PIPELINE GRAPH <<<
+# -------------------------------------------------------------------
+
+# Each stage lists the stages whose output it needs. Stages without a
+# dependency between them run at the same time.
+PIPELINE_STAGES = {
+    "1-cataLogFeedGoesHere.py": [],                            # Catalog export
+    "1-openSheet.py": ["1-cataLogFeedGoesHere.py"],            # Needs the catalog export
+    "2-Check_POS.py": [],
+    "3-downloadSales.py": [],
+}
+
+# Stages holding the same lock never run at the same time, whatever their
+# dependencies. Both exports drive the shared daemon Chrome, whose download
+# directory (Page.setDownloadBehavior) is browser-wide, so one export must
+# finish before the other points the browser's downloads elsewhere.
+STAGE_LOCKS = {
+    "1-cataLogFeedGoesHere.py": "browser_downloads",
+    "3-downloadSales.py": "browser_downloads",
+}
+
+# Deadline per stage in seconds; a stage still running then is killed with its whole process tree
+STAGE_DEADLINES = {
+    "1-cataLogFeedGoesHere.py": 15 * 60,
+    "1-openSheet.py": 10 * 60,
+    "2-Check_POS.py": 120 * 60,
+    "3-downloadSales.py": 20 * 60,
+}
+DEFAULT_STAGE_DEADLINE = float(os.getenv("STAGE_DEADLINE_MINUTES", "60")) * 60
+
+# Failed or timed-out stages are retried after STAGE_RETRY_BACKOFF, 2x, 4x, ... seconds
+STAGE_RETRIES = int(os.getenv("STAGE_RETRIES", "2"))
+STAGE_RETRY_BACKOFF = float(os.getenv("STAGE_RETRY_BACKOFF", "30"))
+
+# Seconds between SIGTERM and SIGKILL when stopping a stage's process tree
+KILL_GRACE_SECONDS = 10
+
+# DevTools endpoint of the shared browser daemon (see square_session)
+BROWSER_DEBUG_HOST = os.getenv("BROWSER_DEBUG_HOST", "127.0.0.1")
+BROWSER_DEBUG_PORT = int(os.getenv("BROWSER_DEBUG_PORT", "9222"))
+
+RUNS_DIRECTORY = os.path.join(os.getcwd(), "runs")
+CYCLE_LOG_FILE = os.path.join(RUNS_DIRECTORY, "cycles.jsonl")
+
+# -------------------------------------------------------------------
+# >>> STAGE EXECUTION <<<
+# -------------------------------------------------------------------
+
+def start_stage_process(script_name, env):
+    """
+    Starts a script in its own process group (session on POSIX), so the
+    script, its chromedriver and every Chrome process they start can be
+    signalled together.
+    """
+    if os.name == "nt":
+        return subprocess.Popen(["python", script_name], env=env,
+                                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP)
+    return subprocess.Popen(["python", script_name], env=env, start_new_session=True)
+
+def kill_process_tree(process, grace=KILL_GRACE_SECONDS):
+    """
+    Stops a stage and everything it started: SIGTERM to the process group,
+    then SIGKILL to whatever is left after `grace` seconds.
+    """
+    if os.name == "nt":
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        process.wait()
+        return
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    try:
+        process.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    reap_process_group(process, signal.SIGKILL)
+    process.wait()
+
+def reap_process_group(process, sig=signal.SIGTERM):
+    """
+    Signals processes left in a finished stage's group, e.g. Chrome and
+    chromedriver orphaned by a script that exited without quitting them.
+    Returns True if any were left.
+    """
+    if os.name == "nt":
+        return False
+    try:
+        os.killpg(process.pid, sig)
+    except (ProcessLookupError, PermissionError):
+        return False
+    return True
+
+def close_stage_tabs(tab_log):
+    """
+    Closes the shared-browser tabs listed in `tab_log` that are still open.
+    Killing a stage does not reach them: they belong to the daemon Chrome,
+    not to the stage's process group. The daemon's own tab is never listed.
+    Returns the number of tabs closed.
+    """
+    if not os.path.exists(tab_log):
+        return 0
+    with open(tab_log) as f:
+        tab_ids = {line.strip() for line in f if line.strip()}
+    os.remove(tab_log)
+    endpoint = f"http://{BROWSER_DEBUG_HOST}:{BROWSER_DEBUG_PORT}/json"
+    try:
+        with urllib.request.urlopen(f"{endpoint}/list", timeout=5) as response:
+            open_ids = {target["id"] for target in json.load(response)}
+    except OSError:
+        return 0
+    closed = 0
+    for tab_id in tab_ids & open_ids:
+        try:
+            with urllib.request.urlopen(f"{endpoint}/close/{tab_id}", timeout=5):
+                closed += 1
+        except OSError as e:
+            print(f"[WARNING] Could not close browser tab {tab_id}. Error: {e}")
+    return closed
+
+def run_stage_attempt(script_name, deadline, parent_span):
+    """
+    Runs one attempt of a stage under its deadline.
+    Returns (return_code, timed_out); return_code is None after a timeout.
+    """
+    with span("stage_attempt", parent=parent_span, script=script_name) as attempt_span:
+        env = child_environment(attempt_span)
+        tab_log = os.path.join(RUNS_DIRECTORY, f"tabs-{attempt_span.span_id}.txt")
+        os.makedirs(RUNS_DIRECTORY, exist_ok=True)
+        env["BROWSER_TAB_LOG"] = tab_log
+        process = start_stage_process(script_name, env)
+        try:
+            return_code = process.wait(timeout=deadline)
+        except subprocess.TimeoutExpired:
+            print(f"[WARNING] {script_name} exceeded its {deadline:.0f}s deadline. Killing its process tree.")
+            kill_process_tree(process)
+            closed = close_stage_tabs(tab_log)
+            if closed:
+                print(f"[INFO] Closed {closed} browser tab(s) left open by {script_name}.")
+            attempt_span.status = "timeout"
+            return None, True
+
+        if reap_process_group(process):
+            print(f"[WARNING] {script_name} left processes behind (e.g. Chrome). Terminated them.")
+        if close_stage_tabs(tab_log):
+            print(f"[WARNING] {script_name} left browser tabs open. Closed them.")
+        if return_code != 0:
+            attempt_span.status = f"exit code {return_code}"
+        return return_code, False
+
+def run_stage(script_name, cycle_span=None, deadline=None, retries=STAGE_RETRIES, backoff=STAGE_RETRY_BACKOFF):
+    """
+    Runs one pipeline script under a watchdog and returns its outcome:
+    {"status": "ok" | "failed" | "timeout", "return_code", "attempts",
+    "started_at", "finished_at"}.
+
+    Each attempt is killed (with its Chrome children) once it runs past
+    the stage's deadline; failed and timed-out attempts are retried up to
+    `retries` times with exponential backoff. The script's own spans nest
+    under this stage's span.
+    """
+    deadline = deadline or STAGE_DEADLINES.get(script_name, DEFAULT_STAGE_DEADLINE)
+    print(f"Starting execution of {script_name}...")
+    with span("stage", parent=cycle_span, script=script_name) as stage_span:
+        started_at = time.time()
+        for attempt in range(1, retries + 2):
+            return_code, timed_out = run_stage_attempt(script_name, deadline, stage_span)
+            if return_code == 0 or attempt > retries:
+                break
+            delay = backoff * 2 ** (attempt - 1)
+            outcome = "timed out" if timed_out else f"failed with exit code {return_code}"
+            print(f"[WARNING] {script_name} {outcome} (attempt {attempt}). Retrying in {delay:.0f}s.")
+            time.sleep(delay)
+        finished_at = time.time()
+        status = "ok" if return_code == 0 else "timeout" if timed_out else "failed"
+        stage_span.attrs["attempts"] = attempt
+        if status != "ok":
+            stage_span.status = status if timed_out else f"exit code {return_code}"
+    print(f"Execution of {script_name} finished in {finished_at - started_at:.1f}s ({status}, {attempt} attempt(s)).")
+    return {"status": status, "return_code": return_code, "attempts": attempt,
+            "started_at": started_at, "finished_at": finished_at}
+
+def critical_path(stages, results):
+    """
+    Returns (seconds, [stage names]) for the longest dependency chain,
+    using each stage's measured duration.
+    """
+    longest = {}
+
+    def chain(name):
+        if name not in longest:
+            result = results.get(name)
+            duration = result["duration"] if result else 0.0
+            best = (0.0, [])
+            for dependency in stages[name]:
+                candidate = chain(dependency)
+                if candidate[0] > best[0]:
+                    best = candidate
+            longest[name] = (best[0] + duration, best[1] + [name])
+        return longest[name]
+
+    return max((chain(name) for name in stages), key=lambda item: item[0], default=(0.0, []))
+
+def run_cycle(stages=PIPELINE_STAGES, max_parallel=None):
+    """
+    Runs every stage once, starting each as soon as all of its dependencies
+    have finished successfully. A stage whose dependency failed is skipped.
+
+    Parameters:
+    - stages: Mapping of script name -> list of script names it depends on.
+    - max_parallel: Maximum number of scripts running at once (default: all).
+
+    Returns a cycle report with per-stage outcomes, wall-clock time and the
+    critical-path time.
+    """
+    run_id = start_run()
+    with span("cycle") as cycle_span:
+        results = _run_stages(stages, max_parallel, cycle_span)
+    cycle_started = cycle_span.started
+
+    wall_clock = time.time() - cycle_started
+    path_seconds, path = critical_path(stages, results)
+    report = {
+        "run_id": run_id,
+        "cycle_started": datetime.fromtimestamp(cycle_started).isoformat(timespec="seconds"),
+        "wall_clock": round(wall_clock, 3),
+        "critical_path": round(path_seconds, 3),
+        "critical_path_stages": path,
+        "stages": results,
+    }
+    print(f"Cycle finished in {wall_clock:.1f}s (critical path {path_seconds:.1f}s: {' -> '.join(path)}).")
+    print_cycle_report(report)
+    record_cycle(report)
+    summarize(run_id)
+    return report
+
+def _run_stages(stages, max_parallel, cycle_span):
+    """Runs the stage graph for run_cycle() and returns per-stage results."""
+    cycle_started = cycle_span.started
+    results = {}
+    running = {}
+    pending = dict(stages)
+
+    with ThreadPoolExecutor(max_workers=max_parallel or len(stages)) as executor:
+        while pending or running:
+            # Launch or skip every stage whose dependencies are settled
+            settled = False
+            for name, dependencies in list(pending.items()):
+                if any(dep in pending or dep in running.values() for dep in dependencies):
+                    continue
+                lock = STAGE_LOCKS.get(name)
+                if lock and any(STAGE_LOCKS.get(other) == lock for other in running.values()):
+                    continue
+                del pending[name]
+                settled = True
+                failed = [dep for dep in dependencies if results[dep]["status"] != "ok"]
+                if failed:
+                    print(f"Skipping {name}: dependency {', '.join(failed)} did not succeed.")
+                    results[name] = {"status": "skipped", "duration": 0.0}
+                    continue
+                running[executor.submit(run_stage, name, cycle_span)] = name
+
+            if not running:
+                if pending and not settled:
+                    raise ValueError(f"Stage dependencies cannot be resolved: {sorted(pending)}")
+                continue
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    outcome = future.result()
+                    results[name] = {
+                        "status": outcome["status"],
+                        "return_code": outcome["return_code"],
+                        "attempts": outcome["attempts"],
+                        "started": round(outcome["started_at"] - cycle_started, 3),
+                        "duration": round(outcome["finished_at"] - outcome["started_at"], 3),
+                    }
+                except Exception as e:
+                    print(f"[ERROR] Could not run {name}. Error: {e}")
+                    results[name] = {"status": "failed", "error": str(e), "duration": 0.0}
+    return results
+
+def print_cycle_report(report):
+    """Prints the outcome, attempts and duration of every stage of a cycle."""
+    print(f"{'Stage':<28} {'Status':<8} {'Attempts':>8} {'Seconds':>9}")
+    for name, result in report["stages"].items():
+        print(f"{name:<28} {result['status']:<8} {result.get('attempts', 0):>8} {result['duration']:>9.1f}")
+
+def record_cycle(report, log_file=CYCLE_LOG_FILE):
+    """Appends a cycle report as one JSON line."""
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    with open(log_file, "a", encoding="utf-8") as f:
+        f.write(json.dumps(report) + "\n")
@@ -0,0 +1,182 @@
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+TRACE_DIRECTORY = os.getenv("TRACE_DIRECTORY", os.path.join(os.getcwd(), "runs"))
+
+# A daily.py cycle hands its run id and the stage span to each script
+ROOT_PARENT_ID = os.getenv("PIPELINE_PARENT_SPAN")
+
+_local = threading.local()
+_write_lock = threading.Lock()
+_run = {"id": os.getenv("PIPELINE_RUN_ID")}
+
+def new_run_id():
+    return datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+
+def start_run():
+    """Starts a new run (one JSONL file) and returns its id."""
+    _run["id"] = new_run_id()
+    return _run["id"]
+
+def current_run_id():
+    if not _run["id"]:
+        _run["id"] = new_run_id()
+    return _run["id"]
+
+# -------------------------------------------------------------------
+# >>> SPANS <<<
+# -------------------------------------------------------------------
+
+class Span:
+    """One timed step of a run; `counts` holds things like API calls or rows."""
+
+    def __init__(self, name, parent_id, attrs):
+        self.span_id = uuid.uuid4().hex[:12]
+        self.parent_id = parent_id
+        self.name = name
+        self.attrs = attrs
+        self.counts = {}
+        self.status = "ok"
+        self.started = time.time()
+
+    def count(self, key, amount=1):
+        self.counts[key] = self.counts.get(key, 0) + amount
+
+    def to_record(self, finished):
+        return {
+            "run_id": current_run_id(),
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.started, 3),
+            "duration": round(finished - self.started, 3),
+            "status": self.status,
+            "attrs": self.attrs,
+            "counts": self.counts,
+            "pid": os.getpid(),
+        }
+
+def _stack():
+    if not hasattr(_local, "stack"):
+        _local.stack = []
+    return _local.stack
+
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+def trace_file(run_id=None):
+    return os.path.join(TRACE_DIRECTORY, f"{run_id or current_run_id()}.jsonl")
+
+def _write(record):
+    os.makedirs(TRACE_DIRECTORY, exist_ok=True)
+    line = json.dumps(record, default=str) + "\n"
+    with _write_lock:
+        # One append per span keeps lines from concurrent scripts intact
+        with open(trace_file(), "a", encoding="utf-8") as f:
+            f.write(line)
+
+@contextmanager
+def span(name, parent=None, **attrs):
+    """
+    Times a block as a span nested under the current one (or `parent`,
+    for work handed to another thread) and appends it to the run's JSONL.
+
+    Usage:
+        with span("order", order=order_number) as s:
+            s.count("sheets_api_calls", 2)
+    """
+    stack = _stack()
+    if parent is not None:
+        parent_id = parent.span_id
+    elif stack:
+        parent_id = stack[-1].span_id
+    else:
+        parent_id = ROOT_PARENT_ID
+    current = Span(name, parent_id, attrs)
+    stack.append(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = f"error: {type(e).__name__}"
+        raise
+    finally:
+        stack.pop()
+        _write(current.to_record(time.time()))
+
+def trace_script(name, **attrs):
+    """
+    Opens a span covering the rest of this script's process and closes it
+    at exit, for scripts whose steps run at module level.
+    """
+    manager = span(name, **attrs)
+    root = manager.__enter__()
+
+    def finish():
+        manager.__exit__(None, None, None)
+
+    atexit.register(finish)
+    return root
+
+def count(key, amount=1):
+    """Adds to a counter on the current span, if any."""
+    current = current_span()
+    if current is not None:
+        current.count(key, amount)
+
+def child_environment(parent):
+    """Environment for a subprocess whose spans should nest under `parent`."""
+    env = dict(os.environ)
+    env["PIPELINE_RUN_ID"] = current_run_id()
+    env["PIPELINE_PARENT_SPAN"] = parent.span_id
+    return env
+
+# -------------------------------------------------------------------
+# >>> SUMMARY <<<
+# -------------------------------------------------------------------
+
+def summarize(run_id=None, top=15):
+    """Prints the span names of a run that took the most total time."""
+    run_id = run_id or current_run_id()
+    path = trace_file(run_id)
+    if not os.path.exists(path):
+        print(f"[ERROR] No trace found for run {run_id}.")
+        return []
+
+    totals = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            entry = totals.setdefault(record["name"], {"calls": 0, "total": 0.0, "max": 0.0, "counts": {}})
+            entry["calls"] += 1
+            entry["total"] += record["duration"]
+            entry["max"] = max(entry["max"], record["duration"])
+            for key, amount in record["counts"].items():
+                entry["counts"][key] = entry["counts"].get(key, 0) + amount
+
+    rows = sorted(totals.items(), key=lambda item: item[1]["total"], reverse=True)[:top]
+    print(f"[INFO] Slowest stages of run {run_id}:")
+    print(f"{'Span':<32} {'Calls':>6} {'Total s':>9} {'Avg s':>8} {'Max s':>8}  Counts")
+    for name, entry in rows:
+        counts = ", ".join(f"{key}={amount}" for key, amount in sorted(entry["counts"].items()))
+        print(f"{name:<32} {entry['calls']:>6} {entry['total']:>9.1f} "
+              f"{entry['total'] / entry['calls']:>8.2f} {entry['max']:>8.1f}  {counts}")
+    return rows
+
+if __name__ == "__main__":
+    # Usage: python tracing.py <run_id>
+    if len(sys.argv) < 2:
+        print("Usage: python tracing.py <run_id>")
+        sys.exit(1)
+    summarize(sys.argv[1])
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import tempfile
+import atexit
+import threading
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.common.exceptions import TimeoutException
+
+# -------------------------------------------------------------------
+# >>> GLOBALS & CONSTANTS <<<
+# -------------------------------------------------------------------
+
+WAIT_LATENCY_PATH = os.getenv("WAIT_LATENCY_PATH", os.path.join(os.getcwd(), "wait_latency.json"))
+
+HISTORY_SIZE = 200          # Samples kept per wait point
+MIN_SAMPLES = 5             # Below this, the default timeout is used
+TIMEOUT_PERCENTILE = 95
+TIMEOUT_FACTOR = 2.0        # Headroom over the observed percentile
+MIN_TIMEOUT = 3.0
+MAX_TIMEOUT = 90.0
+
+# Resource count must hold still this long to count as network idle
+NETWORK_IDLE_SECONDS = 0.5
+
+# Run at the start of each network_idle() wait; the larger buffer keeps one busy wait from filling it
+NETWORK_IDLE_RESET_SCRIPT = "performance.clearResourceTimings(); performance.setResourceTimingBufferSize(5000); "
+
+# -------------------------------------------------------------------
+# >>> PAGE CONDITIONS <<<
+# -------------------------------------------------------------------
+
+def network_idle(idle_seconds=NETWORK_IDLE_SECONDS):
+    """
+    Condition: the document is loaded and no resource request has
+    completed for `idle_seconds`.
+
+    Resource timing entries only appear once a request finishes, so a
+    request still in flight is invisible here: use this to let a page
+    settle, not to wait for a particular slow request.
+
+    The first poll clears the page's resource timing entries: Chrome stops
+    recording them once its buffer (250 by default) is full, which on a
+    long-lived tab would freeze the count and make every wait "idle".
+    """
+    state = {"count": None, "since": None}
+
+    def condition(driver):
+        script = NETWORK_IDLE_RESET_SCRIPT if state["count"] is None else ""
+        ready, count = driver.execute_script(
+            script + "return [document.readyState, performance.getEntriesByType('resource').length];"
+        )
+        now = time.time()
+        if ready != "complete" or count != state["count"]:
+            state["count"], state["since"] = count, now
+            return False
+        return now - state["since"] >= idle_seconds
+
+    return condition
+
+def row_count_changes(css_selector, previous_count):
+    """Condition: the number of elements matching `css_selector` differs from `previous_count`."""
+    def condition(driver):
+        return len(driver.find_elements(By.CSS_SELECTOR, css_selector)) != previous_count
+    return condition
+
+def text_changes(locator, previous_text):
+    """Condition: the element at `locator` is present and its text differs from `previous_text`."""
+    def condition(driver):
+        elements = driver.find_elements(*locator)
+        return bool(elements) and elements[0].text != previous_text
+    return condition
+
+def rows_present(css_selector, minimum=1):
+    """Condition: at least `minimum` elements match `css_selector`."""
+    def condition(driver):
+        return len(driver.find_elements(By.CSS_SELECTOR, css_selector)) >= minimum
+    return condition
+
+# -------------------------------------------------------------------
+# >>> WAIT POLICY <<<
+# -------------------------------------------------------------------
+
+class WaitPolicy:
+    """
+    Waits on page conditions instead of fixed sleeps and learns how long
+    each named wait point usually takes.
+
+    The timeout for a wait point is derived from the 95th percentile of its
+    recent latencies (with headroom), so slow days get longer timeouts.
+    Only optional waits may also get shorter ones, so fast days stop paying
+    for the worst case; a required wait never drops below its default,
+    since timing it out aborts the work. Latencies are saved to disk so
+    every run starts from what earlier runs observed.
+
+    Parameters:
+    - path: JSON file holding the latency history.
+    """
+
+    def __init__(self, path=WAIT_LATENCY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.history = self._load()
+        self.touched = set()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[DEBUG] Ignoring unreadable wait latency file. Error: {e}")
+            return {}
+
+    def timeout_for(self, point, default, required=True):
+        """
+        Returns the tuned timeout for `point`, or `default` until enough
+        samples exist. Required waits never get less than `default`.
+        """
+        with self.lock:
+            samples = sorted(self.history.get(point, []))
+        if len(samples) < MIN_SAMPLES:
+            return default
+        index = min(len(samples) - 1, int(len(samples) * TIMEOUT_PERCENTILE / 100))
+        tuned = min(MAX_TIMEOUT, max(MIN_TIMEOUT, samples[index] * TIMEOUT_FACTOR))
+        return max(default, tuned) if required else tuned
+
+    def record(self, point, seconds):
+        with self.lock:
+            samples = self.history.setdefault(point, [])
+            samples.append(round(seconds, 3))
+            del samples[:-HISTORY_SIZE]
+            self.touched.add(point)
+
+    def wait(self, driver, point, condition, default_timeout=30, required=True, record_timeouts=True):
+        """
+        Waits until `condition(driver)` is truthy and returns its value.
+
+        Parameters:
+        - driver: Selenium WebDriver instance.
+        - point: Name of the wait point, e.g. "po.modal_loaded".
+        - condition: Callable taking the driver (e.g. an expected_conditions check).
+        - default_timeout: Timeout used until the point has enough history;
+          the floor for required waits afterwards.
+        - required: If False, a timeout returns None instead of raising.
+        - record_timeouts: If False, timeouts are expected (e.g. end of a list)
+          and are not added to the latency history.
+        """
+        timeout = self.timeout_for(point, default_timeout, required)
+        started = time.time()
+        try:
+            result = WebDriverWait(driver, timeout, poll_frequency=0.2).until(condition)
+        except TimeoutException:
+            # Record the timeout too so the next run waits longer
+            if record_timeouts:
+                self.record(point, time.time() - started)
+            print(f"[DEBUG] Wait '{point}' timed out after {timeout:.1f}s.")
+            if required:
+                raise
+            return None
+        self.record(point, time.time() - started)
+        return result
+
+    def save(self):
+        """Writes the wait points this process used, keeping other scripts' history."""
+        with self.lock:
+            if not self.touched:
+                return
+            merged = self._load()
+            merged.update({point: self.history[point] for point in self.touched})
+            snapshot = json.dumps(merged)
+        # A temp file per writer, since several scripts save at the same time
+        temp_path = None
+        try:
+            with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=os.path.dirname(self.path) or ".",
+                                             prefix=".wait_latency.", suffix=".tmp", delete=False) as f:
+                temp_path = f.name
+                f.write(snapshot)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"[WARNING] Could not save wait latencies. Error: {e}")
+            if temp_path and os.path.exists(temp_path):
+                os.remove(temp_path)
+
+# One policy per process, saved when the script exits
+wait_policy = WaitPolicy()
+atexit.register(wait_policy.save)